@@ -35,11 +35,113 @@ class Settings(BaseSettings):
     
     # Email Configuration
     SES_FROM_EMAIL: Optional[str] = None
+    SES_ENDPOINT_URL: Optional[str] = None  # e.g. a local SES stub for tests
+    # Bulk sends: at most SES_MAX_SEND_RATE messages/second (the account's SES quota), over SES_SEND_CONCURRENCY threads
+    SES_MAX_SEND_RATE: float = 14.0
+    SES_SEND_CONCURRENCY: int = 8
     
     # Stripe Configuration
     STRIPE_WEBHOOK_SECRET: Optional[str] = None
     STRIPE_SECRET_KEY: Optional[str] = None
     
+    # Service providers, for offline runs and load tests (see services/providers.py):
+    # S3_PROVIDER/SES_PROVIDER "aws", "moto" or "fake"; STRIPE_PROVIDER "stripe" or "fake".
+    # Stand-ins add PROVIDER_LATENCY_MS (+- jitter) to each call and fail PROVIDER_ERROR_RATE of them.
+    S3_PROVIDER: str = "aws"
+    SES_PROVIDER: str = "aws"
+    STRIPE_PROVIDER: str = "stripe"
+    STRIPE_FIXTURES_DIR: Optional[str] = None
+    PROVIDER_LATENCY_MS: float = 0.0
+    PROVIDER_LATENCY_JITTER_MS: float = 0.0
+    PROVIDER_ERROR_RATE: float = 0.0
+    
+    # Session status events (SSE): "memory" for in-process, "postgres" for LISTEN/NOTIFY
+    SESSION_EVENTS_BACKEND: str = "memory"
+    SESSION_EVENTS_CHANNEL: str = "session_events"
+    SESSION_EVENTS_HEARTBEAT_SECONDS: int = 15
+    
+    # Task catalog cache (per process unless a shared Redis-compatible URL is set)
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_TTL_SECONDS: int = 60
+    TASK_CACHE_MAX_ENTRIES: int = 1024  # in-memory backend only; least recently used pages are evicted
+    TASK_CACHE_REDIS_URL: Optional[str] = None
+    
+    # Authenticated-user snapshot cache used by get_current_user
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 4096
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    
+    # Refresh tokens and access-token revocation (revocations from other processes
+    # become visible within TOKEN_REVOCATION_SYNC_SECONDS)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 30
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    
+    # Rate limits as "burst/seconds" (empty disables); shared across processes when a Redis URL is set
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    RATE_LIMIT_LOGIN_PER_IP: str = "20/60"
+    RATE_LIMIT_LOGIN_PER_EMAIL: str = "10/600"
+    RATE_LIMIT_INVITATION_VALIDATE_PER_IP: str = "30/60"
+    
+    # Response compression; "zstd" needs the optional zstandard package (and isn't understood by Mangum)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: str = "br,gzip"
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Request metrics: Prometheus text on /metrics (bearer METRICS_TOKEN; without one only served in development);
+    # CloudWatch EMF log lines default to on under Lambda
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    METRICS_EMF: Optional[bool] = None
+    METRICS_NAMESPACE: str = "Efference/API"
+    
+    # Per-request query accounting (N+1 warnings); defaults to on in development
+    QUERY_ACCOUNTING_ENABLED: Optional[bool] = None
+    QUERY_COUNT_WARN_THRESHOLD: int = 20
+    QUERY_DUPLICATE_WARN_THRESHOLD: int = 3
+    
+    # Slow-query log served at /admin/slow-queries (threshold 0 disables)
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = 300
+    
+    # Email outbox dispatcher: batches are retried with capped exponential backoff, then marked FAILED.
+    # Lambda drains it on a schedule; the in-process worker runs elsewhere unless disabled.
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30.0
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = 3600.0
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300  # a claimed batch is retried after this if its dispatcher dies
+    EMAIL_OUTBOX_WORKER_ENABLED: Optional[bool] = None  # None = on unless running on Lambda
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    
+    # Stripe webhook events: recorded once per event id, then processed by a worker with retries
+    # (scheduled on Lambda; the in-process worker runs elsewhere unless disabled)
+    STRIPE_EVENTS_BATCH_SIZE: int = 20
+    STRIPE_EVENTS_MAX_ATTEMPTS: int = 10
+    STRIPE_EVENTS_BACKOFF_SECONDS: float = 30.0
+    STRIPE_EVENTS_MAX_BACKOFF_SECONDS: float = 3600.0
+    STRIPE_EVENTS_LEASE_SECONDS: int = 300
+    STRIPE_EVENTS_WORKER_ENABLED: Optional[bool] = None  # None = on unless running on Lambda
+    STRIPE_EVENTS_POLL_SECONDS: float = 5.0
+    
+    # Password hashing pool: mode is "process", "thread" or "inline" (default: process, thread on Lambda)
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # "bcrypt" or "argon2"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_KIB: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    PASSWORD_HASHER_MODE: Optional[str] = None
+    PASSWORD_HASHER_WORKERS: int = 0  # 0 = one per CPU
+    PASSWORD_HASHER_QUEUE_SIZE: int = 32
+    PASSWORD_HASHER_ACQUIRE_TIMEOUT_SECONDS: float = 0.5
+    
     # Application Configuration
     APP_NAME: str = "Efference Video Training Platform API"
     APP_VERSION: str = "1.0.0"
@@ -14,10 +14,12 @@ from sqlalchemy import (
     Integer,
     BigInteger,
     Enum as SQLAlchemyEnum,
-    UniqueConstraint
+    Index,
+    UniqueConstraint,
+    event
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.orm import relationship, Mapped, mapped_column, object_session
 from .base import Base
 
 
@@ -66,6 +68,18 @@ class TaskRequestStatus(enum.Enum):
     CANCELLED = "CANCELLED"
 
 
+class StripeEventStatus(enum.Enum):
+    PENDING = "PENDING"
+    PROCESSED = "PROCESSED"
+    FAILED = "FAILED"
+
+
+class EmailOutboxStatus(enum.Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
 # --- Model Definitions ---
 
 class Sex(enum.Enum):
@@ -101,6 +115,9 @@ class User(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(timezone.utc))
 
+    # Bumped on every ORM update; used for ETags of resources embedding this user
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     # --- Relationships ---
     # A user (admin) can create many tasks
     created_tasks: Mapped[list["Task"]] = relationship(back_populates="creator", foreign_keys="[Task.created_by_id]")
@@ -132,10 +149,48 @@ class User(Base):
     # A user (worker) may be assigned to task requests
     task_requests_assigned: Mapped[list["TaskRequest"]] = relationship(back_populates="assigned_user", foreign_keys="[TaskRequest.assigned_user_id]")
 
+    # Refresh tokens issued to this user (deleted with the user)
+    refresh_tokens: Mapped[list["RefreshToken"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+
     def __repr__(self):
         return f"<User(user_id={self.user_id}, name='{self.name}', role='{self.role.name}')>"
 
 
+class RefreshToken(Base):
+    """An opaque, single-use refresh token. Only its SHA-256 is stored; rotations share a family."""
+    __tablename__ = "refresh_tokens"
+
+    token_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False, index=True)
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Set when the token is exchanged; presenting it again means it was stolen
+    used_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # --- Relationships ---
+    user: Mapped["User"] = relationship(back_populates="refresh_tokens")
+
+    def __repr__(self):
+        return f"<RefreshToken(token_id={self.token_id}, user_id={self.user_id})>"
+
+
+class RevokedToken(Base):
+    """An access token (by jti) revoked before its expiry, e.g. on logout."""
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Rows are irrelevant once the token itself would have expired
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti})>"
+
+
 class Invitation(Base):
     """Represents an invitation code sent to a potential user."""
     __tablename__ = "invitations"
@@ -176,6 +231,9 @@ class Task(Base):
     # Is Task active or completed
     is_active: Mapped[bool] = mapped_column(default=True, nullable=False)
 
+    # Bumped on every ORM update; used for ETags
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     # --- Relationships ---
     creator: Mapped["User"] = relationship(back_populates="created_tasks")
     assignments: Mapped[list["TaskAssignment"]] = relationship(back_populates="task")
@@ -198,6 +256,10 @@ class TaskAssignment(Base):
     task: Mapped["Task"] = relationship(back_populates="assignments")
     user: Mapped["User"] = relationship(back_populates="task_assignments")
 
+    __table_args__ = (
+        UniqueConstraint('task_id', 'user_id', name='_task_user_assignment_uc'),
+    )
+
     def __repr__(self):
         return f"<TaskAssignment(task_id={self.task_id}, user_id={self.user_id})>"
 
@@ -289,6 +351,9 @@ class VideoSession(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
 
+    # Optimistic concurrency counter, bumped on every ORM flush and every bulk status transition
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     # --- Relationships ---
     creator: Mapped["User"] = relationship(back_populates="created_sessions", foreign_keys=[creator_id])
     task: Mapped["Task"] = relationship()
@@ -298,6 +363,8 @@ class VideoSession(Base):
     processing_jobs: Mapped[list["ProcessingJob"]] = relationship(back_populates="session", cascade="all, delete-orphan")
     review: Mapped["Review"] = relationship(back_populates="session", cascade="all, delete-orphan", uselist=False)
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<VideoSession(session_id={self.session_id}, status='{self.status.name}')>"
 
@@ -364,3 +431,69 @@ class ProcessingJob(Base):
     def __repr__(self):
         return f"<ProcessingJob(job_id={self.job_id}, status='{self.status.name}')>"
 
+
+class EmailOutbox(Base):
+    """An email queued in the same transaction as the change that caused it; services/email_outbox.py delivers it."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The dispatcher's claim query: due rows by status
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    outbox_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_address: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    text_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # plain-text alternate
+    # Optional idempotency key (e.g. a Stripe event id): queueing the same key twice is a no-op
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(255), unique=True, nullable=True)
+
+    status: Mapped[EmailOutboxStatus] = mapped_column(SQLAlchemyEnum(EmailOutboxStatus), default=EmailOutboxStatus.PENDING, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Due time while pending; a claimed row is pushed out by the lease so a crashed dispatcher's rows come back
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<EmailOutbox(outbox_id={self.outbox_id}, to_address='{self.to_address}', status='{self.status.name}')>"
+
+
+class StripeEvent(Base):
+    """A verified Stripe webhook event, recorded once by id and processed by services/stripe_events.py."""
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        Index("ix_stripe_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    event_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # the webhook body as received
+
+    status: Mapped[StripeEventStatus] = mapped_column(SQLAlchemyEnum(StripeEventStatus), default=StripeEventStatus.PENDING, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    received_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<StripeEvent(event_id='{self.event_id}', event_type='{self.event_type}', status='{self.status.name}')>"
+
+
+# --- ETag counters ---
+
+@event.listens_for(User, "before_update")
+@event.listens_for(Task, "before_update")
+def _bump_version(mapper, connection, target):
+    """
+    Bump version in SQL on every ORM update of a user or task. Unlike version_id_col
+    (kept on VideoSession for optimistic concurrency), concurrent updates both
+    succeed and both count.
+    """
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        target.version = mapper.class_.version + 1
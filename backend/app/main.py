@@ -1,13 +1,22 @@
 """
 Main FastAPI application.
 """
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import text
 
-from app.services import database
-from app.routers import auth, users, tasks, sessions, reviews, dashboard, invitations, upload, payments
+from app.config import settings
+from app.services import database, email_outbox, stripe_events
+from app.services.password_hasher import PasswordHasherBusy, get_hasher
+from app.services.compression import CompressionMiddleware
+from app.services.metrics import MetricsMiddleware
+from app.services.query_accounting import QueryAccountingMiddleware
+from app.services.rate_limit import RateLimitMiddleware
+from app.services.workers import worker_enabled
+from app.routers import auth, users, tasks, sessions, reviews, dashboard, invitations, upload, payments, metrics, admin
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,9 +24,20 @@ app = FastAPI(
     description="API for managing video training sessions, tasks, and reviews",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # orjson encodes UUIDs and datetimes natively; see services/responses.py for response_model routes
+    default_response_class=ORJSONResponse,
 )
 
+# Statement counts per request (no-op outside development unless enabled); innermost
+app.add_middleware(QueryAccountingMiddleware)
+
+# Response compression (inside rate limiting and CORS, so 429s and preflights skip it)
+app.add_middleware(CompressionMiddleware)
+
+# Rate limiting (added before CORS so 429s still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +55,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (outermost, so the timings include every other middleware)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -45,6 +68,27 @@ app.include_router(dashboard.router)
 app.include_router(invitations.router)
 app.include_router(upload.router)
 app.include_router(payments.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed load when the password hashing pool is saturated"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication is temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    """A concurrent request changed the video session first (version_id_col); the client should reload"""
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The resource was modified by another request, please reload and retry"},
+    )
 
 
 @app.get("/")
@@ -74,6 +118,10 @@ async def startup_event():
     """Startup event handler"""
     print(" Efference Video Training Platform API is starting up...")
     print("API Documentation available at /docs")
+    if worker_enabled(settings.EMAIL_OUTBOX_WORKER_ENABLED):
+        email_outbox.start_worker()
+    if worker_enabled(settings.STRIPE_EVENTS_WORKER_ENABLED):
+        stripe_events.start_worker()
 
 
 # Shutdown event
@@ -81,6 +129,9 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown event handler"""
     print(" Efference Video Training Platform API is shutting down...")
+    get_hasher().shutdown()
+    stripe_events.stop_worker()
+    email_outbox.stop_worker()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+"""
+Admin diagnostics API endpoints.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+
+from app.db.models import UserRole
+from app.services import schemas, slow_queries
+from app.services.auth import RequireRole
+from app.services.responses import FastJSONRoute
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(RequireRole(UserRole.ADMIN))],
+    route_class=FastJSONRoute,
+)
+
+
+@router.get("/slow-queries", response_model=List[schemas.SlowQuery])
+def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of records to return"),
+):
+    """Most recent slow statements with their plans (empty when the log is disabled)"""
+    log = slow_queries.get_log()
+    return log.records(limit) if log else []
+
+
+@router.delete("/slow-queries", response_model=schemas.MessageResponse)
+def clear_slow_queries():
+    """Empty the slow-query log"""
+    log = slow_queries.get_log()
+    if log:
+        log.clear()
+    return schemas.MessageResponse(message="Slow-query log cleared")
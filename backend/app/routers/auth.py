@@ -2,13 +2,15 @@
 Authentication API endpoints.
 """
 from datetime import timedelta, timezone, datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 
 from ..services import auth, crud, schemas, database
+from ..services.responses import FastJSONRoute
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=FastJSONRoute)
 
 
 @router.post("/login", response_model=schemas.Token)
@@ -32,27 +34,63 @@ def login(
             detail="User is deactivated"
         )
 
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": str(user.user_id), "email": user.email},
-        expires_delta=access_token_expires
-    )
-    
-    return schemas.Token(access_token=access_token, token_type="bearer")
+    return auth.issue_tokens(db, user.user_id, user.email)
+
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(
+    refresh_data: schemas.RefreshTokenRequest,
+    db: Session = Depends(database.get_db)
+):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    token = auth.refresh_tokens(db, refresh_data.refresh_token)
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token
+
 
 @router.get("/logout", response_model=schemas.MessageResponse)
 def logout(
-    current_user: schemas.User = Depends(auth.get_current_active_user),
+    token_data: schemas.TokenData = Depends(auth.get_current_token),
+    db: Session = Depends(database.get_db)
 ):
-    """Logout endpoint: stateless. Clients should delete their JWT locally."""
+    """Logout endpoint: revokes the presented access token."""
+    auth.revoke_access_token(db, token_data)
+    return schemas.MessageResponse(message="Logged out. Please remove your token on the client.")
+
+
+@router.post("/logout", response_model=schemas.MessageResponse)
+def logout_session(
+    refresh_data: Optional[schemas.RefreshTokenRequest] = None,
+    token_data: schemas.TokenData = Depends(auth.get_current_token),
+    db: Session = Depends(database.get_db)
+):
+    """Logout endpoint: revokes the access token and, if given, the refresh token's login."""
+    if refresh_data is not None:
+        stored = crud.get_refresh_token(db, refresh_data.refresh_token)
+        if stored is not None and stored.user_id == token_data.user_id:
+            crud.revoke_refresh_token_family(db, stored.family_id)
+    auth.revoke_access_token(db, token_data)
     return schemas.MessageResponse(message="Logged out. Please remove your token on the client.")
 
 @router.get("/me", response_model=schemas.User)
 def get_current_user_info(
-    current_user: schemas.User = Depends(auth.get_current_active_user)
+    current_user: auth.Principal = Depends(auth.get_current_active_user),
+    db: Session = Depends(database.get_db)
 ):
     """Get current user information"""
-    return current_user
+    # The principal only carries authorization fields; load the full profile
+    db_user = crud.get_user(db, user_id=current_user.user_id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return db_user
     
 
 
@@ -82,10 +120,7 @@ def register_no_invite(
         profession=user_data.profession,
     )
     new_user = crud.create_user(db=db, user=user_create_data)
-    
-    db.commit()
-    db.refresh(new_user)
-    
+
     return new_user
 
 @router.post("/register_invite_code", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
@@ -146,32 +181,26 @@ def register(
         profession=user_data.profession,
     )
     
-    try:
-        new_user = crud.create_user(db=db, user=user_create_data)
-        
-        # Only mark invitation as used if user creation succeeds
+    # The user and the used invitation are committed together, or not at all
+    with crud.unit_of_work(db):
+        new_user = crud.create_user(db=db, user=user_create_data, commit=False)
         new_user.is_invited = True
         new_user.invitation_used_at = datetime.now(timezone.utc)
         crud.update_invitation_status(
             db=db,
             invitation_id=invitation.invitation_id,
             status=schemas.InvitationStatus.USED,
-            used_at=new_user.invitation_used_at
+            used_at=new_user.invitation_used_at,
+            commit=False,
         )
-        
-        db.commit()
-        db.refresh(new_user)
-    except Exception as e:
-        db.rollback()
-        raise e
-    
+
     return new_user
 
 
 @router.post("/change-password", response_model=schemas.MessageResponse)
 def change_password(
     password_update: schemas.UserPasswordUpdate,
-    current_user: schemas.User = Depends(auth.get_current_active_user),
+    current_user: auth.Principal = Depends(auth.get_current_active_user),
     db: Session = Depends(database.get_db)
 ):
     """Change the current user's password"""
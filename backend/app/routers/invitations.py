@@ -10,53 +10,61 @@ from sqlalchemy.orm import Session
 
 from app.services import crud, schemas, database
 from app.db.models import UserRole, InvitationStatus
-from app.services.auth import get_current_user, RequireRole
-from app.services.email import send_email
+from app.services.auth import Principal, get_current_user, RequireRole
+from app.services import email_outbox, email_templates
+from app.services.email import EmailMessage
+from app.services.responses import FastJSONRoute
 
 
 router = APIRouter(
     prefix="/invitations",
     tags=["invitations"],
-    dependencies=[Depends(RequireRole(UserRole.ADMIN))]  # Only admins can manage invitations
+    dependencies=[Depends(RequireRole(UserRole.ADMIN))],  # Only admins can manage invitations
+    route_class=FastJSONRoute,
 )
 
 
+SIGNUP_URL = "https://app.efference.ai/signup"
+
+
+def invitation_email(invitation) -> EmailMessage:
+    """The invitation email for one invitation"""
+    return email_templates.render(
+        "invitation",
+        invitation.email,
+        invitation_code=invitation.invitation_code,
+        expires_at=f"{invitation.expires_at:%Y-%m-%d %H:%M UTC}",
+        signup_url=SIGNUP_URL,
+    )
+
+
+def _expires_at(expires_in_days: int) -> datetime:
+    if expires_in_days < 1 or expires_in_days > 30:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expiry must be between 1 and 30 days"
+        )
+    return datetime.now(timezone.utc) + timedelta(days=expires_in_days)
+
+
 @router.post("/", response_model=schemas.Invitation, status_code=status.HTTP_201_CREATED)
 def create_invitation(
     invitation: schemas.InvitationCreate,
     expires_in_days: int = 7,  # Default 7 days expiry
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new invitation code for a user to join the platform.
     Only admins can create invitations.
     """
     #print("Create invitation endpoint called")
-    if expires_in_days < 1 or expires_in_days > 30:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Expiry must be between 1 and 30 days"
-        )
+    expires_at = _expires_at(expires_in_days)
     
-    expires_at = datetime.now(timezone.utc) + timedelta(days=expires_in_days)
-    
-    # Check if user with this email already exists
-    existing_user = crud.get_user_by_email(db, invitation.email)
-    if existing_user and getattr(existing_user, "is_invited", False):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists and has already used an invitation"
-        )
-    
-    # Check if there's already a pending invitation for this email
-    existing_invitations = crud.get_invitations(db, status=InvitationStatus.PENDING)
-    for inv in existing_invitations:
-        if inv.email == invitation.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Pending invitation already exists for this email"
-            )
+    # Existing invited user or an outstanding invitation for this email, in one query
+    conflict = crud.find_invitation_conflicts(db, [invitation.email]).get(invitation.email)
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=conflict)
     
     db_invitation = crud.create_invitation(
         db=db,
@@ -67,13 +75,47 @@ def create_invitation(
     return db_invitation
 
 
+@router.post("/bulk", response_model=schemas.InvitationBulkResult, status_code=status.HTTP_201_CREATED)
+def create_invitations_bulk(
+    payload: schemas.InvitationBulkCreate,
+    expires_in_days: int = 7,
+    db: Session = Depends(database.get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Create invitations for many emails and (unless send is false) queue emails with the codes.
+    Emails already invited or registered are skipped rather than failing the batch.
+    """
+    expires_at = _expires_at(expires_in_days)
+    with crud.unit_of_work(db):
+        result = crud.create_invitations(db, payload.invitations, current_user.user_id, expires_at, commit=False)
+        queued = 0
+        if payload.send and result.created:
+            # Delivered by the email outbox, which marks each invitation SENT once SES accepts it;
+            # the invitations and their emails commit together
+            queued = crud.enqueue_emails(
+                db,
+                [invitation_email(inv) for inv in result.created],
+                [crud.invitation_email_key(inv.invitation_id) for inv in result.created],
+                commit=False,
+            )
+    if queued:
+        email_outbox.wake()
+
+    return schemas.InvitationBulkResult(
+        created=result.created,
+        skipped=[schemas.InvitationBulkSkip(email=email, reason=reason) for email, reason in result.skipped.items()],
+        queued=queued,
+    )
+
+
 @router.get("/", response_model=List[schemas.Invitation])
 def get_invitations(
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[InvitationStatus] = None,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all invitations with optional filtering.
@@ -92,7 +134,7 @@ def get_invitations(
 def get_invitation(
     invitation_id: uuid.UUID,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get a specific invitation by ID.
@@ -109,7 +151,7 @@ def update_invitation(
     invitation_id: uuid.UUID,
     invitation_update: schemas.InvitationUpdate,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update invitation status.
@@ -138,7 +180,7 @@ def update_invitation(
 def delete_invitation(
     invitation_id: uuid.UUID,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Delete an invitation.
@@ -155,10 +197,10 @@ def delete_invitation(
 def send_invitation_email(
     invitation_code: str,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Send invitation email via Amazon SES.
+    Queue the invitation email for delivery via Amazon SES.
     Only admins can send invitation emails.
     """
     db_invitation = crud.get_invitation_by_code(db, invitation_code=invitation_code)
@@ -171,54 +213,21 @@ def send_invitation_email(
             detail="Invitation has already been sent or used"
         )
     
-    
-    #crud.mark_invitation_sent(db, db_invitation.invitation_id)
-    try: 
-        sent = send_email(
-    to_address=db_invitation.email,
-    subject="You're Invited to Join Efference Video Training Platform",
-    body=f"""
-<html>
-  <body style="font-family: Arial, sans-serif; color: #222;">
-    <h2>You're Invited!</h2>
-    <p>
-      You have been invited to join the <strong>Efference Video Training Platform</strong>!
-    </p>
-    <p>
-      <strong>Your invitation code:</strong>
-      <br>
-      <span style="display:inline-block; margin:12px 0; padding:12px 24px; background:#f5f5f5; border-radius:8px; font-size:1.3em; letter-spacing:2px; font-weight:bold; color:#2a4d8f;">
-        {db_invitation.invitation_code}
-      </span>
-    </p>
-    <p>
-      <strong>Expires:</strong> {db_invitation.expires_at:%Y-%m-%d %H:%M UTC}
-    </p>
-    <p>
-      To register, visit:<br>
-      <a href="https://app.efference.ai/signup" style="color:#2a4d8f;">https://app.efference.ai/signup</a><br>
-      and enter your invitation code.
-    </p>
-    <hr>
-    <p>
-      Best regards,<br>
-      <strong>Efference Team</strong>
-    </p>
-  </body>
-</html>
-"""
-)
-        if not sent:
-            raise RuntimeError("SES send_email returned False")
-    except Exception as e:
+    # The invitation stays PENDING until the outbox delivers the email. The key stops a
+    # duplicate send while one is queued; an email the outbox gave up on is queued again.
+    message = invitation_email(db_invitation)
+    key = crud.invitation_email_key(db_invitation.invitation_id)
+    with crud.unit_of_work(db):
+        queued = crud.enqueue_email(db, message, dedupe_key=key, commit=False) \
+            or crud.requeue_failed_email(db, message, key, commit=False)
+    if not queued:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to send invitation email: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Invitation email is already queued for delivery"
         )
-    # Mark as sent on success
-    crud.mark_invitation_sent(db, db_invitation.invitation_id)
+    email_outbox.wake()
     
-    return schemas.MessageResponse(message="Invitation email sent successfully")
+    return schemas.MessageResponse(message="Invitation email queued for delivery")
 
 
 # Public endpoint for validating invitation codes (no auth required)
@@ -0,0 +1,31 @@
+"""
+Metrics API endpoint (Prometheus text format).
+"""
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from app.config import settings
+from app.services import metrics
+from app.services.responses import FastJSONRoute
+
+router = APIRouter(tags=["metrics"], route_class=FastJSONRoute)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus scrape endpoint; requires METRICS_TOKEN as a bearer token when one is set.
+    Without a token it is only served in development and is not found elsewhere.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.is_development:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    elif not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(
+        metrics.registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -7,8 +7,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.services import crud, schemas, database
+from app.services.responses import FastJSONRoute
 
-router = APIRouter(prefix="/reviews", tags=["reviews"])
+router = APIRouter(prefix="/reviews", tags=["reviews"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=schemas.Review, status_code=status.HTTP_201_CREATED)
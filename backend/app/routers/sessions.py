@@ -3,14 +3,17 @@ Video session management API endpoints.
 """
 import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.services import crud, schemas, database, auth
+from app.config import settings
+from app.services import crud, schemas, database, auth, session_transitions, session_events, etags, task_cache
+from app.services.responses import FastJSONRoute
 from ..db import models
-from ..db.models import VideoSessionStatus
+from ..db.models import UserRole, VideoSessionStatus
 
-router = APIRouter(prefix="/sessions", tags=["video-sessions"])
+router = APIRouter(prefix="/sessions", tags=["video-sessions"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=schemas.VideoSession, status_code=status.HTTP_201_CREATED)
@@ -52,20 +55,20 @@ def create_video_session(
 def create_video_session_from_upload(
     session: schemas.VideoSessionCreateFromUpload,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: auth.Principal = Depends(auth.get_current_user)
 ):
     """Create a new video session from frontend upload"""
     try:
         # For now, create a default task if none provided
         if not session.task_id:
             # Get or create a default task
-            default_task = crud.get_tasks(db, limit=1)
-            if not default_task:
+            default_task_id = task_cache.get_default_task_id(db)
+            if not default_task_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="No tasks available. Please create a task first."
                 )
-            session.task_id = default_task[0].task_id
+            session.task_id = default_task_id
         
         # Use the authenticated user as creator
         session.creator_id = current_user.user_id
@@ -114,18 +117,97 @@ def list_video_sessions(
     return sessions
 
 
+@router.get("/events")
+async def stream_session_events(
+    request: Request,
+    creator_id: Optional[uuid.UUID] = Query(None, description="Only events for sessions created by this user"),
+    reviewer_id: Optional[uuid.UUID] = Query(None, description="Only events for sessions assigned to this reviewer"),
+    task_id: Optional[uuid.UUID] = Query(None, description="Only events for sessions of this task"),
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.get_current_active_user)
+):
+    """Server-Sent Events stream of video session status changes"""
+    # Workers and clients only see their own sessions
+    if current_user.role not in (UserRole.ADMIN, UserRole.REVIEWER):
+        creator_id = current_user.user_id
+    # Don't hold a pooled connection for the lifetime of the stream
+    db.close()
+
+    subscription = session_events.subscribe(creator_id=creator_id, reviewer_id=reviewer_id, task_id=task_id)
+    heartbeat = settings.SESSION_EVENTS_HEARTBEAT_SECONDS
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=heartbeat)
+                yield event.to_sse() if event else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/transitions", response_model=schemas.VideoSessionTransitionResult)
+def transition_video_sessions(
+    transition: schemas.VideoSessionTransitionRequest,
+    db: Session = Depends(database.get_db),
+    current_user: auth.Principal = Depends(auth.require_admin_or_reviewer),
+):
+    """
+    Move many video sessions from one status to another in a single conditional update.
+    Only admins and reviewers (including service accounts with those roles) may move sessions.
+    """
+    try:
+        result = session_transitions.bulk_transition(
+            db,
+            session_ids=transition.session_ids,
+            from_status=transition.from_status,
+            to_status=transition.to_status,
+            expected_versions=transition.expected_versions,
+        )
+    except session_transitions.InvalidTransition as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return schemas.VideoSessionTransitionResult(
+        from_status=result.from_status,
+        to_status=result.to_status,
+        moved=result.moved_ids,
+        skipped=result.skipped,
+    )
+
+
 @router.get("/{session_id}", response_model=schemas.VideoSessionWithDetails)
 def get_video_session(
     session_id: uuid.UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db)
 ):
     """Get a specific video session by ID with all details"""
+    etag_source = crud.get_video_session_etag_source(db, session_id=session_id)
+    if etag_source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video session not found"
+        )
+    etag = etags.make_etag("session", session_id, *etag_source)
+    if etags.etag_matches(request, etag):
+        return etags.not_modified(etag)
+
     db_session = crud.get_video_session(db, session_id=session_id)
     if db_session is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Video session not found"
         )
+    etags.set_etag(response, etag)
     return db_session
 
 
@@ -145,7 +227,13 @@ def update_video_session(
                 detail="Reviewer not found"
             )
     
-    db_session = crud.update_video_session(db, session_id=session_id, session_update=session_update)
+    try:
+        db_session = crud.update_video_session(db, session_id=session_id, session_update=session_update)
+    except session_transitions.InvalidTransition as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     if db_session is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -3,22 +3,22 @@ Task management API endpoints.
 """
 import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.services import crud, schemas, database
-from app.db import models
+from app.services import crud, schemas, database, etags, task_cache
 from app.db.models import UserRole, TaskApplicationStatus, TaskRequestStatus
-from app.services.auth import get_current_user
+from app.services.auth import Principal, get_current_user
+from app.services.responses import FastJSONRoute
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=schemas.Task, status_code=status.HTTP_201_CREATED)
 def create_task(
     task: schemas.TaskCreate,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new task"""
     if current_user.role != UserRole.ADMIN:
@@ -30,14 +30,20 @@ def create_task(
 
 @router.get("/", response_model=List[schemas.Task])
 def list_tasks(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
     created_by_id: Optional[uuid.UUID] = Query(None, description="Filter by creator ID"),
     db: Session = Depends(database.get_db)
 ):
     """Get a list of tasks"""
-    tasks = crud.get_tasks(db, skip=skip, limit=limit, created_by_id=created_by_id)
-    return tasks
+    cached = task_cache.get_tasks(db, skip=skip, limit=limit, created_by_id=created_by_id)
+    if etags.etag_matches(request, cached.etag):
+        return etags.not_modified(cached.etag)
+
+    etags.set_etag(response, cached.etag)
+    return cached.items
 
 
 @router.get("/assignments", response_model=List[schemas.TaskAssignment])
@@ -45,7 +51,7 @@ def list_all_task_assignments(
     task_id: Optional[str] = Query(None, description="Filter by task ID"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get all task assignments with optional filtering"""
     
@@ -87,16 +93,22 @@ def list_all_task_assignments(
 @router.get("/{task_id}", response_model=schemas.Task)
 def get_task(
     task_id: uuid.UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(database.get_db)
 ):
     """Get a specific task by ID"""
-    db_task = crud.get_task(db, task_id=task_id)
-    if db_task is None:
+    cached = task_cache.get_task(db, task_id=task_id)
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
-    return db_task
+    if etags.etag_matches(request, cached.etag):
+        return etags.not_modified(cached.etag)
+
+    etags.set_etag(response, cached.etag)
+    return cached.item
 
 
 @router.put("/{task_id}", response_model=schemas.Task)
@@ -132,7 +144,7 @@ def delete_task(
 @router.post("/activate-all", response_model=schemas.MessageResponse)
 def activate_all_tasks(
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Activate all existing tasks (admin only)"""
     if current_user.role != UserRole.ADMIN:
@@ -142,8 +154,7 @@ def activate_all_tasks(
         )
     
     # Update all tasks to be active
-    updated_count = db.query(models.Task).update({models.Task.is_active: True})
-    db.commit()
+    updated_count = crud.activate_all_tasks(db)
     
     return schemas.MessageResponse(message=f"Activated {updated_count} tasks")
 
@@ -154,7 +165,7 @@ def create_task_assignment(
     task_id: uuid.UUID,
     user_id: uuid.UUID = Query(None, description="ID of the worker to assign to this task (admin only)"),
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Assign a task to a worker or request assignment for self."""
     
@@ -216,6 +227,35 @@ def create_task_assignment(
     return crud.create_task_assignment(db=db, assignment=assignment_data)
 
 
+@router.post("/{task_id}/assignments/bulk", response_model=schemas.TaskAssignmentBulkResult)
+def bulk_create_task_assignments(
+    task_id: uuid.UUID,
+    assignments: schemas.TaskAssignmentBulkCreate,
+    db: Session = Depends(database.get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Admin assigns a task to many workers at once; existing assignments are left as they are."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can assign tasks in bulk"
+        )
+
+    task = crud.get_task(db, task_id=task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+    result = crud.assign_task_to_workers(db, task_id=task_id, user_ids=assignments.user_ids)
+    return schemas.TaskAssignmentBulkResult(
+        assigned=result.assigned,
+        already_assigned=result.already_assigned,
+        rejected=result.rejected,
+    )
+
+
 @router.get("/{task_id}/assignments", response_model=List[schemas.TaskAssignment])
 def list_task_assignments(
     task_id: uuid.UUID,
@@ -237,7 +277,7 @@ def list_task_assignments(
 def delete_task_assignment(
     assignment_id: uuid.UUID,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Remove a task assignment"""
     
@@ -281,7 +321,7 @@ def apply_to_task(
     request_id: uuid.UUID,
     application: schemas.TaskApplicationCreate,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Worker applies to a client's task request."""
     if current_user.role != UserRole.WORKER:
@@ -307,7 +347,7 @@ def list_task_applications(
     request_id: uuid.UUID,
     status_filter: Optional[TaskApplicationStatus] = Query(None),
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Admin lists applications for a task request."""
     if current_user.role != UserRole.ADMIN:
@@ -315,11 +355,33 @@ def list_task_applications(
     return crud.get_task_applications(db, request_id=request_id, status=status_filter)
 
 
+@router.post("/applications/decide", response_model=schemas.TaskApplicationBulkDecisionResult)
+def decide_task_applications(
+    decision: schemas.TaskApplicationBulkDecision,
+    db: Session = Depends(database.get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Admin approves or rejects many applications in one transaction."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can decide applications")
+    result = crud.decide_task_applications(
+        db,
+        application_ids=decision.application_ids,
+        approver_id=current_user.user_id,
+        approve=decision.approve,
+    )
+    return schemas.TaskApplicationBulkDecisionResult(
+        decided=result.decided,
+        skipped=result.skipped,
+        assigned_request_ids=result.assigned_request_ids,
+    )
+
+
 @router.post("/applications/{application_id}/approve", response_model=schemas.TaskApplication)
 def approve_task_application(
     application_id: uuid.UUID,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Admin approves an application; assigns worker to request and creates a task assignment."""
     if current_user.role != UserRole.ADMIN:
@@ -334,7 +396,7 @@ def approve_task_application(
 def reject_task_application(
     application_id: uuid.UUID,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Admin rejects an application."""
     if current_user.role != UserRole.ADMIN:
@@ -352,7 +414,7 @@ def create_task_request(
     task_id: uuid.UUID,
     req: schemas.TaskRequestCreate,
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Client creates a request for a given task template with address/other info."""
     if current_user.role != UserRole.CLIENT:
@@ -371,7 +433,7 @@ def list_task_requests(
     task_id: uuid.UUID,
     status_filter: Optional[TaskRequestStatus] = Query(None),
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Admins can view all requests for a task; clients can view their own created requests."""
     if current_user.role == UserRole.ADMIN:
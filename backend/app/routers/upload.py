@@ -5,23 +5,16 @@ import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-import boto3
 from botocore.exceptions import ClientError
 import os
 
-from app.services import crud, schemas, database
+from app.services import crud, schemas, database, providers, session_transitions
+from app.services.responses import FastJSONRoute
 from ..db.models import VideoSessionStatus
 
-router = APIRouter(prefix="/upload", tags=["file-upload"])
-
-# AWS S3 Configuration
-s3_client = boto3.client(
-    's3',
-    region_name=os.getenv('AWS_REGION', 'us-east-1'),
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-)
+router = APIRouter(prefix="/upload", tags=["file-upload"], route_class=FastJSONRoute)
 
+# AWS S3 Configuration (the client comes from S3_PROVIDER, see services/providers.py)
 BUCKET_NAME = os.getenv('S3_BUCKET_NAME', 'uploadz-videos')
 UPLOAD_EXPIRATION = 3600  # 1 hour
 
@@ -46,7 +39,7 @@ def generate_presigned_url(
         s3_key = f"sessions/{request.session_id}/part_{request.part_number}_{sanitized_filename}"
 
         # Generate presigned URL
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = providers.get_s3_client().generate_presigned_url(
             'put_object',
             Params={
                 'Bucket': BUCKET_NAME,
@@ -99,12 +92,15 @@ def complete_upload(
         
         crud.create_raw_clip(db=db, clip=clip_data)
 
-        # Update session status if this is the first upload
+        # Update session status if this is the first upload; the conditional update
+        # makes concurrent completions of several parts race-free
         if session.status == VideoSessionStatus.UPLOADING:
-            session_update = schemas.VideoSessionUpdate(
-                status=VideoSessionStatus.PROCESSING
+            session_transitions.transition(
+                db,
+                request.session_id,
+                VideoSessionStatus.UPLOADING,
+                VideoSessionStatus.PROCESSING,
             )
-            crud.update_video_session(db, session_id=request.session_id, session_update=session_update)
 
         return schemas.MessageResponse(message="Upload completed successfully")
 
@@ -142,7 +138,7 @@ def initiate_multipart_upload(
         total_parts = (file_size + part_size - 1) // part_size
 
         # Initiate multipart upload
-        response = s3_client.create_multipart_upload(
+        response = providers.get_s3_client().create_multipart_upload(
             Bucket=BUCKET_NAME,
             Key=s3_key,
             ContentType=content_type,
@@ -176,7 +172,7 @@ def get_multipart_part_url(
 ):
     """Get presigned URL for uploading a specific part"""
     try:
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = providers.get_s3_client().generate_presigned_url(
             'upload_part',
             Params={
                 'Bucket': BUCKET_NAME,
@@ -219,7 +215,7 @@ def complete_multipart_upload(
             )
 
         # Complete multipart upload
-        response = s3_client.complete_multipart_upload(
+        response = providers.get_s3_client().complete_multipart_upload(
             Bucket=BUCKET_NAME,
             Key=s3_key,
             UploadId=upload_id,
@@ -238,10 +234,12 @@ def complete_multipart_upload(
 
         # Update session status
         if session.status == VideoSessionStatus.UPLOADING:
-            session_update = schemas.VideoSessionUpdate(
-                status=VideoSessionStatus.PROCESSING
+            session_transitions.transition(
+                db,
+                session_id,
+                VideoSessionStatus.UPLOADING,
+                VideoSessionStatus.PROCESSING,
             )
-            crud.update_video_session(db, session_id=session_id, session_update=session_update)
 
         return {
             "message": "Multipart upload completed successfully",
@@ -264,7 +262,7 @@ def abort_multipart_upload(
 ):
     """Abort a multipart upload"""
     try:
-        s3_client.abort_multipart_upload(
+        providers.get_s3_client().abort_multipart_upload(
             Bucket=BUCKET_NAME,
             Key=s3_key,
             UploadId=upload_id
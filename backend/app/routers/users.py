@@ -9,8 +9,9 @@ from sqlalchemy.orm import Session
 from app.services import crud, schemas, database
 from app.db.models import UserRole
 from app.services.auth import get_current_user
+from app.services.responses import FastJSONRoute
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
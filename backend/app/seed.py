@@ -5,6 +5,7 @@ Creates:
 - A couple of Task templates (created by Admin)
 - One TaskRequest by the Client for a Task
 - One TaskApplication by the Worker for that request
+Users and the application are upserted, so re-running is safe.
 - Approves the application (assigns Worker and creates TaskAssignment)
 """
 
@@ -13,26 +14,27 @@ from sqlalchemy.orm import Session
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app.db import models
-from app.services import crud, schemas
-from datetime import datetime
+from app.services import crud, schemas, upsert
+from datetime import datetime, timezone
 
 
 def get_or_create_user(db: Session, *, email: str, name: str, role: schemas.UserRole, password: str) -> models.User:
-    user = crud.get_user_by_email(db, email=email)
-    if user:
-        print(f"User exists: {email} ({role.name})")
-        return user
-    created = crud.create_user(db, schemas.UserCreate(
-        name=name,
-        email=email,
-        password=password,
-        role=role,
-        phone_number=None,
-        age=None,
-        sex=None,
-    ))
-    print(f"Created user: {email} ({role.name})")
-    return created
+    from app.services.auth import get_password_hash
+    hashed_password = get_password_hash(password)
+    user = upsert.get_or_create(db, models.User, {
+        "name": name,
+        "email": email,
+        "role": role,
+        "hashed_password": hashed_password,
+        "created_at": datetime.now(timezone.utc),
+    }, ["email"])
+    db.commit()
+    # Hashes are salted, so the stored hash only matches ours if this call inserted the row
+    if user.hashed_password == hashed_password:
+        print(f"Created user: {email} ({role.name})")
+    else:
+        print(f"User exists: {email} ({user.role.name})")
+    return user
 
 
 def seed_data(db: Session):
@@ -0,0 +1,420 @@
+"""Generate synthetic data at scale for load and benchmark runs.
+
+Unlike seed.py, which goes through crud one row at a time, rows are built in
+memory and written in batches: multi-row INSERTs via SQLAlchemy Core, or COPY
+FROM STDIN on Postgres. Every password is the same precomputed hash.
+
+Creates, with realistic status mixes:
+- Users (mostly workers, plus clients, reviewers and admins)
+- Task templates, and TaskRequests by clients with TaskApplications by workers
+  (approved applications also get a TaskAssignment)
+- VideoSessions with RawClips, and a Review for every reviewed session
+- Invitations
+
+Session creators and applicants are Zipf-distributed: a few workers produce
+most of the content, the long tail a little.
+
+Run from the backend directory (counts accept underscores, e.g. 1_000_000):
+    python -m app.seed_synthetic --users 100_000 --sessions 1_000_000 --seed 1
+"""
+
+import argparse
+import enum
+import io
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.db import models
+
+ROLE_MIX = {
+    models.UserRole.WORKER: 0.85,
+    models.UserRole.CLIENT: 0.08,
+    models.UserRole.REVIEWER: 0.05,
+    models.UserRole.ADMIN: 0.02,
+}
+SESSION_STATUS_MIX = {
+    models.VideoSessionStatus.APPROVED: 0.55,
+    models.VideoSessionStatus.PENDING_REVIEW: 0.15,
+    models.VideoSessionStatus.REJECTED: 0.12,
+    models.VideoSessionStatus.UPLOADING: 0.08,
+    models.VideoSessionStatus.PROCESSING: 0.06,
+    models.VideoSessionStatus.FAILED: 0.04,
+}
+INVITATION_STATUS_MIX = {
+    models.InvitationStatus.USED: 0.60,
+    models.InvitationStatus.SENT: 0.20,
+    models.InvitationStatus.EXPIRED: 0.15,
+    models.InvitationStatus.PENDING: 0.05,
+}
+REQUEST_STATUS_MIX = {
+    models.TaskRequestStatus.ASSIGNED: 0.35,
+    models.TaskRequestStatus.OPEN: 0.30,
+    models.TaskRequestStatus.CLOSED: 0.30,
+    models.TaskRequestStatus.CANCELLED: 0.05,
+}
+REVIEWED = {models.VideoSessionStatus.APPROVED, models.VideoSessionStatus.REJECTED}
+UPLOADED = REVIEWED | {models.VideoSessionStatus.PENDING_REVIEW, models.VideoSessionStatus.PROCESSING}
+TASK_TITLES = [
+    "Cooking", "Dish Washing", "Laundry Folding", "House Cleaning", "Furniture Assembly",
+    "Grocery Unpacking", "Bed Making", "Gardening", "Car Washing", "Table Setting",
+]
+
+
+class Picker:
+    """Draws from a fixed population with fixed weights (bisect over cumulative weights)"""
+
+    def __init__(self, rng: random.Random, population: Sequence, weights: Sequence[float]):
+        self.rng = rng
+        self.population = population
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    @classmethod
+    def from_mix(cls, rng: random.Random, mix: Dict) -> "Picker":
+        return cls(rng, list(mix), list(mix.values()))
+
+    @classmethod
+    def zipf(cls, rng: random.Random, population: Sequence, skew: float) -> "Picker":
+        """Rank r gets weight 1 / r**skew; ranks are shuffled so skew doesn't follow insertion order"""
+        ranked = list(population)
+        rng.shuffle(ranked)
+        return cls(rng, ranked, [1 / rank ** skew for rank in range(1, len(ranked) + 1)])
+
+    def one(self):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights)[0]
+
+    def many(self, k: int) -> list:
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+    def distinct(self, k: int) -> list:
+        """Up to k distinct draws (bounded retries keep the long tail cheap)"""
+        picked = dict.fromkeys(self.many(k))
+        attempts = 0
+        while len(picked) < min(k, len(self.population)) and attempts < 4 * k:
+            picked.setdefault(self.one())
+            attempts += 1
+        return list(picked)
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_value(value) -> str:
+    """Postgres COPY text-format field"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class BulkWriter:
+    """Writes row dicts in batches: COPY on Postgres, executemany INSERT elsewhere"""
+
+    def __init__(self, engine, batch_size: int, use_copy: bool = True):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.use_copy = use_copy and engine.dialect.name == "postgresql"
+        self.counts: Dict[str, int] = {}
+
+    def write(self, model, rows: Iterable[dict]) -> None:
+        table = model.__table__
+        for chunk in _chunks(rows, self.batch_size):
+            with self.engine.begin() as conn:
+                if self.use_copy:
+                    self._copy(conn, table, chunk)
+                else:
+                    conn.execute(table.insert(), chunk)
+            self.counts[table.name] = self.counts.get(table.name, 0) + len(chunk)
+
+    @staticmethod
+    def _copy(conn, table, chunk: List[dict]) -> None:
+        columns = list(chunk[0])
+        buffer = io.StringIO()
+        for row in chunk:
+            buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN', buffer)
+        finally:
+            cursor.close()
+
+
+class SyntheticData:
+    """Builds the rows; ids are derived from the seeded RNG so runs are reproducible"""
+
+    def __init__(self, args: argparse.Namespace, hashed_password: str):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.hashed_password = hashed_password
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.window = timedelta(days=args.days).total_seconds()
+        self.users: Dict[models.UserRole, List[tuple]] = {role: [] for role in ROLE_MIX}
+        self.task_ids: List[uuid.UUID] = []
+
+    def new_id(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self) -> datetime:
+        return self.now - timedelta(seconds=int(self.rng.random() * self.window))
+
+    def user_rows(self) -> Iterator[dict]:
+        picker = Picker.from_mix(self.rng, ROLE_MIX)
+        # Guarantee one user of every role before sampling the rest
+        roles = itertools.chain(ROLE_MIX, (picker.one() for _ in range(max(self.args.users - len(ROLE_MIX), 0))))
+        tag = self.args.seed
+        for i, role in enumerate(roles):
+            user_id = self.new_id()
+            email = f"{role.name.lower()}{i}.s{tag}@{self.args.email_domain}"
+            self.users[role].append((user_id, email))
+            created_at = self.timestamp()
+            invited = role == models.UserRole.WORKER and self.rng.random() < 0.7
+            yield {
+                "user_id": user_id,
+                "name": f"Synthetic {role.name.title()} {i}",
+                "email": email,
+                "role": role,
+                "hashed_password": self.hashed_password,
+                "is_active": self.rng.random() < 0.97,
+                "is_invited": invited,
+                "invitation_used_at": created_at if invited else None,
+                "phone_number": None,
+                "age": self.rng.randint(18, 70) if self.rng.random() < 0.6 else None,
+                "sex": self.rng.choice(list(models.Sex)) if self.rng.random() < 0.6 else None,
+                "profession": None,
+                "created_at": created_at,
+                "version": 1,
+            }
+
+    def task_rows(self) -> Iterator[dict]:
+        admins = self.users[models.UserRole.ADMIN]
+        for i in range(self.args.tasks):
+            task_id = self.new_id()
+            self.task_ids.append(task_id)
+            title = TASK_TITLES[i % len(TASK_TITLES)]
+            yield {
+                "task_id": task_id,
+                "title": title if i < len(TASK_TITLES) else f"{title} #{i // len(TASK_TITLES) + 1}",
+                "description": f"Synthetic {title.lower()} task.",
+                "created_at": self.timestamp(),
+                "created_by_id": self.rng.choice(admins)[0],
+                "is_active": self.rng.random() < 0.9,
+                "version": 1,
+            }
+
+    def session_batches(self) -> Iterator[tuple]:
+        """(sessions, clips, reviews) per batch, so children are written right after their parents"""
+        creators = Picker.zipf(self.rng, self.users[models.UserRole.WORKER], self.args.skew)
+        statuses = Picker.from_mix(self.rng, SESSION_STATUS_MIX)
+        tasks = Picker.zipf(self.rng, self.task_ids, 1.0)
+        reviewers = self.users[models.UserRole.REVIEWER]
+        remaining = self.args.sessions
+        while remaining > 0:
+            size = min(self.args.batch_size, remaining)
+            remaining -= size
+            sessions, clips, reviews = [], [], []
+            for (creator_id, email), status in zip(creators.many(size), statuses.many(size)):
+                session_id = self.new_id()
+                created_at = self.timestamp()
+                reviewer_id = self.rng.choice(reviewers)[0] if status in REVIEWED else None
+                prefix = f"raw/{creator_id}/{session_id}"
+                parts = self.rng.randint(1, self.args.max_clips) if status != models.VideoSessionStatus.FAILED else 0
+                sizes = [self.rng.randint(5, 250) * 1024 * 1024 for _ in range(parts)]
+                uploaded = status in UPLOADED
+                sessions.append({
+                    "session_id": session_id,
+                    "creator_id": creator_id,
+                    "task_id": tasks.one(),
+                    "reviewer_id": reviewer_id,
+                    "status": status,
+                    "raw_concatenated_s3_key": f"{prefix}/concat.mp4" if uploaded else None,
+                    "processed_1080p_s3_key": f"processed/{session_id}/1080p.mp4" if status in REVIEWED else None,
+                    "video_name": f"session-{session_id.hex[:8]}.mp4",
+                    "user_email": email,
+                    "s3_bucket": self.args.bucket,
+                    "file_size": sum(sizes) or None,
+                    "content_type": "video/mp4",
+                    "upload_status": "completed" if uploaded else ("failed" if parts == 0 else "uploading"),
+                    "signature_status": "signed" if status in REVIEWED else "none",
+                    "created_at": created_at,
+                    "updated_at": created_at + timedelta(minutes=self.rng.randint(1, 600)),
+                    "uploaded_at": created_at if uploaded else None,
+                    "version": 1,
+                })
+                for part_number, filesize in enumerate(sizes, start=1):
+                    clips.append({
+                        "clip_id": self.new_id(),
+                        "session_id": session_id,
+                        "s3_key": f"{prefix}/part-{part_number:04d}.mp4",
+                        "part_number": part_number,
+                        "filesize_bytes": filesize,
+                        "upload_completed_at": created_at,
+                    })
+                if reviewer_id is not None:
+                    approved = status == models.VideoSessionStatus.APPROVED
+                    reviews.append({
+                        "review_id": self.new_id(),
+                        "session_id": session_id,
+                        "reviewer_id": reviewer_id,
+                        "status": models.ReviewStatus.APPROVED if approved else models.ReviewStatus.REJECTED,
+                        "comments": None if approved else "Hands out of frame for most of the clip.",
+                        "created_at": created_at + timedelta(hours=self.rng.randint(1, 72)),
+                    })
+            yield sessions, clips, reviews
+
+    def invitation_rows(self) -> Iterator[dict]:
+        statuses = Picker.from_mix(self.rng, INVITATION_STATUS_MIX)
+        inviters = self.users[models.UserRole.ADMIN]
+        roles = Picker.from_mix(self.rng, {models.UserRole.WORKER: 0.9, models.UserRole.CLIENT: 0.06, models.UserRole.REVIEWER: 0.04})
+        for i in range(self.args.invitations):
+            status = statuses.one()
+            created_at = self.timestamp()
+            sent = status != models.InvitationStatus.PENDING
+            yield {
+                "invitation_id": self.new_id(),
+                "invitation_code": self.new_id().hex,
+                "email": f"invitee{i}.s{self.args.seed}@{self.args.email_domain}",
+                "role": roles.one(),
+                "status": status,
+                "invited_by_id": self.rng.choice(inviters)[0],
+                "expires_at": created_at + timedelta(days=7),
+                "created_at": created_at,
+                "sent_at": created_at if sent else None,
+                "used_at": created_at + timedelta(hours=self.rng.randint(1, 160)) if status == models.InvitationStatus.USED else None,
+            }
+
+    def request_batches(self) -> Iterator[tuple]:
+        """(requests, applications, assignments) per batch"""
+        applicants = Picker.zipf(self.rng, [user_id for user_id, _ in self.users[models.UserRole.WORKER]], self.args.skew)
+        statuses = Picker.from_mix(self.rng, REQUEST_STATUS_MIX)
+        clients = [user_id for user_id, _ in self.users[models.UserRole.CLIENT]]
+        deciders = clients + [user_id for user_id, _ in self.users[models.UserRole.ADMIN]]
+        assigned_pairs = set()
+        remaining = self.args.requests
+        while remaining > 0:
+            size = min(self.args.batch_size, remaining)
+            remaining -= size
+            requests, applications, assignments = [], [], []
+            for status in statuses.many(size):
+                request_id = self.new_id()
+                task_id = self.rng.choice(self.task_ids)
+                created_at = self.timestamp()
+                workers = applicants.distinct(max(1, int(self.rng.expovariate(1 / self.args.applications_per_request))))
+                winner = workers[0] if status in (models.TaskRequestStatus.ASSIGNED, models.TaskRequestStatus.CLOSED) else None
+                decided_at = created_at + timedelta(hours=self.rng.randint(1, 48))
+                requests.append({
+                    "request_id": request_id,
+                    "task_id": task_id,
+                    "client_id": self.rng.choice(clients),
+                    "address": f"{self.rng.randint(1, 9999)} Synthetic Street",
+                    "other_info": None,
+                    "status": status,
+                    "created_at": created_at,
+                    "assigned_user_id": winner,
+                    "assigned_at": decided_at if winner else None,
+                })
+                for worker_id in workers:
+                    if status == models.TaskRequestStatus.OPEN:
+                        application_status = models.TaskApplicationStatus.PENDING
+                    elif worker_id == winner:
+                        application_status = models.TaskApplicationStatus.APPROVED
+                    else:
+                        application_status = models.TaskApplicationStatus.REJECTED
+                    decided = application_status != models.TaskApplicationStatus.PENDING
+                    applications.append({
+                        "application_id": self.new_id(),
+                        "request_id": request_id,
+                        "user_id": worker_id,
+                        "status": application_status,
+                        "applied_at": created_at + timedelta(minutes=self.rng.randint(1, 600)),
+                        "decided_at": decided_at if decided else None,
+                        "decided_by_id": self.rng.choice(deciders) if decided else None,
+                    })
+                if winner and (task_id, winner) not in assigned_pairs:
+                    assigned_pairs.add((task_id, winner))
+                    assignments.append({
+                        "assignment_id": self.new_id(),
+                        "task_id": task_id,
+                        "user_id": winner,
+                        "assigned_at": decided_at,
+                    })
+            yield requests, applications, assignments
+
+
+def generate(engine, args: argparse.Namespace, hashed_password: str, data: Optional[SyntheticData] = None) -> Dict[str, int]:
+    """Write the whole dataset; pass data to keep the generated ids and emails afterwards"""
+    writer = BulkWriter(engine, batch_size=args.batch_size, use_copy=not args.no_copy)
+    data = data or SyntheticData(args, hashed_password)
+
+    def timed(label: str, fn) -> None:
+        start = time.perf_counter()
+        fn()
+        print(f"{label}: {time.perf_counter() - start:.1f}s")
+
+    def write_batches(batches, *children) -> None:
+        for rows in batches:
+            for model, chunk in zip(children, rows):
+                writer.write(model, chunk)
+
+    timed("users", lambda: writer.write(models.User, data.user_rows()))
+    timed("tasks", lambda: writer.write(models.Task, data.task_rows()))
+    timed("sessions, clips, reviews", lambda: write_batches(
+        data.session_batches(), models.VideoSession, models.RawClip, models.Review))
+    timed("invitations", lambda: writer.write(models.Invitation, data.invitation_rows()))
+    timed("requests, applications, assignments", lambda: write_batches(
+        data.request_batches(), models.TaskRequest, models.TaskApplication, models.TaskAssignment))
+    return writer.counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=50_000)
+    parser.add_argument("--max-clips", type=int, default=6, help="Raw clips per session are uniform in 1..N")
+    parser.add_argument("--invitations", type=int, default=5_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--applications-per-request", type=float, default=3.0, help="Mean applicants per request")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for session creators and applicants")
+    parser.add_argument("--days", type=int, default=365, help="Spread timestamps over the last N days")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed; also tags emails so several runs can share a database")
+    parser.add_argument("--password", default="synthetic123", help="Password for every generated user")
+    parser.add_argument("--email-domain", default="synthetic.example.com")
+    parser.add_argument("--bucket", default="efference-synthetic")
+    parser.add_argument("--no-copy", action="store_true", help="Use batched INSERTs on Postgres instead of COPY")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    from app.services import auth
+    from app.services.database import engine
+    models.Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    counts = generate(engine, args, auth.get_password_hash(args.password))
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+    print(f"Inserted {sum(counts.values())} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,15 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 
 from . import crud, database, schemas
+from .password_hasher import get_hasher
+from .principal_cache import Principal, principal_cache
+from .token_revocation import revocation_list
 from ..db.models import User, UserRole
 from ..config import settings
 
@@ -28,21 +30,18 @@ if ENV in {"production", "prod"} and not SECRET_KEY:
 if not SECRET_KEY:
     SECRET_KEY = "dev-secret-key-change-me"
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Security scheme
 security = HTTPBearer()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a plain password against its hash on the hashing pool"""
+    return get_hasher().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Get password hash"""
-    return pwd_context.hash(password)
+    """Get password hash from the hashing pool"""
+    return get_hasher().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -53,7 +52,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token on the revocation list
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -68,9 +68,12 @@ def verify_token(token: str) -> Optional[schemas.TokenData]:
         if user_id is None or email is None:
             return None
         
+        exp = payload.get("exp")
         token_data = schemas.TokenData(
             user_id=uuid.UUID(user_id),
-            email=email
+            email=email,
+            jti=payload.get("jti"),
+            expires_at=datetime.fromtimestamp(exp, timezone.utc) if exp is not None else None,
         )
         return token_data
     except (JWTError, ValueError):
@@ -83,37 +86,127 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     user = crud.get_user_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = get_hasher().verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash predates the current policy; upgrade it while we have the password
+        try:
+            user.hashed_password = new_hash
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Password hash upgrade failed for {user.user_id}: {e}")
     return user
 
 
-async def get_current_user(
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def issue_tokens(db: Session, user_id: uuid.UUID, email: str, family_id: Optional[uuid.UUID] = None) -> schemas.Token:
+    """Mint an access token plus a refresh token (a new login family unless family_id is given)"""
+    expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": str(user_id), "email": email},
+        expires_delta=expires_delta
+    )
+    refresh_token = crud.create_refresh_token(
+        db,
+        user_id=user_id,
+        expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        family_id=family_id,
+    )
+    return schemas.Token(
+        access_token=access_token,
+        token_type="bearer",
+        expires_in=int(expires_delta.total_seconds()),
+        refresh_token=refresh_token,
+    )
+
+
+def refresh_tokens(db: Session, raw_refresh_token: str) -> Optional[schemas.Token]:
+    """
+    Exchange a refresh token for a new access/refresh pair without a password check.
+    Tokens are single use: presenting a used one revokes its whole family.
+    """
+    stored = crud.get_refresh_token(db, raw_refresh_token)
+    if stored is None or stored.revoked_at is not None or stored.expires_at <= _utcnow():
+        return None
+    if not crud.consume_refresh_token(db, stored.token_id):
+        # Replay of an already rotated token: assume it leaked and end that login
+        db.rollback()
+        crud.revoke_refresh_token_family(db, stored.family_id)
+        return None
+
+    principal = load_principal(db, stored.user_id)
+    if principal is None or not principal.is_active:
+        db.rollback()
+        return None
+    return issue_tokens(db, principal.user_id, principal.email, family_id=stored.family_id)
+
+
+def revoke_access_token(db: Session, token_data: schemas.TokenData) -> None:
+    """Revoke an access token until it expires"""
+    if not token_data.jti or token_data.expires_at is None:
+        return
+    crud.revoke_access_token(db, token_data.jti, token_data.expires_at.replace(tzinfo=None))
+    revocation_list.add(token_data.jti)
+
+
+def is_token_revoked(db: Session, token_data: schemas.TokenData) -> bool:
+    """O(1) in the common case; see token_revocation"""
+    return bool(token_data.jti) and revocation_list.is_revoked(db, token_data.jti)
+
+
+def load_principal(db: Session, user_id: uuid.UUID) -> Optional[Principal]:
+    """Get the cached snapshot of a user, falling back to the database"""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = crud.get_user(db, user_id=user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+    return principal
+
+
+async def get_current_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(database.get_db)
-) -> User:
-    """Get the current authenticated user"""
+) -> schemas.TokenData:
+    """Get the claims of the presented, unrevoked access token"""
+    token_data = verify_token(credentials.credentials)
+    if token_data is None or is_token_revoked(db, token_data):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data
+
+
+async def get_current_user(
+    token_data: schemas.TokenData = Depends(get_current_token),
+    db: Session = Depends(database.get_db)
+) -> Principal:
+    """Get the current authenticated user as a lightweight principal (not an ORM entity)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(credentials.credentials)
-    if token_data is None:
+    principal = load_principal(db, token_data.user_id)
+    if principal is None:
         raise credentials_exception
     
-    from . import crud
-    user = crud.get_user(db, user_id=token_data.user_id)
-    if user is None:
-        raise credentials_exception
-    
-    return user
+    return principal
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get the current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -121,8 +214,8 @@ async def get_current_active_user(
 
 
 async def get_current_invited_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     """
     Get the current user and ensure they have been invited.
     This is used to protect endpoints that require a user to have been
@@ -143,7 +236,7 @@ class RequireRole:
     def __init__(self, *allowed_roles: UserRole):
         self.allowed_roles = allowed_roles
     
-    def __call__(self, current_user: User = Depends(get_current_active_user)) -> User:
+    def __call__(self, current_user: Principal = Depends(get_current_active_user)) -> Principal:
         if current_user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -164,7 +257,7 @@ require_admin_or_reviewer = RequireRole(UserRole.ADMIN, UserRole.REVIEWER)
 # require_admin_or_trainer = require_admin_or_worker
 
 
-def get_current_user_id(current_user: User = Depends(get_current_active_user)) -> uuid.UUID:
+def get_current_user_id(current_user: Principal = Depends(get_current_active_user)) -> uuid.UUID:
     """Get the current user's ID"""
     return current_user.user_id
 
@@ -173,14 +266,13 @@ def get_current_user_id(current_user: User = Depends(get_current_active_user)) -
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(database.get_db)
-) -> Optional[User]:
+) -> Optional[Principal]:
     """Get the current user if authenticated, otherwise None"""
     if not credentials:
         return None
     
     token_data = verify_token(credentials.credentials)
-    if token_data is None:
+    if token_data is None or is_token_revoked(db, token_data):
         return None
     
-    user = crud.get_user(db, user_id=token_data.user_id)
-    return user
\ No newline at end of file
+    return load_principal(db, token_data.user_id)
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Response compression middleware.
+
+Compresses eligible responses with the best encoding the client accepts: gzip is
+always available, brotli ("br") needs the `brotli` package (in requirements.txt)
+and zstd needs the optional `zstandard`. Bodies under COMPRESSION_MINIMUM_SIZE are sent as is, since headers
+and CPU would outweigh the savings. Every response of a compressible type carries
+`Vary: Accept-Encoding`, compressed or not, so shared caches never serve one
+client's encoding to another. Streaming responses (NDJSON, Server-Sent Events)
+are compressed chunk by chunk with a sync flush after every chunk, so each event
+reaches the client as soon as it is written.
+
+Behind API Gateway, Mangum base64-encodes gzip/deflate/br bodies but treats
+anything else as text, so keep zstd out of COMPRESSION_ENCODINGS on Lambda.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """Encodings whose libraries are installed"""
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def make_compressor(encoding: str, level: Optional[int] = None):
+    """Build a compressor for encoding, at the configured level unless one is given"""
+    if encoding == "gzip":
+        return GzipCompressor(settings.COMPRESSION_GZIP_LEVEL if level is None else level)
+    if encoding == "br":
+        return BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY if level is None else level)
+    if encoding == "zstd":
+        return ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL if level is None else level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(header: str, offered: List[str]) -> Optional[str]:
+    """Pick the client's highest-q encoding among offered (ties go to the server's order)"""
+    accepted = _parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; works for buffered and streaming responses alike"""
+
+    def __init__(self, app, minimum_size: Optional[int] = None, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        configured = encodings or [e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if e.strip()]
+        installed = available_encodings()
+        self.encodings = [e for e in configured if e in installed]
+        missing = [e for e in configured if e not in installed]
+        if missing:
+            print(f"Compression encodings not available (package not installed): {', '.join(missing)}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        # With no usable encoding the responder still adds Vary, so caches keep variants apart
+        encoding = negotiate_encoding(accept, self.encodings) if accept else None
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+def _with_vary(headers) -> List[Tuple[bytes, bytes]]:
+    """headers with Accept-Encoding added to (or merged into) Vary"""
+    merged: List[Tuple[bytes, bytes]] = []
+    vary: List[bytes] = []
+    for name, value in headers:
+        if name == b"vary":
+            vary.append(value)
+        else:
+            merged.append((name, value))
+    fields = [v.strip().lower() for value in vary for v in value.split(b",")]
+    if b"accept-encoding" not in fields and b"*" not in fields:
+        vary.append(b"Accept-Encoding")
+    merged.append((b"vary", b", ".join(vary)))
+    return merged
+
+
+class _CompressedResponder:
+    def __init__(self, app, encoding: Optional[str], minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message: Optional[dict] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            # Every representation of a compressible type varies by Accept-Encoding,
+            # whether or not this one ends up compressed
+            if self._compressible(message):
+                message = {**message, "headers": _with_vary(message.get("headers", []))}
+            # Hold the headers until the first body chunk tells us the size
+            self.start_message = message
+            self.passthrough = self.encoding is None or not self._eligible(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = make_compressor(self.encoding)
+            if more_body:
+                # Streaming: length unknown up front
+                await self.send(self._compressed_start(None))
+            else:
+                compressed = self.compressor.finish(body)
+                await self.send(self._compressed_start(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+        chunk = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _eligible(self, message) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 304):
+            return False
+        return self._compressible(message)
+
+    @staticmethod
+    def _compressible(message) -> bool:
+        """A compressible content type that isn't already encoded"""
+        content_type = b""
+        for name, value in message.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1").split(";")[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+    def _compressed_start(self, content_length: Optional[int]) -> dict:
+        headers: List[Tuple[bytes, bytes]] = []
+        for name, value in self.start_message.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # The compressed bytes differ from the identity representation
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return {**self.start_message, "headers": headers}
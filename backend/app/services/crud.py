@@ -2,10 +2,15 @@
 CRUD operations for database models.
 Contains reusable functions for Create, Read, Update, Delete operations.
 """
+import hashlib
+import secrets
 import uuid
-from typing import Optional, List, Type, Union
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, List, Type, Union
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import and_, or_, case, delete, func, insert, literal, select, union_all, update
 from datetime import datetime, timezone
 from sqlalchemy.inspection import inspect as sa_inspect
 """
@@ -14,11 +19,23 @@ Import them inside functions where needed.
 """
 
 from ..db import models
-from . import schemas
+from . import schemas, session_events, session_transitions, task_cache, upsert
+from .principal_cache import principal_cache
 
 
 # --- Generic CRUD Operations ---
 
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """Run several writes (crud helpers called with commit=False) as one transaction"""
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
 def _get_single_pk_column(model: Type):
     mapper = sa_inspect(model)
     pks = mapper.primary_key
@@ -29,6 +46,25 @@ def _get_single_pk_column(model: Type):
     return pks[0]
 
 
+def _update_returning(db: Session, stmt, pk_column, *columns) -> list:
+    """Run a conditional UPDATE and return the given columns of the rows it changed"""
+    if db.get_bind().dialect.update_returning:
+        return db.execute(stmt.returning(*columns)).all()
+    # Dialects without UPDATE ... RETURNING: lock the candidate rows first
+    candidates = db.execute(select(pk_column, *columns).where(stmt.whereclause).with_for_update()).all()
+    if candidates:
+        db.execute(stmt.where(pk_column.in_([row[0] for row in candidates])))
+    return [tuple(row[1:]) for row in candidates]
+
+
+def _expire_loaded(db: Session, model: Type, ids: Iterable) -> None:
+    """Expire copies of rows changed by a bulk UPDATE already loaded in this Session (sessions don't expire on commit)"""
+    for id_value in ids:
+        loaded = db.identity_map.get(db.identity_key(model, id_value))
+        if loaded is not None:
+            db.expire(loaded)
+
+
 def get_by_id(db: Session, model: Type, id_value: uuid.UUID):
     """Generic function to get a record by ID using the model's primary key column"""
     pk_col = _get_single_pk_column(model)
@@ -65,7 +101,7 @@ def get_users(db: Session, skip: int = 0, limit: int = 100, role: Optional[model
     return query.offset(skip).limit(limit).all()
 
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+def create_user(db: Session, user: schemas.UserCreate, commit: bool = True) -> models.User:
     """Create a new user"""
     from .auth import get_password_hash
     hashed_password = get_password_hash(user.password)
@@ -80,8 +116,8 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
         profession=user.profession,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    if commit:
+        db.commit()
     return db_user
 
 
@@ -96,7 +132,9 @@ def update_user(db: Session, user_id: uuid.UUID, user_update: schemas.UserUpdate
         setattr(db_user, field, value)
     
     db.commit()
-    db.refresh(db_user)
+    principal_cache.invalidate(user_id)
+    # Cached tasks embed their creator
+    task_cache.invalidate()
     return db_user
 
 
@@ -113,14 +151,125 @@ def update_user_password(db: Session, user_id: uuid.UUID, password_update: schem
 
     # Set new password
     db_user.hashed_password = get_password_hash(password_update.new_password)
+    # Sessions started with the old password must log in again
+    revoke_user_refresh_tokens(db, user_id, commit=False)
     db.commit()
-    db.refresh(db_user)
+    principal_cache.invalidate(user_id)
     return db_user
 
 
 def delete_user(db: Session, user_id: uuid.UUID) -> bool:
     """Delete a user"""
-    return delete_by_id(db, models.User, user_id)
+    deleted = delete_by_id(db, models.User, user_id)
+    if deleted:
+        principal_cache.invalidate(user_id)
+        task_cache.invalidate()
+    return deleted
+
+
+# --- Token CRUD Operations ---
+
+def _utcnow() -> datetime:
+    # Token timestamps are stored as naive UTC so comparisons behave the same on every backend
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def hash_refresh_token(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def create_refresh_token(
+    db: Session, user_id: uuid.UUID, expires_at: datetime, family_id: Optional[uuid.UUID] = None, commit: bool = True
+) -> str:
+    """Store a new refresh token and return its raw value (only ever shown to the client)"""
+    raw_token = secrets.token_urlsafe(32)
+    db.add(models.RefreshToken(
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4(),
+        token_hash=hash_refresh_token(raw_token),
+        created_at=_utcnow(),
+        expires_at=expires_at,
+    ))
+    if commit:
+        db.commit()
+    return raw_token
+
+
+def get_refresh_token(db: Session, raw_token: str) -> Optional[models.RefreshToken]:
+    """Get a refresh token by its raw value"""
+    return db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == hash_refresh_token(raw_token)).first()
+
+
+def consume_refresh_token(db: Session, token_id: uuid.UUID) -> bool:
+    """Mark a token used; False if it was already used or revoked (concurrent exchanges lose)"""
+    result = db.execute(
+        update(models.RefreshToken)
+        .where(
+            models.RefreshToken.token_id == token_id,
+            models.RefreshToken.used_at.is_(None),
+            models.RefreshToken.revoked_at.is_(None),
+        )
+        .values(used_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def revoke_refresh_token_family(db: Session, family_id: uuid.UUID, commit: bool = True) -> int:
+    """Revoke every token descended from the same login"""
+    result = db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id == family_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: uuid.UUID, commit: bool = True) -> int:
+    """Revoke all refresh tokens of a user"""
+    result = db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.user_id == user_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
+def revoke_access_token(db: Session, jti: str, expires_at: datetime, commit: bool = True) -> None:
+    """Add an access token to the revocation list"""
+    if db.get(models.RevokedToken, jti) is None:
+        db.add(models.RevokedToken(jti=jti, expires_at=expires_at, revoked_at=_utcnow()))
+    if commit:
+        db.commit()
+
+
+def is_access_token_revoked(db: Session, jti: str) -> bool:
+    """Authoritative revocation check for a single jti"""
+    return db.query(models.RevokedToken.jti).filter(models.RevokedToken.jti == jti).first() is not None
+
+
+def get_revoked_access_token_ids(db: Session) -> List[str]:
+    """All revoked jtis whose tokens have not expired yet"""
+    rows = db.query(models.RevokedToken.jti).filter(models.RevokedToken.expires_at > _utcnow()).all()
+    return [jti for (jti,) in rows]
+
+
+def purge_expired_revoked_tokens(db: Session, commit: bool = True) -> int:
+    """Delete revocations of tokens that have expired anyway; returns how many were removed"""
+    result = db.execute(
+        delete(models.RevokedToken)
+        .where(models.RevokedToken.expires_at <= _utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.commit()
+    return result.rowcount
 
 
 # --- Invitation CRUD Operations ---
@@ -160,11 +309,73 @@ def create_invitation(db: Session, invitation: schemas.InvitationCreate, invited
     )
     db.add(db_invitation)
     db.commit()
-    db.refresh(db_invitation)
     return db_invitation
 
 
-def update_invitation_status(db: Session, invitation_id: uuid.UUID, status: models.InvitationStatus, used_at: Optional[datetime] = None) -> Optional[models.Invitation]:
+INVITATION_ALREADY_USED = "User with this email already exists and has already used an invitation"
+INVITATION_ALREADY_PENDING = "Pending invitation already exists for this email"
+INVITATION_DUPLICATE_IN_REQUEST = "Email appears more than once in this request"
+
+
+def find_invitation_conflicts(db: Session, emails: Iterable[str]) -> Dict[str, str]:
+    """Emails that can't be invited (already registered through an invitation, or with one outstanding), mapped to the reason"""
+    emails = list(set(emails))
+    if not emails:
+        return {}
+    used = select(literal(INVITATION_ALREADY_USED).label("reason"), models.User.email).where(
+        models.User.email.in_(emails), models.User.is_invited.is_(True)
+    )
+    pending = select(literal(INVITATION_ALREADY_PENDING).label("reason"), models.Invitation.email).where(
+        models.Invitation.email.in_(emails),
+        models.Invitation.status.in_([models.InvitationStatus.PENDING, models.InvitationStatus.SENT]),
+    )
+    conflicts = {}
+    for reason, email in db.execute(union_all(used, pending)):
+        # A registered user outranks an outstanding invitation
+        if conflicts.get(email) != INVITATION_ALREADY_USED:
+            conflicts[email] = reason
+    return conflicts
+
+
+@dataclass
+class BulkInvitationResult:
+    """Outcome of inviting many emails at once"""
+    created: List[models.Invitation] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)  # email -> reason
+
+
+def create_invitations(db: Session, invitations: Iterable[schemas.InvitationCreate], invited_by_id: uuid.UUID, expires_at: datetime, commit: bool = True) -> BulkInvitationResult:
+    """Create invitations for many emails: one query for conflicts, one multi-row INSERT for the rest"""
+    result = BulkInvitationResult()
+    unique = {}
+    for invitation in invitations:
+        if invitation.email in unique:
+            result.skipped[invitation.email] = INVITATION_DUPLICATE_IN_REQUEST
+        else:
+            unique[invitation.email] = invitation
+
+    conflicts = find_invitation_conflicts(db, list(unique))
+    result.skipped.update(conflicts)
+    rows = [
+        {
+            "email": invitation.email,
+            "role": invitation.role,
+            "invited_by_id": invited_by_id,
+            "expires_at": expires_at,
+            "invitation_code": secrets.token_urlsafe(32),
+        }
+        for email, invitation in unique.items() if email not in conflicts
+    ]
+    if rows:
+        result.created = db.scalars(
+            insert(models.Invitation).returning(models.Invitation, sort_by_parameter_order=True), rows
+        ).all()
+    if commit:
+        db.commit()
+    return result
+
+
+def update_invitation_status(db: Session, invitation_id: uuid.UUID, status: models.InvitationStatus, used_at: Optional[datetime] = None, commit: bool = True) -> Optional[models.Invitation]:
     """Update the status of an invitation"""
     db_invitation = get_invitation(db, invitation_id)
     if not db_invitation:
@@ -173,9 +384,9 @@ def update_invitation_status(db: Session, invitation_id: uuid.UUID, status: mode
     db_invitation.status = status
     if used_at:
         db_invitation.used_at = used_at
-        
-    db.commit()
-    db.refresh(db_invitation)
+
+    if commit:
+        db.commit()
     return db_invitation
 
 
@@ -188,10 +399,30 @@ def mark_invitation_sent(db: Session, invitation_id: uuid.UUID) -> Optional[mode
     db_invitation.status = models.InvitationStatus.SENT
     db_invitation.sent_at = datetime.now(timezone.utc)
     db.commit()
-    db.refresh(db_invitation)
     return db_invitation
 
 
+def invitation_email_key(invitation_id: uuid.UUID) -> str:
+    """Outbox dedupe key of an invitation's email; the outbox marks the invitation SENT when it is delivered"""
+    return f"invitation:{invitation_id}"
+
+
+def mark_invitations_sent(db: Session, invitation_ids: Iterable[uuid.UUID], commit: bool = True) -> int:
+    """Mark many still-pending invitations as sent in one UPDATE; returns how many rows changed"""
+    ids = list(invitation_ids)
+    if not ids:
+        return 0
+    result = db.execute(
+        update(models.Invitation)
+        .where(models.Invitation.invitation_id.in_(ids), models.Invitation.status == models.InvitationStatus.PENDING)
+        .values(status=models.InvitationStatus.SENT, sent_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session="evaluate")
+    )
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
 def delete_invitation(db: Session, invitation_id: uuid.UUID) -> bool:
     """Delete an invitation"""
     return delete_by_id(db, models.Invitation, invitation_id)
@@ -204,12 +435,33 @@ def get_task(db: Session, task_id: uuid.UUID) -> Optional[models.Task]:
     return db.query(models.Task).filter(models.Task.task_id == task_id).first()
 
 
+# Pages of tasks and their ETag sources must select the same rows, so both use this total order
+_TASK_PAGE_ORDER = (models.Task.created_at, models.Task.task_id)
+
+
 def get_tasks(db: Session, skip: int = 0, limit: int = 100, created_by_id: Optional[uuid.UUID] = None) -> List[models.Task]:
     """Get multiple tasks with optional filtering"""
     query = db.query(models.Task).options(joinedload(models.Task.creator))
     if created_by_id:
         query = query.filter(models.Task.created_by_id == created_by_id)
-    return query.offset(skip).limit(limit).all()
+    return query.order_by(*_TASK_PAGE_ORDER).offset(skip).limit(limit).all()
+
+
+def get_task_etag_source(db: Session, task_id: uuid.UUID) -> Optional[tuple]:
+    """Versions of a task and its embedded creator, without loading either"""
+    return db.query(models.Task.version, models.User.version).outerjoin(
+        models.User, models.Task.created_by_id == models.User.user_id
+    ).filter(models.Task.task_id == task_id).first()
+
+
+def get_tasks_etag_source(db: Session, skip: int = 0, limit: int = 100, created_by_id: Optional[uuid.UUID] = None) -> List[tuple]:
+    """(task_id, task version, creator version) for the page get_tasks would return"""
+    query = db.query(models.Task.task_id, models.Task.version, models.User.version).outerjoin(
+        models.User, models.Task.created_by_id == models.User.user_id
+    )
+    if created_by_id:
+        query = query.filter(models.Task.created_by_id == created_by_id)
+    return query.order_by(*_TASK_PAGE_ORDER).offset(skip).limit(limit).all()
 
 
 def create_task(db: Session, task: schemas.TaskCreate, created_by_id: uuid.UUID) -> models.Task:
@@ -222,7 +474,7 @@ def create_task(db: Session, task: schemas.TaskCreate, created_by_id: uuid.UUID)
     )
     db.add(db_task)
     db.commit()
-    db.refresh(db_task)
+    task_cache.invalidate()
     return db_task
 
 
@@ -237,13 +489,27 @@ def update_task(db: Session, task_id: uuid.UUID, task_update: schemas.TaskUpdate
         setattr(db_task, field, value)
     
     db.commit()
-    db.refresh(db_task)
+    task_cache.invalidate()
     return db_task
 
 
 def delete_task(db: Session, task_id: uuid.UUID) -> bool:
     """Delete a task"""
-    return delete_by_id(db, models.Task, task_id)
+    deleted = delete_by_id(db, models.Task, task_id)
+    if deleted:
+        task_cache.invalidate()
+    return deleted
+
+
+def activate_all_tasks(db: Session) -> int:
+    """Mark every task active; returns the number of tasks updated"""
+    updated_count = db.query(models.Task).update({
+        models.Task.is_active: True,
+        models.Task.version: models.Task.version + 1,
+    })
+    db.commit()
+    task_cache.invalidate()
+    return updated_count
 
 
 # --- Task Assignment CRUD Operations ---
@@ -279,27 +545,58 @@ def get_task_assignment_by_task_and_user(db: Session, task_id: uuid.UUID, user_i
     ).first()
 
 
-def create_task_assignment(db: Session, assignment: schemas.TaskAssignmentCreate) -> models.TaskAssignment:
-    """Create a new task assignment"""
-    # Check if assignment already exists
-    existing = db.query(models.TaskAssignment).filter(
-        and_(models.TaskAssignment.task_id == assignment.task_id,
-             models.TaskAssignment.user_id == assignment.user_id)
-    ).first()
-    
-    if existing:
-        return existing
-    
-    db_assignment = models.TaskAssignment(
-        task_id=assignment.task_id,
-        user_id=assignment.user_id
-    )
-    db.add(db_assignment)
-    db.commit()
-    db.refresh(db_assignment)
+def create_task_assignment(db: Session, assignment: schemas.TaskAssignmentCreate, commit: bool = True) -> models.TaskAssignment:
+    """Create a new task assignment, or return the existing one for the same task and worker"""
+    db_assignment = upsert.get_or_create(db, models.TaskAssignment, {
+        "task_id": assignment.task_id,
+        "user_id": assignment.user_id,
+        "assigned_at": datetime.now(timezone.utc),
+    }, ["task_id", "user_id"])
+    if commit:
+        db.commit()
     return db_assignment
 
 
+@dataclass
+class BulkAssignmentResult:
+    """Outcome of assigning one task to many workers"""
+    assigned: List[uuid.UUID] = field(default_factory=list)
+    already_assigned: List[uuid.UUID] = field(default_factory=list)
+    rejected: List[uuid.UUID] = field(default_factory=list)  # missing users or not workers
+
+
+def assign_task_to_workers(db: Session, task_id: uuid.UUID, user_ids: Iterable[uuid.UUID], commit: bool = True) -> BulkAssignmentResult:
+    """Assign a task to many workers: one query to check roles, one INSERT for every new assignment"""
+    ids = list(dict.fromkeys(user_ids))
+    result = BulkAssignmentResult()
+    if not ids:
+        return result
+
+    workers = set(db.execute(
+        select(models.User.user_id).where(models.User.user_id.in_(ids), models.User.role == models.UserRole.WORKER)
+    ).scalars())
+    now = datetime.now(timezone.utc)
+    inserted = {user_id for (user_id,) in upsert.insert_ignore(
+        db,
+        models.TaskAssignment,
+        [{"assignment_id": uuid.uuid4(), "task_id": task_id, "user_id": user_id, "assigned_at": now}
+         for user_id in ids if user_id in workers],
+        ["task_id", "user_id"],
+        returning=[models.TaskAssignment.user_id],
+    )}
+    for user_id in ids:
+        if user_id not in workers:
+            result.rejected.append(user_id)
+        elif user_id in inserted:
+            result.assigned.append(user_id)
+        else:
+            result.already_assigned.append(user_id)
+
+    if commit:
+        db.commit()
+    return result
+
+
 def delete_task_assignment(db: Session, assignment_id: uuid.UUID) -> bool:
     """Delete a task assignment"""
     return delete_by_id(db, models.TaskAssignment, assignment_id)
@@ -334,57 +631,110 @@ def get_task_applications(
 
 
 def create_task_application(db: Session, application: schemas.TaskApplicationCreate, user_id: uuid.UUID) -> models.TaskApplication:
-    # Prevent duplicate applications per (task_id, user_id)
-    existing = db.query(models.TaskApplication).filter(
-        and_(models.TaskApplication.request_id == application.request_id,
-             models.TaskApplication.user_id == user_id)
-    ).first()
-    if existing:
-        return existing
-
-    db_app = models.TaskApplication(
-        request_id=application.request_id,
-        user_id=user_id,
-    )
-    db.add(db_app)
+    # One application per (request_id, user_id); applying again returns the existing one
+    db_app = upsert.get_or_create(db, models.TaskApplication, {
+        "request_id": application.request_id,
+        "user_id": user_id,
+        "applied_at": datetime.now(timezone.utc),
+    }, ["request_id", "user_id"])
     db.commit()
-    db.refresh(db_app)
     return db_app
 
 
+@dataclass
+class ApplicationDecisionResult:
+    """Outcome of deciding a batch of task applications"""
+    decided: List[uuid.UUID] = field(default_factory=list)
+    skipped: List[uuid.UUID] = field(default_factory=list)  # missing or already decided
+    assigned_request_ids: List[uuid.UUID] = field(default_factory=list)
+
+
+def decide_task_applications(
+    db: Session,
+    application_ids: Iterable[uuid.UUID],
+    approver_id: uuid.UUID,
+    approve: bool,
+    commit: bool = True,
+) -> ApplicationDecisionResult:
+    """
+    Approve or reject many applications in one transaction, without loading them.
+
+    Only PENDING applications change. On approval each OPEN request is assigned to the
+    first approved applicant (in the order given), and that worker gets a TaskAssignment
+    for the request's task unless one exists. Three statements regardless of batch size.
+    Copies of the changed applications and requests already loaded in db are expired.
+    """
+    ids = list(dict.fromkeys(application_ids))
+    result = ApplicationDecisionResult()
+    if not ids:
+        return result
+
+    now = datetime.now(timezone.utc)
+    ta = models.TaskApplication
+    decided = _update_returning(
+        db,
+        update(ta)
+        .where(ta.application_id.in_(ids), ta.status == models.TaskApplicationStatus.PENDING)
+        .values(
+            status=models.TaskApplicationStatus.APPROVED if approve else models.TaskApplicationStatus.REJECTED,
+            decided_at=now,
+            decided_by_id=approver_id,
+        )
+        .execution_options(synchronize_session=False),
+        ta.application_id,
+        ta.application_id, ta.request_id, ta.user_id,
+    )
+    decided_ids = {application_id for application_id, _, _ in decided}
+    _expire_loaded(db, ta, decided_ids)
+    result.decided = [application_id for application_id in ids if application_id in decided_ids]
+    result.skipped = [application_id for application_id in ids if application_id not in decided_ids]
+
+    if approve and decided:
+        position = {application_id: i for i, application_id in enumerate(ids)}
+        winners: Dict[uuid.UUID, uuid.UUID] = {}
+        for application_id, request_id, user_id in sorted(decided, key=lambda row: position[row[0]]):
+            winners.setdefault(request_id, user_id)
+
+        tr = models.TaskRequest
+        assigned = _update_returning(
+            db,
+            update(tr)
+            .where(tr.request_id.in_(list(winners)), tr.status == models.TaskRequestStatus.OPEN)
+            .values(
+                status=models.TaskRequestStatus.ASSIGNED,
+                assigned_user_id=case(winners, value=tr.request_id),
+                assigned_at=now,
+            )
+            .execution_options(synchronize_session=False),
+            tr.request_id,
+            tr.request_id, tr.task_id,
+        )
+        result.assigned_request_ids = [request_id for request_id, _ in assigned]
+        _expire_loaded(db, tr, result.assigned_request_ids)
+        # Create TaskAssignments linking task template and worker (for reporting)
+        pairs = dict.fromkeys((task_id, winners[request_id]) for request_id, task_id in assigned)
+        upsert.insert_ignore(db, models.TaskAssignment, [
+            {"assignment_id": uuid.uuid4(), "task_id": task_id, "user_id": user_id, "assigned_at": now}
+            for task_id, user_id in pairs
+        ], ["task_id", "user_id"])
+
+    if commit:
+        db.commit()
+    return result
+
+
 def decide_task_application(
     db: Session,
     application_id: uuid.UUID,
     approver_id: uuid.UUID,
     approve: bool,
 ) -> Optional[models.TaskApplication]:
-    app = get_task_application(db, application_id)
-    if not app:
-        return None
-    if app.status != models.TaskApplicationStatus.PENDING:
-        return app
-
-    app.status = models.TaskApplicationStatus.APPROVED if approve else models.TaskApplicationStatus.REJECTED
-    app.decided_at = datetime.now(timezone.utc)
-    app.decided_by_id = approver_id
-    db.commit()
-    db.refresh(app)
-
-    # On approval, assign worker to request and create a TaskAssignment
-    if approve:
-        # Assign request to user
-        req = db.query(models.TaskRequest).filter(models.TaskRequest.request_id == app.request_id).first()
-        if req and req.status == models.TaskRequestStatus.OPEN:
-            req.status = models.TaskRequestStatus.ASSIGNED
-            req.assigned_user_id = app.user_id
-            req.assigned_at = datetime.now(timezone.utc)
-            db.commit()
-            db.refresh(req)
-            # Create TaskAssignment linking task template and worker (for reporting)
-            assignment = schemas.TaskAssignmentCreate(task_id=req.task_id, user_id=app.user_id)
-            create_task_assignment(db, assignment)
-
-    return app
+    """Approve or reject one application; an already decided application is returned unchanged"""
+    decide_task_applications(db, [application_id], approver_id, approve)
+    return db.query(models.TaskApplication).options(
+        joinedload(models.TaskApplication.task_request),
+        joinedload(models.TaskApplication.user)
+    ).filter(models.TaskApplication.application_id == application_id).first()
 
 
 # --- Task Request CRUD Operations ---
@@ -422,7 +772,6 @@ def create_task_request(db: Session, req: schemas.TaskRequestCreate, client_id:
     )
     db.add(db_req)
     db.commit()
-    db.refresh(db_req)
     return db_req
 
 
@@ -434,7 +783,6 @@ def update_task_request(db: Session, request_id: uuid.UUID, update: schemas.Task
     for k, v in data.items():
         setattr(db_req, k, v)
     db.commit()
-    db.refresh(db_req)
     return db_req
 
 
@@ -444,11 +792,11 @@ def get_video_session(db: Session, session_id: uuid.UUID) -> Optional[models.Vid
     """Get a video session by ID"""
     return db.query(models.VideoSession).options(
         joinedload(models.VideoSession.creator),
-        joinedload(models.VideoSession.task),
+        joinedload(models.VideoSession.task).joinedload(models.Task.creator),
         joinedload(models.VideoSession.reviewer),
         joinedload(models.VideoSession.raw_clips),
         joinedload(models.VideoSession.processing_jobs),
-        joinedload(models.VideoSession.review)
+        joinedload(models.VideoSession.review).joinedload(models.Review.reviewer)
     ).filter(models.VideoSession.session_id == session_id).first()
 
 
@@ -493,7 +841,7 @@ def create_video_session(db: Session, session: schemas.VideoSessionCreate, creat
     )
     db.add(db_session)
     db.commit()
-    db.refresh(db_session)
+    _publish_session_status(db_session)
     return db_session
 
 
@@ -513,24 +861,62 @@ def create_video_session_from_upload(db: Session, session: schemas.VideoSessionC
     )
     db.add(db_session)
     db.commit()
-    db.refresh(db_session)
+    _publish_session_status(db_session)
     return db_session
 
 
 def update_video_session(db: Session, session_id: uuid.UUID, session_update: schemas.VideoSessionUpdate) -> Optional[models.VideoSession]:
-    """Update a video session"""
+    """
+    Update a video session. A status change goes through the state machine
+    (session_transitions.InvalidTransition if it isn't legal) and fails with
+    StaleDataError if the session changed status concurrently.
+    """
     db_session = get_video_session(db, session_id)
     if not db_session:
         return None
     
+    previous_status = db_session.status
     update_data = session_update.model_dump(exclude_unset=True)
+    new_status = update_data.pop("status", None)
+    if new_status == previous_status:
+        new_status = None
+    if new_status is not None:
+        session_transitions.ensure_transition(previous_status, new_status)
+
     for field, value in update_data.items():
         setattr(db_session, field, value)
     
     db_session.updated_at = datetime.now(timezone.utc)
+    if new_status is None:
+        db.commit()
+        return db_session
+
+    db.flush()
+    # Conditional on the status and version just written, like every other transition
+    result = session_transitions.bulk_transition(
+        db, [session_id], previous_status, new_status,
+        expected_versions={session_id: db_session.version}, commit=False,
+    )
+    if not result.moved:
+        db.rollback()
+        raise StaleDataError(f"Video session {session_id} changed status concurrently")
     db.commit()
-    db.refresh(db_session)
-    return db_session
+    session_transitions.publish_events(result)
+    # The transition expired the loaded session; reload it with its relationships
+    return get_video_session(db, session_id)
+
+
+def _publish_session_status(db_session: models.VideoSession, previous_status: Optional[models.VideoSessionStatus] = None) -> None:
+    """Publish the current status of a committed session to event subscribers"""
+    session_events.publish([session_events.SessionEvent(
+        session_id=db_session.session_id,
+        status=db_session.status,
+        previous_status=previous_status,
+        creator_id=db_session.creator_id,
+        reviewer_id=db_session.reviewer_id,
+        task_id=db_session.task_id,
+        version=db_session.version,
+    )])
 
 
 def delete_video_session(db: Session, session_id: uuid.UUID) -> bool:
@@ -538,6 +924,61 @@ def delete_video_session(db: Session, session_id: uuid.UUID) -> bool:
     return delete_by_id(db, models.VideoSession, session_id)
 
 
+def _touch_video_session(db: Session, session_id: uuid.UUID) -> None:
+    """Bump a session's version and updated_at when its clips, jobs or review change, so its ETag changes too"""
+    db.execute(
+        update(models.VideoSession)
+        .where(models.VideoSession.session_id == session_id)
+        .values(version=models.VideoSession.version + 1, updated_at=datetime.now(timezone.utc))
+        # Sessions don't expire on commit, so keep an already-loaded parent in step without a reload
+        .execution_options(synchronize_session="evaluate")
+    )
+
+
+def _delete_session_child(db: Session, model: Type, id_value: uuid.UUID) -> bool:
+    """Delete a record that belongs to a video session and touch the parent session"""
+    record = get_by_id(db, model, id_value)
+    if not record:
+        return False
+    _touch_video_session(db, record.session_id)
+    db.delete(record)
+    db.commit()
+    return True
+
+
+def get_video_session_etag_source(db: Session, session_id: uuid.UUID) -> Optional[tuple]:
+    """
+    Cheap single-row lookup of everything a session's detail ETag depends on:
+    its own version/updated_at plus the versions of every user and task the response
+    embeds (creator, reviewer, task, the task's creator, the review's reviewer).
+    """
+    creator = aliased(models.User)
+    reviewer = aliased(models.User)
+    task_creator = aliased(models.User)
+    review_reviewer = aliased(models.User)
+    return db.query(
+        models.VideoSession.version,
+        models.VideoSession.updated_at,
+        creator.version,
+        reviewer.version,
+        models.Task.version,
+        task_creator.version,
+        review_reviewer.version,
+    ).outerjoin(
+        creator, models.VideoSession.creator_id == creator.user_id
+    ).outerjoin(
+        reviewer, models.VideoSession.reviewer_id == reviewer.user_id
+    ).outerjoin(
+        models.Task, models.VideoSession.task_id == models.Task.task_id
+    ).outerjoin(
+        task_creator, models.Task.created_by_id == task_creator.user_id
+    ).outerjoin(
+        models.Review, models.Review.session_id == models.VideoSession.session_id
+    ).outerjoin(
+        review_reviewer, models.Review.reviewer_id == review_reviewer.user_id
+    ).filter(models.VideoSession.session_id == session_id).first()
+
+
 # --- Raw Clip CRUD Operations ---
 
 def get_raw_clip(db: Session, clip_id: uuid.UUID) -> Optional[models.RawClip]:
@@ -559,8 +1000,8 @@ def create_raw_clip(db: Session, clip: schemas.RawClipCreate) -> models.RawClip:
         filesize_bytes=clip.filesize_bytes
     )
     db.add(db_clip)
+    _touch_video_session(db, clip.session_id)
     db.commit()
-    db.refresh(db_clip)
     return db_clip
 
 
@@ -574,14 +1015,14 @@ def update_raw_clip(db: Session, clip_id: uuid.UUID, clip_update: schemas.RawCli
     for field, value in update_data.items():
         setattr(db_clip, field, value)
     
+    _touch_video_session(db, db_clip.session_id)
     db.commit()
-    db.refresh(db_clip)
     return db_clip
 
 
 def delete_raw_clip(db: Session, clip_id: uuid.UUID) -> bool:
     """Delete a raw clip"""
-    return delete_by_id(db, models.RawClip, clip_id)
+    return _delete_session_child(db, models.RawClip, clip_id)
 
 
 # --- Review CRUD Operations ---
@@ -621,8 +1062,8 @@ def create_review(db: Session, review: schemas.ReviewCreate, reviewer_id: uuid.U
         comments=review.comments
     )
     db.add(db_review)
+    _touch_video_session(db, review.session_id)
     db.commit()
-    db.refresh(db_review)
     return db_review
 
 
@@ -636,14 +1077,14 @@ def update_review(db: Session, review_id: uuid.UUID, review_update: schemas.Revi
     for field, value in update_data.items():
         setattr(db_review, field, value)
     
+    _touch_video_session(db, db_review.session_id)
     db.commit()
-    db.refresh(db_review)
     return db_review
 
 
 def delete_review(db: Session, review_id: uuid.UUID) -> bool:
     """Delete a review"""
-    return delete_by_id(db, models.Review, review_id)
+    return _delete_session_child(db, models.Review, review_id)
 
 
 # --- Processing Job CRUD Operations ---
@@ -666,8 +1107,8 @@ def create_processing_job(db: Session, job: schemas.ProcessingJobCreate) -> mode
         status=job.status
     )
     db.add(db_job)
+    _touch_video_session(db, job.session_id)
     db.commit()
-    db.refresh(db_job)
     return db_job
 
 
@@ -681,14 +1122,98 @@ def update_processing_job(db: Session, job_id: uuid.UUID, job_update: schemas.Pr
     for field, value in update_data.items():
         setattr(db_job, field, value)
     
+    _touch_video_session(db, db_job.session_id)
     db.commit()
-    db.refresh(db_job)
     return db_job
 
 
 def delete_processing_job(db: Session, job_id: uuid.UUID) -> bool:
     """Delete a processing job"""
-    return delete_by_id(db, models.ProcessingJob, job_id)
+    return _delete_session_child(db, models.ProcessingJob, job_id)
+
+
+# --- Stripe Event CRUD Operations ---
+
+def record_stripe_event(db: Session, event_id: str, event_type: str, payload: str, commit: bool = True) -> bool:
+    """Store a verified webhook event for processing; False when this event id was already recorded"""
+    now = _utcnow()
+    inserted = upsert.insert_ignore(
+        db,
+        models.StripeEvent,
+        [{
+            "event_id": event_id,
+            "event_type": event_type,
+            "payload": payload,
+            "status": models.StripeEventStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "received_at": now,
+        }],
+        ["event_id"],
+        returning=[models.StripeEvent.event_id],
+    )
+    if commit:
+        db.commit()
+    return bool(inserted)
+
+
+# --- Email Outbox CRUD Operations ---
+
+def enqueue_emails(db: Session, messages: Iterable, dedupe_keys: Optional[Iterable[Optional[str]]] = None, commit: bool = True) -> int:
+    """
+    Queue emails (services.email.EmailMessage) for the outbox dispatcher, in the caller's transaction.
+    Messages whose dedupe key is already queued are dropped; returns how many were queued.
+    """
+    messages = list(messages)
+    keys = list(dedupe_keys) if dedupe_keys is not None else [None] * len(messages)
+    now = _utcnow()
+    rows = [
+        {
+            "outbox_id": uuid.uuid4(),
+            "to_address": message.to_address,
+            "subject": message.subject,
+            "body": message.body,
+            "text_body": message.text,
+            "dedupe_key": key,
+            "status": models.EmailOutboxStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for message, key in zip(messages, keys)
+    ]
+    queued = len(upsert.insert_ignore(db, models.EmailOutbox, rows, ["dedupe_key"], returning=[models.EmailOutbox.outbox_id]))
+    if commit:
+        db.commit()
+    return queued
+
+
+def enqueue_email(db: Session, message, dedupe_key: Optional[str] = None, commit: bool = True) -> bool:
+    """Queue one email; False when dedupe_key was already queued"""
+    return enqueue_emails(db, [message], [dedupe_key], commit=commit) == 1
+
+
+def requeue_failed_email(db: Session, message, dedupe_key: str, commit: bool = True) -> bool:
+    """Queue the email under dedupe_key again if its earlier delivery FAILED; False if it is queued or sent"""
+    now = _utcnow()
+    result = db.execute(
+        update(models.EmailOutbox)
+        .where(models.EmailOutbox.dedupe_key == dedupe_key, models.EmailOutbox.status == models.EmailOutboxStatus.FAILED)
+        .values(
+            to_address=message.to_address,
+            subject=message.subject,
+            body=message.body,
+            text_body=message.text,
+            status=models.EmailOutboxStatus.PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            last_error=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.commit()
+    return result.rowcount == 1
 
 
 # --- Statistics and Analytics ---
@@ -8,6 +8,8 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from ..db.base import Base
 from ..config import settings
+from . import query_accounting, slow_queries
+from .metrics import instrument_engine
 
 
 
@@ -33,8 +35,17 @@ else:
         pool_timeout=30,
     )
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Per-request DB time and statement counts
+instrument_engine(engine)
+query_accounting.install(engine)
+
+# Statements slower than SLOW_QUERY_THRESHOLD_MS, with their plans
+slow_queries.install(engine)
+
+# Create SessionLocal class. Objects stay loaded after commit: every column value is
+# set client-side (ids, defaults, version counters), so nothing needs reloading and a
+# write costs no follow-up SELECT.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -1,34 +1,126 @@
-import boto3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
 from botocore.exceptions import ClientError
 from app.config import settings
+from app.services import providers
+from app.services.rate_limit import MemoryBucketStore
 #from fastapi import BackgroundTasks
 
+_THROTTLE_CODES = ("Throttling", "ThrottlingException", "TooManyRequestsException")
+_THROTTLE_RETRIES = 3
+
+
+@dataclass
+class EmailMessage:
+    """One email to send; text is the optional plain-text alternate of the HTML body"""
+    to_address: str
+    subject: str
+    body: str
+    text: Optional[str] = None
+
+
+_ses_client = None
+_ses_lock = threading.Lock()
+# Shared by every bulk send in this process, so concurrent requests together stay under SES_MAX_SEND_RATE
+_send_rate = MemoryBucketStore(max_keys=1)
+
 
 def get_s3_client():
-    """Get an S3 client using boto3"""
-    return boto3.client('s3', region_name="us-east-1")
+    """Get the shared S3 client for S3_PROVIDER"""
+    return providers.get_s3_client()
+
+
+def get_ses_client():
+    """Shared SES client for SES_PROVIDER (thread-safe); SES_ENDPOINT_URL points the AWS one at a local stub"""
+    global _ses_client
+    if _ses_client is None:
+        with _ses_lock:
+            if _ses_client is None:
+                _ses_client = providers.build_ses_client()
+    return _ses_client
+
+
+def set_ses_client(client) -> None:
+    """Replace the shared SES client (tests, local stubs); None rebuilds it from settings"""
+    global _ses_client
+    _ses_client = client
+
+
+def _wait_for_send_slot() -> None:
+    rate = settings.SES_MAX_SEND_RATE
+    if not rate:
+        return
+    while True:
+        allowed, retry_after = _send_rate.consume("ses", capacity=max(rate, 1.0), rate=rate)
+        if allowed:
+            return
+        time.sleep(retry_after)
+
 
-def send_email(to_address: str, subject: str, body: str) -> bool:
+def _deliver(client, message: EmailMessage) -> Optional[str]:
+    """Send one message; None on success, else the SES error"""
+    body = {"Html": {"Data": message.body}}
+    if message.text:
+        body["Text"] = {"Data": message.text}
+    for attempt in range(_THROTTLE_RETRIES + 1):
+        try:
+            client.send_email(
+                Source=settings.SES_FROM_EMAIL,
+                Destination={"ToAddresses": [message.to_address]},
+                Message={"Subject": {"Data": message.subject}, "Body": body}
+            )
+            return None
+        except ClientError as e:
+            error = e.response["Error"]
+            if error.get("Code") in _THROTTLE_CODES and attempt < _THROTTLE_RETRIES:
+                time.sleep(0.2 * 2 ** attempt)
+                continue
+            print(f"Failed to send email to {message.to_address}: {error.get('Message')}")
+            return f"{error.get('Code')}: {error.get('Message')}"
+        except Exception as e:
+            print(f"Failed to send email to {message.to_address}: {e}")
+            return str(e)
+    return "throttled"
+
+
+def send_email(to_address: str, subject: str, body: str, text: Optional[str] = None) -> bool:
     """Send an email using AWS SES"""
     if not settings.SES_FROM_EMAIL:
         print("SES_FROM_EMAIL is not configured.")
         print(f"To: {to_address}, Subject: {subject}, Body: {body}")
         return False
-    
-
-    s_client = boto3.client("ses", region_name="us-east-1")
-    try:
-        response = s_client.send_email(
-            Source=settings.SES_FROM_EMAIL,
-            Destination={"ToAddresses": [to_address]},
-            Message={
-                "Subject": {"Data": subject},
-                "Body": {"Html": {"Data": body}}
-            }
-        )
-    except ClientError as e:
-        print(f"Failed to send email: {e.response['Error']['Message']}")
-        return False
-    else:
-        # print(f"SES MessageId: {response.get('MessageId')}")
-        return True
\ No newline at end of file
+
+    return _deliver(get_ses_client(), EmailMessage(to_address, subject, body, text)) is None
+
+
+def deliver_bulk(messages: Sequence[EmailMessage], concurrency: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Send many emails over a thread pool, paced to SES_MAX_SEND_RATE.
+    Returns, in order, None for each message sent and the error for each one that wasn't.
+    """
+    if not messages:
+        return []
+    if not settings.SES_FROM_EMAIL:
+        print(f"SES_FROM_EMAIL is not configured; not sending {len(messages)} emails.")
+        return ["SES_FROM_EMAIL is not configured"] * len(messages)
+
+    client = get_ses_client()
+
+    def send_one(message: EmailMessage) -> Optional[str]:
+        _wait_for_send_slot()
+        return _deliver(client, message)
+
+    workers = max(1, min(concurrency or settings.SES_SEND_CONCURRENCY, len(messages)))
+    if workers == 1:
+        return [send_one(message) for message in messages]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ses-send") as pool:
+        return list(pool.map(send_one, messages))
+
+
+def send_bulk_email(messages: Sequence[EmailMessage], concurrency: Optional[int] = None) -> List[bool]:
+    """Like deliver_bulk, but one success flag per message"""
+    return [error is None for error in deliver_bulk(messages, concurrency)]
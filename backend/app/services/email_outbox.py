@@ -0,0 +1,188 @@
+"""
+Transactional email outbox.
+
+Handlers queue emails with crud.enqueue_email(s) in the same transaction as the
+change that causes them: a rollback drops the email, a commit guarantees it is
+sent eventually, and the HTTP response never waits on SES.
+
+dispatch() drains due rows in batches. A batch is claimed (FOR UPDATE SKIP LOCKED
+on Postgres, so dispatchers can run side by side) by pushing next_attempt_at out
+by EMAIL_OUTBOX_LEASE_SECONDS, delivered through email.deliver_bulk (parallel,
+paced to SES_MAX_SEND_RATE), then marked SENT, or rescheduled with exponential
+backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, after which it is FAILED. Rows whose
+dedupe key has a DELIVERY_HOOKS prefix (e.g. "invitation:<id>") also update their
+source record in the same transaction as being marked SENT.
+
+On Lambda, lambda_handler.email_outbox_handler runs dispatch() on a schedule.
+Elsewhere a worker thread starts with the app (EMAIL_OUTBOX_WORKER_ENABLED); wake()
+lets a handler have its emails sent right after commit instead of at the next poll.
+"""
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import models
+from . import crud, email
+from .workers import PollingWorker, backoff_seconds
+
+Outbox = models.EmailOutbox
+
+
+@dataclass
+class DispatchResult:
+    """Rows handled by one dispatch() run"""
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.retrying + self.failed
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# --- Delivery hooks: fn(db, ids) for the part after "<prefix>:" of delivered rows' dedupe keys; don't commit ---
+
+def _invitations_delivered(db: Session, ids: List[str]) -> None:
+    crud.mark_invitations_sent(db, [uuid.UUID(value) for value in ids], commit=False)
+
+
+DELIVERY_HOOKS: Dict[str, Callable[[Session, List[str]], None]] = {
+    "invitation": _invitations_delivered,
+}
+
+
+def _run_delivery_hooks(db: Session, dedupe_keys: List[Optional[str]]) -> None:
+    by_prefix: Dict[str, List[str]] = {}
+    for key in dedupe_keys:
+        prefix, _, value = (key or "").partition(":")
+        if prefix in DELIVERY_HOOKS and value:
+            by_prefix.setdefault(prefix, []).append(value)
+    for prefix, values in by_prefix.items():
+        DELIVERY_HOOKS[prefix](db, values)
+
+
+def claim_batch(db: Session, limit: int) -> list:
+    """Lease up to limit due rows to this dispatcher; returns (outbox_id, to_address, subject, body, text_body, dedupe_key, attempts) rows"""
+    now = _utcnow()
+    rows = db.execute(
+        select(Outbox.outbox_id, Outbox.to_address, Outbox.subject, Outbox.body, Outbox.text_body, Outbox.dedupe_key, Outbox.attempts)
+        .where(Outbox.status == models.EmailOutboxStatus.PENDING, Outbox.next_attempt_at <= now)
+        .order_by(Outbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        db.execute(
+            update(Outbox)
+            .where(Outbox.outbox_id.in_([row.outbox_id for row in rows]))
+            .values(next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS), attempts=Outbox.attempts + 1)
+        )
+    db.commit()
+    return rows
+
+
+def record_results(db: Session, rows: list, errors: List[Optional[str]], result: DispatchResult) -> None:
+    """Mark delivered rows SENT (one UPDATE) and run their delivery hooks; reschedule or fail the rest (one executemany)"""
+    now = _utcnow()
+    delivered = [row for row, error in zip(rows, errors) if error is None]
+    if delivered:
+        db.execute(
+            update(Outbox)
+            .where(Outbox.outbox_id.in_([row.outbox_id for row in delivered]))
+            .values(status=models.EmailOutboxStatus.SENT, sent_at=now, last_error=None)
+        )
+        _run_delivery_hooks(db, [row.dedupe_key for row in delivered])
+        result.sent += len(delivered)
+
+    retries = []
+    for row, error in zip(rows, errors):
+        if error is None:
+            continue
+        attempts = row.attempts + 1
+        exhausted = attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        retries.append({
+            "outbox_id": row.outbox_id,
+            "status": models.EmailOutboxStatus.FAILED if exhausted else models.EmailOutboxStatus.PENDING,
+            "next_attempt_at": now + timedelta(seconds=0 if exhausted else backoff_seconds(attempts, settings.EMAIL_OUTBOX_BACKOFF_SECONDS, settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS)),
+            "last_error": error[:2000],
+        })
+        if exhausted:
+            print(f"Giving up on email {row.outbox_id} to {row.to_address} after {attempts} attempts: {error}")
+            result.failed += 1
+        else:
+            result.retrying += 1
+    if retries:
+        # ORM bulk UPDATE by primary key
+        db.execute(update(Outbox), retries)
+    db.commit()
+
+
+def dispatch(
+    session_factory: Optional[Callable[[], Session]] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> DispatchResult:
+    """Deliver due emails batch by batch until none are due, max_batches ran, or time_budget (seconds) is spent"""
+    if session_factory is None:
+        from .database import SessionLocal as session_factory
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    result = DispatchResult()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        with session_factory() as db:
+            rows = claim_batch(db, batch_size)
+            if not rows:
+                break
+            errors = email.deliver_bulk([email.EmailMessage(row.to_address, row.subject, row.body, row.text_body) for row in rows])
+            record_results(db, rows, errors, result)
+        batches += 1
+    return result
+
+
+def _run_once(session_factory: Optional[Callable[[], Session]] = None) -> None:
+    result = dispatch(session_factory)
+    if result.total:
+        print(f"Email outbox: {result.sent} sent, {result.retrying} retrying, {result.failed} failed")
+
+
+_worker: Optional[PollingWorker] = None
+
+
+def get_worker() -> Optional[PollingWorker]:
+    """The running in-process worker, if any"""
+    return _worker
+
+
+def start_worker(session_factory: Optional[Callable[[], Session]] = None) -> PollingWorker:
+    global _worker
+    if _worker is None:
+        _worker = PollingWorker("email-outbox-worker", lambda: _run_once(session_factory), settings.EMAIL_OUTBOX_POLL_SECONDS)
+    _worker.start()
+    return _worker
+
+
+def stop_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def wake() -> None:
+    """Have the in-process worker dispatch now (call after committing queued emails); no-op without one"""
+    if _worker is not None:
+        _worker.wake()
@@ -0,0 +1,101 @@
+"""
+Email templates, compiled once at import.
+
+Each template in app/templates/email is a set of files sharing a name:
+<name>.subject, <name>.html and, optionally, <name>.txt (the plain-text
+alternate). Fields are written {{field}}, the placeholder syntax SES templates
+use, so the same files can also be registered with SES as they are.
+
+Compiling splits a template into its literal chunks and field names. Rendering
+then joins the chunks with the (HTML-escaped, for the HTML part) values and does
+no parsing, so rendering a batch for many recipients costs little more than the
+string joins.
+"""
+import html
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .email import EmailMessage
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+_FIELD = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+class CompiledTemplate:
+    """A template split once into literal chunks and the fields between them"""
+
+    __slots__ = ("_literals", "_fields", "fields")
+
+    def __init__(self, source: str):
+        pieces = _FIELD.split(source)
+        self._literals: Tuple[str, ...] = tuple(pieces[0::2])
+        self._fields: Tuple[str, ...] = tuple(pieces[1::2])
+        self.fields: FrozenSet[str] = frozenset(self._fields)
+
+    def render(self, context: Dict[str, str], escape: Optional[Callable[[str], str]] = None) -> str:
+        out = [self._literals[0]]
+        for field, literal in zip(self._fields, self._literals[1:]):
+            value = context[field]
+            out.append(escape(value) if escape else value)
+            out.append(literal)
+        return "".join(out)
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    """Subject, HTML body and optional plain-text body of one email"""
+    name: str
+    subject: CompiledTemplate
+    html: CompiledTemplate
+    text: Optional[CompiledTemplate] = None
+
+    @property
+    def fields(self) -> FrozenSet[str]:
+        fields = self.subject.fields | self.html.fields
+        return fields | self.text.fields if self.text else fields
+
+    def render(self, to_address: str, **context) -> EmailMessage:
+        values = {key: str(value) for key, value in context.items()}
+        missing = self.fields - values.keys()
+        if missing:
+            raise ValueError(f"Email template {self.name!r} is missing fields: {', '.join(sorted(missing))}")
+        return EmailMessage(
+            to_address=to_address,
+            subject=self.subject.render(values),
+            body=self.html.render(values, escape=html.escape),
+            text=self.text.render(values) if self.text else None,
+        )
+
+    def render_many(self, recipients: Iterable[Tuple[str, dict]]) -> List[EmailMessage]:
+        """One message per (to_address, context) pair"""
+        return [self.render(to_address, **context) for to_address, context in recipients]
+
+
+def load_templates(directory: Path = TEMPLATE_DIR) -> Dict[str, EmailTemplate]:
+    """Compile every template in directory, keyed by name"""
+    templates = {}
+    for html_path in sorted(directory.glob("*.html")):
+        name = html_path.stem
+        text_path = directory / f"{name}.txt"
+        templates[name] = EmailTemplate(
+            name=name,
+            subject=CompiledTemplate((directory / f"{name}.subject").read_text(encoding="utf-8").strip()),
+            html=CompiledTemplate(html_path.read_text(encoding="utf-8")),
+            text=CompiledTemplate(text_path.read_text(encoding="utf-8")) if text_path.exists() else None,
+        )
+    return templates
+
+
+_templates: Dict[str, EmailTemplate] = load_templates()
+
+
+def get_template(name: str) -> EmailTemplate:
+    return _templates[name]
+
+
+def render(name: str, to_address: str, **context) -> EmailMessage:
+    """Render the named template for one recipient"""
+    return _templates[name].render(to_address, **context)
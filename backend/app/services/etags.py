@@ -0,0 +1,46 @@
+"""
+Conditional GET helpers.
+
+ETags are derived from cheap version columns (and updated_at for sessions), so a
+matching If-None-Match can be answered with a 304 after a single indexed lookup,
+before relationships are loaded or anything is serialized.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the values that determine a representation"""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(candidate) == current for candidate in header.split(","))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the ETag and ask clients to revalidate before reusing their copy"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
@@ -0,0 +1,197 @@
+"""
+Request metrics.
+
+MetricsMiddleware records, per route template: a latency histogram, a status
+counter, and database time and statement counts (collected from SQLAlchemy cursor
+events). It also tracks requests in flight. The registry is rendered in the
+Prometheus text format on GET /metrics. Under Lambda, where nothing scrapes the
+process, each request is also printed as a CloudWatch Embedded Metric Format line.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from ..config import settings
+from . import request_context
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts: Dict[tuple, list] = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums: Dict[tuple, float] = defaultdict(float)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        counts = self.counts[labels]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self.sums[labels] += value
+
+
+def _format_labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"'.replace("\n", " ") for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """Thread-safe in-process registry"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(DB_BUCKETS)
+        self.requests: Dict[tuple, int] = defaultdict(int)
+        self.db_statements: Dict[tuple, int] = defaultdict(int)
+        self.in_flight: Dict[str, int] = defaultdict(int)
+
+    def request_started(self, method: str) -> None:
+        with self._lock:
+            self.in_flight[method] += 1
+
+    def request_finished(self, context: request_context.RequestContext, status: int, duration: float) -> None:
+        labels = (context.method, context.route)
+        with self._lock:
+            self.in_flight[context.method] -= 1
+            self.latency.observe(labels, duration)
+            self.db_time.observe(labels, context.db_time)
+            self.requests[labels + (status,)] += 1
+            self.db_statements[labels] += context.db_statements
+
+    def render_prometheus(self) -> str:
+        route_labels = ("method", "route")
+        lines = []
+        with self._lock:
+            for name, help_text, histogram in (
+                ("http_request_duration_seconds", "Request latency by route", self.latency),
+                ("http_request_db_seconds", "Database time per request by route", self.db_time),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, counts in sorted(histogram.counts.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        bucket_labels = _format_labels(route_labels, labels, 'le="' + le + '"')
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(route_labels, labels)} {histogram.sums[labels]}")
+                    lines.append(f"{name}_count{_format_labels(route_labels, labels)} {cumulative}")
+
+            lines += ["# HELP http_requests_total Requests by route and status", "# TYPE http_requests_total counter"]
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_format_labels(route_labels + ('status',), labels)} {count}")
+
+            lines += ["# HELP db_statements_total SQL statements executed by route", "# TYPE db_statements_total counter"]
+            for labels, count in sorted(self.db_statements.items()):
+                lines.append(f"db_statements_total{_format_labels(route_labels, labels)} {count}")
+
+            lines += ["# HELP http_requests_in_flight Requests being served", "# TYPE http_requests_in_flight gauge"]
+            for method, count in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{_format_labels(('method',), (method,))} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+
+registry = MetricsRegistry()
+
+
+def _emf_enabled() -> bool:
+    if settings.METRICS_EMF is not None:
+        return settings.METRICS_EMF
+    return bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def emit_emf(context: request_context.RequestContext, status: int, duration: float) -> None:
+    """Print one CloudWatch Embedded Metric Format record for a finished request"""
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": settings.METRICS_NAMESPACE,
+                "Dimensions": [["Method", "Route"]],
+                "Metrics": [
+                    {"Name": "Latency", "Unit": "Milliseconds"},
+                    {"Name": "DbTime", "Unit": "Milliseconds"},
+                    {"Name": "DbStatements", "Unit": "Count"},
+                ],
+            }],
+        },
+        "Method": context.method,
+        "Route": context.route,
+        "StatusCode": status,
+        "Latency": round(duration * 1000, 3),
+        "DbTime": round(context.db_time * 1000, 3),
+        "DbStatements": context.db_statements,
+    }))
+
+
+def instrument_engine(engine) -> None:
+    """Attribute statement time on engine to the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        current = request_context.get_current()
+        started_at = getattr(context, "_metrics_started_at", None)
+        if current is None or started_at is None:
+            return
+        current.db_time += time.perf_counter() - started_at
+        current.db_statements += 1
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware that times every HTTP request"""
+
+    def __init__(self, app, metrics_registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = metrics_registry or registry
+        self.emf = _emf_enabled()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        context = request_context.RequestContext(method=scope["method"], path=scope["path"], scope=scope)
+        token = request_context.activate(context)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.registry.request_started(context.method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - context.started_at
+            self.registry.request_finished(context, status_code, duration)
+            if self.emf:
+                emit_emf(context, status_code, duration)
+            request_context.deactivate(token)
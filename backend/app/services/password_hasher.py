@@ -0,0 +1,253 @@
+"""
+Bounded worker pool for password hashing.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Running it inline in
+request threads lets a burst of logins starve every other request, so hashing and
+verification are sent to a dedicated pool with a bounded number of in-flight
+jobs. When the pool and its queue are full, callers get PasswordHasherBusy, which
+the API turns into a 503 instead of piling up more work.
+
+The work factor is a HashPolicy (bcrypt rounds or an argon2id profile) taken from
+settings. Pick it once per deployment with the calibration CLI at the bottom of
+this module, so every host hashes at the same cost. Hashes made with another
+scheme or a lower cost are upgraded at the next successful login; stronger hashes
+are never rewritten at a lower cost.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
+
+from ..config import settings
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing pool is saturated"""
+
+
+class HashPolicy(NamedTuple):
+    """Scheme and cost parameters; hashable so worker processes can cache contexts per policy"""
+    scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_kib: int = 65536
+    argon2_parallelism: int = 1
+
+
+# --- Worker-side functions (must be importable by pool processes) ---
+
+@lru_cache(maxsize=None)
+def _context(policy: HashPolicy) -> CryptContext:
+    schemes = ["bcrypt"]
+    if policy.scheme == "argon2" or argon2.has_backend():
+        schemes.insert(0, "argon2")
+    return CryptContext(
+        schemes=schemes,
+        default=policy.scheme,
+        bcrypt__rounds=policy.bcrypt_rounds,
+        argon2__type="ID",
+        argon2__rounds=policy.argon2_time_cost,
+        argon2__memory_cost=policy.argon2_memory_kib,
+        argon2__parallelism=policy.argon2_parallelism,
+    )
+
+
+def _hash(password: str, policy: HashPolicy) -> str:
+    return _context(policy).hash(password)
+
+
+def _verify(password: str, hashed_password: str, policy: HashPolicy) -> bool:
+    return _context(policy).verify(password, hashed_password)
+
+
+def _below_policy(hashed_password: str, policy: HashPolicy) -> bool:
+    """True if the hash uses another scheme than the policy, or a lower cost"""
+    scheme = _context(policy).identify(hashed_password)
+    if scheme != policy.scheme:
+        return True
+    if scheme == "bcrypt":
+        return bcrypt.from_string(hashed_password).rounds < policy.bcrypt_rounds
+    parsed = argon2.from_string(hashed_password)
+    return parsed.rounds < policy.argon2_time_cost or parsed.memory_cost < policy.argon2_memory_kib
+
+
+def _verify_and_update(password: str, hashed_password: str, policy: HashPolicy) -> Tuple[bool, Optional[str]]:
+    """Verify, and rehash under policy only if the stored hash is weaker (never downgrade)"""
+    if not _verify(password, hashed_password, policy):
+        return False, None
+    return True, _hash(password, policy) if _below_policy(hashed_password, policy) else None
+
+
+# --- Calibration ---
+
+def _time_hash(policy: HashPolicy, samples: int = 2) -> float:
+    """Best-of-n seconds for one hash under policy on this machine"""
+    context = _context(policy)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibration-password")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate(target_ms: float, base: Optional[HashPolicy] = None) -> HashPolicy:
+    """
+    Pick the strongest cost whose hash time stays within target_ms here.
+    bcrypt cost doubles per round, so one measurement at a low cost is extrapolated;
+    argon2id keeps its memory profile and raises time_cost step by step.
+    """
+    base = base or HashPolicy()
+    target = target_ms / 1000
+    if base.scheme == "argon2":
+        time_cost = 1
+        while time_cost < 10 and _time_hash(base._replace(argon2_time_cost=time_cost + 1)) <= target:
+            time_cost += 1
+        return base._replace(argon2_time_cost=time_cost)
+
+    min_rounds, max_rounds = 10, 16
+    base_time = _time_hash(base._replace(bcrypt_rounds=min_rounds))
+    rounds = min_rounds
+    while rounds < max_rounds and base_time * 2 ** (rounds + 1 - min_rounds) <= target:
+        rounds += 1
+    # Extrapolation can overshoot on noisy machines; confirm and step down once if needed
+    if rounds > min_rounds and _time_hash(base._replace(bcrypt_rounds=rounds), samples=1) > target * 1.25:
+        rounds -= 1
+    return base._replace(bcrypt_rounds=rounds)
+
+
+# --- Pool ---
+
+def _default_mode() -> str:
+    # Lambda has no /dev/shm, so process pools cannot start there; bcrypt releases
+    # the GIL, so threads still hash in parallel.
+    if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+        return "thread"
+    return "process"
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded pool"""
+
+    def __init__(
+        self,
+        policy: Optional[HashPolicy] = None,
+        mode: Optional[str] = None,
+        workers: int = 0,
+        queue_size: int = 32,
+        acquire_timeout: float = 0.5,
+    ):
+        self.policy = policy or HashPolicy()
+        self.mode = (mode or _default_mode()).lower()
+        if self.mode not in {"process", "thread", "inline"}:
+            raise ValueError(f"Unknown password hasher mode: {self.mode}")
+        self.workers = workers or os.cpu_count() or 1
+        self.acquire_timeout = acquire_timeout
+        # Running plus queued jobs; anything beyond this is rejected
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        # spawn: forking a multi-threaded server process is unsafe
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="password-hasher",
+                        )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PasswordHasherBusy("Password hashing capacity exhausted")
+        try:
+            if self.mode == "inline":
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.policy)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(_verify, password, hashed_password, self.policy)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and return a replacement hash if the stored one uses an outdated policy"""
+        return self._run(_verify_and_update, password, hashed_password, self.policy)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    """Return the process-wide hasher configured from settings"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher(
+                    policy=configured_policy(),
+                    mode=settings.PASSWORD_HASHER_MODE,
+                    workers=settings.PASSWORD_HASHER_WORKERS,
+                    queue_size=settings.PASSWORD_HASHER_QUEUE_SIZE,
+                    acquire_timeout=settings.PASSWORD_HASHER_ACQUIRE_TIMEOUT_SECONDS,
+                )
+    return _hasher
+
+
+def configured_policy() -> HashPolicy:
+    """Policy from settings"""
+    return HashPolicy(
+        scheme=settings.PASSWORD_HASH_SCHEME.lower(),
+        bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2_memory_kib=settings.PASSWORD_ARGON2_MEMORY_KIB,
+        argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+def set_hasher(hasher: Optional[PasswordHasher]) -> None:
+    """Swap the process-wide hasher (None resets to the configured default)"""
+    global _hasher
+    if _hasher is not None and _hasher is not hasher:
+        _hasher.shutdown()
+    _hasher = hasher
+
+
+if __name__ == "__main__":
+    # Deploy-time calibration, run once on the target hardware (e.g. a Lambda-sized box):
+    #   python -m app.services.password_hasher --target-ms 250
+    # and set the printed values for every host
+    parser = argparse.ArgumentParser(description="Calibrate the password hash cost for this machine")
+    parser.add_argument("--target-ms", type=float, required=True)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default=settings.PASSWORD_HASH_SCHEME.lower())
+    args = parser.parse_args()
+    chosen = calibrate(args.target_ms, configured_policy()._replace(scheme=args.scheme))
+    if chosen.scheme == "argon2":
+        print(f"PASSWORD_HASH_SCHEME=argon2\nPASSWORD_ARGON2_TIME_COST={chosen.argon2_time_cost}")
+    else:
+        print(f"PASSWORD_HASH_SCHEME=bcrypt\nPASSWORD_BCRYPT_ROUNDS={chosen.bcrypt_rounds}")
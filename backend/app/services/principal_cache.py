@@ -0,0 +1,82 @@
+"""
+Short-lived cache of authenticated user snapshots.
+
+get_current_user runs on every authenticated request; caching the few fields
+authorization needs (id, role, is_active, is_invited) removes a users row fetch
+from each of them. Entries are dropped on user update, delete and password
+change; AUTH_PRINCIPAL_CACHE_TTL_SECONDS bounds staleness across processes.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from ..config import settings
+from ..db.models import UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight snapshot of the authenticated user"""
+    user_id: uuid.UUID
+    email: str
+    role: UserRole
+    is_active: bool
+    is_invited: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            user_id=user.user_id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            is_invited=user.is_invited,
+        )
+
+
+class PrincipalCache:
+    """Thread-safe LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.maxsize <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.user_id] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(principal.user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,287 @@
+"""
+Pluggable clients for the external services: S3, SES and Stripe.
+
+Settings pick the implementation, so the upload, email and payment paths can run
+(and be load-tested) offline:
+- S3_PROVIDER / SES_PROVIDER: "aws" (default), "moto" (moto's in-process AWS;
+  needs `pip install "moto[s3,ses]"`) or "fake" (the in-memory fakes below)
+- STRIPE_PROVIDER: "stripe" (default) or "fake": the recorded checkout sessions
+  in STRIPE_FIXTURES_DIR (benchmarks/fixtures/stripe by default), answering any
+  other session id with a paid one-unit order
+
+The stand-ins can be made slow and unreliable: every network call waits
+PROVIDER_LATENCY_MS (+- PROVIDER_LATENCY_JITTER_MS), and PROVIDER_ERROR_RATE of
+calls raise what the real client would (a botocore ClientError, a
+stripe.APIConnectionError). Real providers are never wrapped.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote, urlencode
+
+import boto3
+import stripe
+from botocore.exceptions import ClientError
+
+from ..config import settings
+from .stripe_gateway import StripeApiGateway, StubStripeGateway
+
+DEFAULT_STRIPE_FIXTURES_DIR = Path(__file__).resolve().parents[2] / "benchmarks" / "fixtures" / "stripe"
+
+# Client methods that are computed locally by the real SDKs, so get no injected latency or errors
+_LOCAL_METHODS = frozenset({"generate_presigned_url", "generate_presigned_post", "can_paginate", "get_paginator", "get_waiter"})
+
+
+# --- Latency and error injection ---
+
+class FaultInjector:
+    """Delays calls and fails a fraction of them; counts both per operation"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "FaultInjector":
+        return cls(settings.PROVIDER_LATENCY_MS, settings.PROVIDER_LATENCY_JITTER_MS, settings.PROVIDER_ERROR_RATE)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.latency_ms or self.jitter_ms or self.error_rate)
+
+    def __call__(self, operation: str, error_factory: Callable[[str], Exception]) -> None:
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._rng.random() < self.error_rate
+            self.calls[operation] += 1
+            if fail:
+                self.errors[operation] += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise error_factory(operation)
+
+
+def aws_error(operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": "ServiceUnavailable", "Message": "Injected failure"}}, operation)
+
+
+def stripe_error(operation: str) -> Exception:
+    return stripe.APIConnectionError(f"Injected failure in {operation}")
+
+
+class InjectedClient:
+    """Proxy that runs a FaultInjector before each network call of a client"""
+
+    def __init__(self, client, injector: FaultInjector, error_factory: Callable[[str], Exception]):
+        self._client = client
+        self._injector = injector
+        self._error_factory = error_factory
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or name in _LOCAL_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._injector(name, self._error_factory)
+            return attr(*args, **kwargs)
+        return call
+
+
+def _with_faults(client, error_factory: Callable[[str], Exception]):
+    injector = FaultInjector.from_settings()
+    return InjectedClient(client, injector, error_factory) if injector.enabled else client
+
+
+# --- In-memory fakes ---
+
+def _no_such_upload(operation: str, upload_id: str) -> ClientError:
+    return ClientError({"Error": {"Code": "NoSuchUpload", "Message": f"Upload {upload_id} does not exist"}}, operation)
+
+
+class FakeS3Client:
+    """In-memory stand-in for the S3 calls the upload routes make"""
+
+    def __init__(self):
+        self.objects = {}  # (bucket, key) -> {"ETag", "Metadata", "ContentType", "Size"}
+        self.uploads = {}  # upload_id -> (bucket, key, metadata, content_type)
+        self._lock = threading.Lock()
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, HttpMethod=None) -> str:
+        params = Params or {}
+        query = {"X-Fake-Method": ClientMethod, "X-Fake-Expires": ExpiresIn}
+        if "UploadId" in params:
+            query["uploadId"] = params["UploadId"]
+        if "PartNumber" in params:
+            query["partNumber"] = params["PartNumber"]
+        return f"https://{params.get('Bucket', 'bucket')}.s3.fake.local/{quote(params.get('Key', ''))}?{urlencode(query)}"
+
+    def put_object(self, Bucket, Key, Body=b"", ContentType=None, Metadata=None, **kwargs) -> dict:
+        body = Body.encode() if isinstance(Body, str) else (Body or b"")
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self.objects[(Bucket, Key)] = {"ETag": etag, "Metadata": Metadata or {}, "ContentType": ContentType, "Size": len(body)}
+        return {"ETag": etag}
+
+    def head_object(self, Bucket, Key, **kwargs) -> dict:
+        with self._lock:
+            found = self.objects.get((Bucket, Key))
+        if found is None:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {"ETag": found["ETag"], "ContentLength": found["Size"], "ContentType": found["ContentType"], "Metadata": found["Metadata"]}
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, Metadata=None, **kwargs) -> dict:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = (Bucket, Key, Metadata or {}, ContentType)
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload=None, **kwargs) -> dict:
+        with self._lock:
+            upload = self.uploads.pop(UploadId, None)
+            if upload is None:
+                raise _no_such_upload("CompleteMultipartUpload", UploadId)
+            parts = (MultipartUpload or {}).get("Parts", [])
+            etag = f'"{hashlib.md5(f"{Bucket}/{Key}/{UploadId}".encode()).hexdigest()}-{len(parts)}"'
+            self.objects[(Bucket, Key)] = {"ETag": etag, "Metadata": upload[2], "ContentType": upload[3], "Size": None}
+        return {"Location": f"https://{Bucket}.s3.fake.local/{quote(Key)}", "Bucket": Bucket, "Key": Key, "ETag": etag}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs) -> dict:
+        with self._lock:
+            if self.uploads.pop(UploadId, None) is None:
+                raise _no_such_upload("AbortMultipartUpload", UploadId)
+        return {}
+
+
+class FakeSESClient:
+    """Accepts send_email calls, keeping a count and the most recent max_messages"""
+
+    def __init__(self, max_messages: int = 1000):
+        self.sent = deque(maxlen=max_messages)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def send_email(self, Source, Destination, Message, **kwargs) -> dict:
+        message_id = uuid.uuid4().hex
+        with self._lock:
+            self.count += 1
+            self.sent.append({"MessageId": message_id, "Source": Source, "Destination": Destination, "Message": Message})
+        return {"MessageId": message_id}
+
+
+class FakeStripeGateway(StubStripeGateway):
+    """Recorded checkout sessions with injected faults; unrecorded sessions are paid one-unit orders"""
+
+    injector: Optional[FaultInjector] = None
+
+    def retrieve_checkout_session(self, session_id: str) -> dict:
+        if self.injector is not None and self.injector.enabled:
+            self.injector("retrieve_checkout_session", stripe_error)
+        try:
+            return super().retrieve_checkout_session(session_id)
+        except LookupError:
+            return {
+                "id": session_id,
+                "object": "checkout.session",
+                "payment_status": "paid",
+                "line_items": {"object": "list", "data": [{"quantity": 1}], "has_more": False},
+            }
+
+
+# --- moto ---
+
+_moto = None
+_moto_lock = threading.Lock()
+
+
+def _moto_client(service: str):
+    global _moto
+    try:
+        from moto import mock_aws
+    except ImportError:
+        raise RuntimeError('The "moto" provider needs moto: pip install "moto[s3,ses]"')
+    with _moto_lock:
+        if _moto is None:
+            _moto = mock_aws()
+            _moto.start()
+    return boto3.client(service, region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+
+
+# --- Factories ---
+
+def build_s3_client():
+    provider = settings.S3_PROVIDER.lower()
+    if provider == "aws":
+        return boto3.client(
+            's3',
+            region_name=os.getenv('AWS_REGION', 'us-east-1'),
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+        )
+    if provider == "moto":
+        client = _moto_client("s3")
+        client.create_bucket(Bucket=os.getenv('S3_BUCKET_NAME', 'uploadz-videos'))
+    elif provider == "fake":
+        client = FakeS3Client()
+    else:
+        raise ValueError(f"Unknown S3_PROVIDER {settings.S3_PROVIDER!r}")
+    return _with_faults(client, aws_error)
+
+
+def build_ses_client():
+    provider = settings.SES_PROVIDER.lower()
+    if provider == "aws":
+        return boto3.client("ses", region_name="us-east-1", endpoint_url=settings.SES_ENDPOINT_URL)
+    if provider == "moto":
+        client = _moto_client("ses")
+        if settings.SES_FROM_EMAIL:
+            client.verify_email_identity(EmailAddress=settings.SES_FROM_EMAIL)
+    elif provider == "fake":
+        client = FakeSESClient()
+    else:
+        raise ValueError(f"Unknown SES_PROVIDER {settings.SES_PROVIDER!r}")
+    return _with_faults(client, aws_error)
+
+
+def build_stripe_gateway():
+    provider = settings.STRIPE_PROVIDER.lower()
+    if provider == "stripe":
+        return StripeApiGateway()
+    if provider != "fake":
+        raise ValueError(f"Unknown STRIPE_PROVIDER {settings.STRIPE_PROVIDER!r}")
+    directory = Path(settings.STRIPE_FIXTURES_DIR) if settings.STRIPE_FIXTURES_DIR else DEFAULT_STRIPE_FIXTURES_DIR
+    gateway = FakeStripeGateway.from_fixtures(directory)
+    gateway.injector = FaultInjector.from_settings()
+    return gateway
+
+
+_s3_client = None
+_s3_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Shared S3 client for the configured provider (boto3 clients are thread-safe)"""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_lock:
+            if _s3_client is None:
+                _s3_client = build_s3_client()
+    return _s3_client
+
+
+def set_s3_client(client) -> None:
+    """Replace the shared S3 client (tests, benchmarks); None rebuilds it from settings"""
+    global _s3_client
+    _s3_client = client
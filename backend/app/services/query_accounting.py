@@ -0,0 +1,130 @@
+"""
+Query accounting: statement counts and repeated SQL per request.
+
+Hidden lazy loads and refreshes show up as many executions of the same SQL
+(N+1). With accounting enabled (by default in development), every request is
+counted. Requests past QUERY_COUNT_WARN_THRESHOLD statements, or repeating a
+statement QUERY_DUPLICATE_WARN_THRESHOLD times, are logged with the offending SQL.
+Responses also carry an X-Query-Count header.
+
+count_queries() counts process-wide, across threads; tests use it (through the
+query_budget fixture) to pin the number of queries a route may issue.
+"""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+
+from ..config import settings
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and expanded IN lists so repeated statements compare equal"""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryCounter:
+    """Statements executed while the counter was active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        normalized = normalize_sql(statement)
+        with self._lock:
+            self.statements.append(normalized)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self, minimum: int = 2) -> List[tuple]:
+        """(statement, executions) for statements run at least minimum times, most repeated first"""
+        return [(sql, n) for sql, n in Counter(self.statements).most_common() if n >= minimum]
+
+    def report(self, limit: int = 5) -> str:
+        lines = [f"{self.count} statements"]
+        for sql, n in self.duplicates()[:limit]:
+            lines.append(f"  {n}x {sql[:200]}")
+        return "\n".join(lines)
+
+
+_request_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+_global_counters: List[QueryCounter] = []
+_global_lock = threading.Lock()
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count every statement executed in this process while the block runs"""
+    counter = QueryCounter()
+    with _global_lock:
+        _global_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _global_lock:
+            _global_counters.remove(counter)
+
+
+def install(engine) -> None:
+    """Feed statements executed on engine to the active counters"""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter = _request_counter.get()
+        if counter is not None:
+            counter.record(statement)
+        if _global_counters:
+            for global_counter in list(_global_counters):
+                global_counter.record(statement)
+
+
+def enabled() -> bool:
+    if settings.QUERY_ACCOUNTING_ENABLED is not None:
+        return settings.QUERY_ACCOUNTING_ENABLED
+    return settings.ENV.lower() in {"development", "dev", "local", "test"}
+
+
+class QueryAccountingMiddleware:
+    """Pure ASGI middleware counting statements per request (no-op unless enabled)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = enabled()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        counter = QueryCounter()
+        token = _request_counter.set(counter)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(counter.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_counter.reset(token)
+            self._warn(scope, counter)
+
+    @staticmethod
+    def _warn(scope, counter: QueryCounter) -> None:
+        repeated = counter.duplicates(minimum=settings.QUERY_DUPLICATE_WARN_THRESHOLD)
+        if counter.count <= settings.QUERY_COUNT_WARN_THRESHOLD and not repeated:
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        print(f"[query-accounting] {scope['method']} {route}: {counter.report()}")
@@ -0,0 +1,271 @@
+"""
+Token-bucket rate limiting for unauthenticated, expensive endpoints.
+
+RateLimitMiddleware runs before routing, dependency injection and the database
+session, so a rejected request costs a dict lookup (or one Redis round trip)
+instead of a bcrypt verify. Buckets live in a process-local store by default;
+set RATE_LIMIT_REDIS_URL to share them across processes (any redis-py compatible
+client works, including a local fake).
+
+Limits are "burst/seconds" strings: a bucket holds `burst` tokens and refills
+completely over `seconds`. An empty string disables that limit.
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from ..config import settings
+
+
+def parse_limit(spec: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse "burst/seconds" into (capacity, tokens per second); None when disabled"""
+    if not spec:
+        return None
+    burst, seconds = spec.split("/", 1)
+    capacity = float(burst)
+    return capacity, capacity / float(seconds)
+
+
+class MemoryBucketStore:
+    """Process-local buckets, bounded to max_keys (least recently used are evicted)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take cost tokens; returns (allowed, seconds until enough tokens are available)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [capacity, now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (cost - tokens) / rate
+
+
+# Refill and take atomically, using the server clock so processes agree on time
+_CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Shared buckets over any redis-py compatible client"""
+
+    def __init__(self, client, prefix: str = "efference:rate-limit"):
+        self._prefix = prefix
+        self._consume = client.register_script(_CONSUME_SCRIPT)
+
+    def consume(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, retry_after = self._consume(keys=[f"{self._prefix}:{key}"], args=[capacity, rate, cost])
+        if isinstance(retry_after, bytes):
+            retry_after = retry_after.decode()
+        return bool(int(allowed)), float(retry_after)
+
+
+@dataclass
+class RateLimitRule:
+    """Limits for one route; path may contain {param} placeholders"""
+    name: str
+    method: str
+    path: str
+    per_ip: Optional[str] = None
+    per_email: Optional[str] = None
+    _pattern: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.method = self.method.upper()
+        self._pattern = re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", self.path) + "/?$")
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == self.method and self._pattern.match(path) is not None
+
+
+def default_rules() -> List[RateLimitRule]:
+    """Per-route limits from settings"""
+    return [
+        RateLimitRule(
+            name="login",
+            method="POST",
+            path="/auth/login",
+            per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+            per_email=settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+        ),
+        RateLimitRule(
+            name="invitation-validate",
+            method="GET",
+            path="/invitations/validate/{invitation_code}",
+            per_ip=settings.RATE_LIMIT_INVITATION_VALIDATE_PER_IP,
+        ),
+    ]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the configured bucket store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.RATE_LIMIT_REDIS_URL:
+                    from .redis_client import get_redis
+                    _store = RedisBucketStore(get_redis(settings.RATE_LIMIT_REDIS_URL))
+                else:
+                    _store = MemoryBucketStore()
+    return _store
+
+
+def set_store(store) -> None:
+    """Swap the bucket store, e.g. for a Redis fake (None resets to the configured default)"""
+    global _store
+    _store = store
+
+
+# Login bodies are tiny; anything larger is passed through without an email key
+_MAX_BUFFERED_BODY = 64 * 1024
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware enforcing RateLimitRules before the request reaches FastAPI"""
+
+    def __init__(self, app, rules: Optional[List[RateLimitRule]] = None, store=None):
+        self.app = app
+        self.rules = rules if rules is not None else default_rules()
+        self._store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        rule = next((r for r in self.rules if r.matches(scope["method"], path)), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        limits = []
+        ip_limit = parse_limit(rule.per_ip)
+        if ip_limit:
+            limits.append((f"{rule.name}:ip:{self._client_ip(scope)}", ip_limit))
+        email_limit = parse_limit(rule.per_email)
+        if email_limit:
+            receive, email = await self._peek_email(receive)
+            if email:
+                digest = hashlib.blake2b(email.encode(), digest_size=12).hexdigest()
+                limits.append((f"{rule.name}:email:{digest}", email_limit))
+
+        store = self._store or get_store()
+        for key, (capacity, rate) in limits:
+            try:
+                allowed, retry_after = store.consume(key, capacity, rate)
+            except Exception as e:
+                # Fail open: a limiter outage must not take logins down with it
+                print(f"Rate limiter unavailable: {e}")
+                break
+            if not allowed:
+                await self._reject(send, retry_after)
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _client_ip(scope) -> str:
+        if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _peek_email(receive):
+        """Buffer the body to read its email, and return a receive that replays it"""
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Client went away; hand the message on unchanged
+                return _replay([message], receive), None
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            more_body = message.get("more_body", False)
+            if size > _MAX_BUFFERED_BODY:
+                break
+        body = b"".join(chunks)
+        replayed = [{"type": "http.request", "body": body, "more_body": more_body}]
+        if more_body:
+            return _replay(replayed, receive), None
+        try:
+            email = json.loads(body).get("email")
+        except (ValueError, AttributeError):
+            email = None
+        return _replay(replayed, receive), email.strip().lower() if isinstance(email, str) else None
+
+    @staticmethod
+    async def _reject(send, retry_after: float) -> None:
+        body = b'{"detail":"Too many requests, please retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _replay(messages: list, receive):
+    pending = list(messages)
+
+    async def replay_receive():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay_receive
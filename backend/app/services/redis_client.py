@@ -0,0 +1,17 @@
+"""
+Optional shared Redis-compatible client.
+
+Caches and limiters that can share state across processes accept any client with
+the redis-py interface, so a local fake (e.g. fakeredis) can stand in for a server.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_redis(url: str):
+    """Return a redis-py client for url, shared per URL"""
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("The 'redis' package is required when a Redis URL is configured") from e
+    return redis.Redis.from_url(url)
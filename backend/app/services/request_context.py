@@ -0,0 +1,44 @@
+"""
+Per-request context shared by middleware and database instrumentation.
+
+The context is stored in a ContextVar, which Starlette copies into the worker
+threads that run sync endpoints, so SQLAlchemy event hooks can attribute work to
+the request that triggered it.
+"""
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RequestContext:
+    """Timing and database usage of the request being served"""
+    method: str
+    path: str
+    scope: dict = field(repr=False, default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    db_time: float = 0.0
+    db_statements: int = 0
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. /sessions/{session_id}) once the router has matched, else "unmatched" """
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_current() -> Optional[RequestContext]:
+    """The context of the request being served, or None outside requests"""
+    return _current.get()
+
+
+def activate(context: RequestContext) -> Token:
+    return _current.set(context)
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
@@ -0,0 +1,108 @@
+"""
+Fast JSON rendering for API routes.
+
+By default FastAPI validates an endpoint's return value against response_model,
+dumps it to Python primitives and then encodes those with json.dumps. FastJSONRoute
+goes from the return value (ORM objects, dicts or schema instances) to JSON bytes
+in one pydantic-core pass, using a TypeAdapter built once per route. When the
+endpoint already returns instances of the response schema, validation is skipped.
+Responses from routes without a response_model use ORJSONResponse, which the app
+sets as its default response class.
+"""
+import functools
+import inspect
+from typing import Any, List, get_args, get_origin
+
+from fastapi import Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+def _is_schema_instance(value: Any, response_model: Any) -> bool:
+    """True when value already is response_model (or a list of it), so validation is redundant"""
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return isinstance(value, response_model)
+    if get_origin(response_model) in (list, List):
+        (item_model,) = get_args(response_model) or (Any,)
+        return (
+            isinstance(item_model, type)
+            and issubclass(item_model, BaseModel)
+            and isinstance(value, list)
+            and all(isinstance(item, item_model) for item in value)
+        )
+    return False
+
+
+class FastJSONRoute(APIRoute):
+    """APIRoute that renders response_model output straight to JSON bytes"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        self.fast_json = False
+        self._adapter = None
+        super().__init__(path, self._wrap_endpoint(endpoint), **kwargs)
+        # Keep the undecorated endpoint so include_router re-wraps the original
+        self.endpoint = endpoint
+        self.fast_json = (
+            self.response_model is not None
+            and not (
+                self.response_model_include
+                or self.response_model_exclude
+                or self.response_model_exclude_unset
+                or self.response_model_exclude_defaults
+                or self.response_model_exclude_none
+            )
+        )
+        if self.fast_json:
+            self._adapter = TypeAdapter(self.response_model)
+
+    def _wrap_endpoint(self, endpoint):
+        signature = inspect.signature(endpoint)
+        response_param = next(
+            (name for name, p in signature.parameters.items()
+             if isinstance(p.annotation, type) and issubclass(p.annotation, Response)),
+            None,
+        )
+        # The sub-response carries headers and status set by the endpoint
+        # (e.g. ETags); request one if the endpoint doesn't already
+        injected = response_param is None
+        if injected:
+            response_param = "fast_json_response"
+            signature = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(response_param, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+            ])
+
+        def split(kwargs):
+            return kwargs.pop(response_param) if injected else kwargs[response_param]
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapped(**kwargs):
+                sub_response = split(kwargs)
+                return self.render(await endpoint(**kwargs), sub_response)
+        else:
+            @functools.wraps(endpoint)
+            def wrapped(**kwargs):
+                sub_response = split(kwargs)
+                return self.render(endpoint(**kwargs), sub_response)
+
+        wrapped.__signature__ = signature
+        return wrapped
+
+    def render(self, content: Any, sub_response: Response) -> Any:
+        """Serialize an endpoint's return value; anything not handled falls back to FastAPI"""
+        if not self.fast_json or isinstance(content, Response):
+            return content
+        if not _is_schema_instance(content, self.response_model):
+            try:
+                content = self._adapter.validate_python(content, from_attributes=True)
+            except ValidationError as e:
+                raise ResponseValidationError(errors=e.errors(include_url=False), body=content)
+        response = Response(
+            content=self._adapter.dump_json(content, by_alias=self.response_model_by_alias),
+            status_code=sub_response.status_code or self.status_code or 200,
+            media_type="application/json",
+        )
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
@@ -4,7 +4,7 @@ These schemas define the shape of data coming into and going out of the API.
 """
 import uuid
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List, Dict
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from ..db.models import UserRole, VideoSessionStatus, ReviewStatus, ProcessingJobStatus, InvitationStatus, TaskApplicationStatus, TaskRequestStatus, Sex
 
@@ -124,6 +124,25 @@ class InvitationWithInviter(Invitation):
     invited_by: User
 
 
+class InvitationBulkCreate(BaseSchema):
+    """Invite many emails at once, optionally emailing the codes right away"""
+    invitations: List[InvitationCreate] = Field(..., min_length=1, max_length=1000)
+    send: bool = True
+
+
+class InvitationBulkSkip(BaseSchema):
+    """An email that wasn't invited, and why"""
+    email: EmailStr
+    reason: str
+
+
+class InvitationBulkResult(BaseSchema):
+    """Invitations created, emails skipped, and how many invitation emails were queued"""
+    created: List[Invitation]
+    skipped: List[InvitationBulkSkip]
+    queued: int = 0
+
+
 # --- Task Schemas ---
 
 class TaskBase(BaseSchema):
@@ -178,6 +197,18 @@ class TaskAssignment(TaskAssignmentBase):
     user: Optional[User] = None
 
 
+class TaskAssignmentBulkCreate(BaseSchema):
+    """Assign one task to many workers"""
+    user_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskAssignmentBulkResult(BaseSchema):
+    """Workers newly assigned, already assigned, and rejected (missing or not workers)"""
+    assigned: List[uuid.UUID]
+    already_assigned: List[uuid.UUID]
+    rejected: List[uuid.UUID]
+
+
 # --- Task Application Schemas ---
 
 class TaskApplicationBase(BaseSchema):
@@ -202,6 +233,19 @@ class TaskApplication(TaskApplicationBase):
     user: Optional[User] = None
 
 
+class TaskApplicationBulkDecision(BaseSchema):
+    """Approve or reject many applications at once"""
+    application_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=1000)
+    approve: bool
+
+
+class TaskApplicationBulkDecisionResult(BaseSchema):
+    """Which applications were decided, which were skipped (missing or already decided), and which requests got assigned"""
+    decided: List[uuid.UUID]
+    skipped: List[uuid.UUID]
+    assigned_request_ids: List[uuid.UUID]
+
+
 # --- Task Request Schemas ---
 
 class TaskRequestBase(BaseSchema):
@@ -296,6 +340,7 @@ class VideoSession(VideoSessionBase):
     uploaded_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    version: int = 1
     creator: Optional[User] = None
     task: Optional[Task] = None
     reviewer: Optional[User] = None
@@ -308,6 +353,23 @@ class VideoSessionWithDetails(VideoSession):
     review: Optional["Review"] = None
 
 
+class VideoSessionTransitionRequest(BaseSchema):
+    """Bulk status transition request, e.g. from a processing callback"""
+    session_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=1000)
+    from_status: VideoSessionStatus
+    to_status: VideoSessionStatus
+    # Optional optimistic concurrency check: only move sessions still at these versions
+    expected_versions: Optional[Dict[uuid.UUID, int]] = None
+
+
+class VideoSessionTransitionResult(BaseSchema):
+    """Which sessions moved and which were skipped by a bulk transition"""
+    from_status: VideoSessionStatus
+    to_status: VideoSessionStatus
+    moved: List[uuid.UUID]
+    skipped: List[uuid.UUID]
+
+
 # --- Raw Clip Schemas ---
 
 class RawClipBase(BaseSchema):
@@ -400,12 +462,21 @@ class Token(BaseSchema):
     """JWT token response schema"""
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseSchema):
+    """Refresh token exchange / logout schema"""
+    refresh_token: str
 
 
 class TokenData(BaseSchema):
     """Token payload data"""
     user_id: Optional[uuid.UUID] = None
     email: Optional[str] = None
+    jti: Optional[str] = None
+    expires_at: Optional[datetime] = None
 
 
 class LoginRequest(BaseSchema):
@@ -474,6 +545,21 @@ class UploadCompleteRequest(BaseSchema):
     filesize_bytes: Optional[int] = None
 
 
+# --- Admin Schemas ---
+
+class SlowQuery(BaseSchema):
+    """A statement recorded by the slow-query log"""
+    query_id: uuid.UUID
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any = None
+    route: Optional[str] = None
+    caller: Optional[str] = None
+    plan: Optional[str] = None
+    explain_error: Optional[str] = None
+
+
 # Forward references for relationships
 TaskWithAssignments.model_rebuild()
 VideoSessionWithDetails.model_rebuild()
\ No newline at end of file
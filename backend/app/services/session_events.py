@@ -0,0 +1,262 @@
+"""
+Publish/subscribe for video session status changes.
+
+The in-process broker fans events out to Server-Sent Events subscribers
+(`GET /sessions/events`). When SESSION_EVENTS_BACKEND is "postgres", events are
+published with pg_notify and a listener thread relays them into the local broker,
+so every API process sees transitions made by every other process.
+"""
+import asyncio
+import json
+import select
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..db.models import VideoSessionStatus
+
+
+@dataclass
+class SessionEvent:
+    """A single status change of a video session"""
+    session_id: uuid.UUID
+    status: VideoSessionStatus
+    creator_id: Optional[uuid.UUID] = None
+    reviewer_id: Optional[uuid.UUID] = None
+    task_id: Optional[uuid.UUID] = None
+    previous_status: Optional[VideoSessionStatus] = None
+    version: Optional[int] = None
+    occurred_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": str(self.session_id),
+            "status": self.status.value,
+            "previous_status": self.previous_status.value if self.previous_status else None,
+            "creator_id": str(self.creator_id) if self.creator_id else None,
+            "reviewer_id": str(self.reviewer_id) if self.reviewer_id else None,
+            "task_id": str(self.task_id) if self.task_id else None,
+            "version": self.version,
+            "occurred_at": self.occurred_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionEvent":
+        def _uuid(value):
+            return uuid.UUID(value) if value else None
+
+        return cls(
+            session_id=uuid.UUID(data["session_id"]),
+            status=VideoSessionStatus(data["status"]),
+            previous_status=VideoSessionStatus(data["previous_status"]) if data.get("previous_status") else None,
+            creator_id=_uuid(data.get("creator_id")),
+            reviewer_id=_uuid(data.get("reviewer_id")),
+            task_id=_uuid(data.get("task_id")),
+            version=data.get("version"),
+            occurred_at=datetime.fromisoformat(data["occurred_at"]),
+        )
+
+    def to_sse(self) -> str:
+        """Render as a Server-Sent Events frame"""
+        event_id = f"{self.session_id}:{self.version}" if self.version is not None else str(self.session_id)
+        return f"id: {event_id}\nevent: status\ndata: {json.dumps(self.to_dict())}\n\n"
+
+
+class Subscription:
+    """A bounded per-client queue of events matching the client's filters"""
+
+    def __init__(
+        self,
+        broker: "InMemoryBroker",
+        creator_id: Optional[uuid.UUID] = None,
+        reviewer_id: Optional[uuid.UUID] = None,
+        task_id: Optional[uuid.UUID] = None,
+        max_queue: int = 256,
+    ):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.creator_id = creator_id
+        self.reviewer_id = reviewer_id
+        self.task_id = task_id
+        self.dropped = 0
+
+    def matches(self, event: SessionEvent) -> bool:
+        if self.creator_id and event.creator_id != self.creator_id:
+            return False
+        if self.reviewer_id and event.reviewer_id != self.reviewer_id:
+            return False
+        if self.task_id and event.task_id != self.task_id:
+            return False
+        return True
+
+    def offer(self, event: SessionEvent) -> None:
+        """Thread-safe enqueue; may be called from request worker threads"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop already closed; the stream is gone
+            self.close()
+
+    def _put(self, event: SessionEvent) -> None:
+        if self._queue.full():
+            # Slow consumer: drop the oldest event rather than block publishers
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[SessionEvent]:
+        """Wait up to timeout seconds for the next event; None on timeout"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """Fans events out to subscriptions in this process"""
+
+    def __init__(self):
+        self._subscriptions: set = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, **filters) -> Subscription:
+        subscription = Subscription(self, **filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: SessionEvent) -> None:
+        self.dispatch(event)
+
+    def publish_many(self, events: List[SessionEvent]) -> None:
+        for event in events:
+            self.dispatch(event)
+
+    def dispatch(self, event: SessionEvent) -> None:
+        """Deliver an event to local subscribers"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                subscription.offer(event)
+
+
+class PostgresNotifyBroker(InMemoryBroker):
+    """
+    Publishes through Postgres NOTIFY and relays LISTEN notifications to local subscribers.
+    Any Postgres reachable through DATABASE_URL works, including a local instance.
+    """
+
+    def __init__(self, engine, channel: str):
+        super().__init__()
+        self._engine = engine
+        self._channel = channel
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def publish(self, event: SessionEvent) -> None:
+        self.publish_many([event])
+
+    def publish_many(self, events: List[SessionEvent]) -> None:
+        """All events in one statement on one connection; listeners get them when it commits"""
+        if not events:
+            return
+        with self._engine.connect() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                {"channel": self._channel, "payloads": [json.dumps(event.to_dict()) for event in events]},
+            )
+            conn.commit()
+
+    def subscribe(self, **filters) -> Subscription:
+        self._ensure_listener()
+        return super().subscribe(**filters)
+
+    def _ensure_listener(self) -> None:
+        if self._listener and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="session-events-listener", daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        raw = self._engine.raw_connection()
+        # The listener owns this connection for its lifetime; keep it out of the pool
+        raw.detach()
+        try:
+            dbapi_conn = raw.driver_connection
+            dbapi_conn.autocommit = True
+            cursor = dbapi_conn.cursor()
+            cursor.execute(f'LISTEN "{self._channel}"')
+            while not self._stop.is_set():
+                if select.select([dbapi_conn], [], [], 5.0) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    notify = dbapi_conn.notifies.pop(0)
+                    try:
+                        self.dispatch(SessionEvent.from_dict(json.loads(notify.payload)))
+                    except (ValueError, KeyError) as e:
+                        print(f"Ignoring malformed session event: {e}")
+        finally:
+            raw.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_broker: Optional[InMemoryBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InMemoryBroker:
+    """Return the process-wide broker, creating it from settings on first use"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.SESSION_EVENTS_BACKEND.lower() == "postgres":
+                    from .database import engine
+                    _broker = PostgresNotifyBroker(engine, settings.SESSION_EVENTS_CHANNEL)
+                else:
+                    _broker = InMemoryBroker()
+    return _broker
+
+
+def set_broker(broker: Optional[InMemoryBroker]) -> None:
+    """Swap the process-wide broker (None resets to the configured default)"""
+    global _broker
+    _broker = broker
+
+
+def subscribe(
+    creator_id: Optional[uuid.UUID] = None,
+    reviewer_id: Optional[uuid.UUID] = None,
+    task_id: Optional[uuid.UUID] = None,
+) -> Subscription:
+    """Subscribe to status changes; must be called from the event loop"""
+    return get_broker().subscribe(creator_id=creator_id, reviewer_id=reviewer_id, task_id=task_id)
+
+
+def publish(events: Iterable[SessionEvent]) -> None:
+    """Publish events as one batch; failures are logged and never break the write path"""
+    events = list(events)
+    if not events:
+        return
+    try:
+        get_broker().publish_many(events)
+    except Exception as e:
+        print(f"Failed to publish {len(events)} session event(s): {e}")
@@ -0,0 +1,180 @@
+"""
+Video session status state machine.
+
+Encodes the legal VideoSessionStatus transitions and applies them in bulk with a
+single conditional UPDATE, so processing callbacks can move hundreds of sessions
+per call without loading them first.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import update, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..db import models
+from ..db.models import VideoSessionStatus
+from . import session_events
+
+
+# Legal transitions: UPLOADING -> PROCESSING -> PENDING_REVIEW -> APPROVED/REJECTED.
+# Any non-terminal session may fail.
+ALLOWED_TRANSITIONS: Dict[VideoSessionStatus, frozenset] = {
+    VideoSessionStatus.UPLOADING: frozenset({VideoSessionStatus.PROCESSING, VideoSessionStatus.FAILED}),
+    VideoSessionStatus.PROCESSING: frozenset({VideoSessionStatus.PENDING_REVIEW, VideoSessionStatus.FAILED}),
+    VideoSessionStatus.PENDING_REVIEW: frozenset({
+        VideoSessionStatus.APPROVED,
+        VideoSessionStatus.REJECTED,
+        VideoSessionStatus.FAILED,
+    }),
+    VideoSessionStatus.APPROVED: frozenset(),
+    VideoSessionStatus.REJECTED: frozenset(),
+    VideoSessionStatus.FAILED: frozenset(),
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when a requested status transition is not part of the state machine."""
+
+    def __init__(self, current: VideoSessionStatus, target: VideoSessionStatus):
+        self.current = current
+        self.target = target
+        super().__init__(f"Cannot transition video session from {current.value} to {target.value}")
+
+
+@dataclass
+class MovedSession:
+    """A session that was moved by a transition, as returned by the UPDATE."""
+    session_id: uuid.UUID
+    creator_id: uuid.UUID
+    reviewer_id: Optional[uuid.UUID]
+    task_id: uuid.UUID
+    version: int
+
+
+@dataclass
+class TransitionResult:
+    """Outcome of a bulk transition: which sessions moved and which were skipped."""
+    from_status: VideoSessionStatus
+    to_status: VideoSessionStatus
+    moved: List[MovedSession] = field(default_factory=list)
+    skipped: List[uuid.UUID] = field(default_factory=list)
+
+    @property
+    def moved_ids(self) -> List[uuid.UUID]:
+        return [m.session_id for m in self.moved]
+
+
+def can_transition(current: VideoSessionStatus, target: VideoSessionStatus) -> bool:
+    """Check whether current -> target is a legal transition"""
+    return target in ALLOWED_TRANSITIONS.get(current, frozenset())
+
+
+def ensure_transition(current: VideoSessionStatus, target: VideoSessionStatus) -> None:
+    """Raise InvalidTransition if current -> target is not legal"""
+    if not can_transition(current, target):
+        raise InvalidTransition(current, target)
+
+
+def bulk_transition(
+    db: Session,
+    session_ids: Iterable[uuid.UUID],
+    from_status: VideoSessionStatus,
+    to_status: VideoSessionStatus,
+    expected_versions: Optional[Dict[uuid.UUID, int]] = None,
+    extra_values: Optional[dict] = None,
+    commit: bool = True,
+) -> TransitionResult:
+    """
+    Move every session in session_ids that is currently in from_status to to_status.
+
+    Issues one `UPDATE ... WHERE session_id IN (...) AND status = :expected` and bumps
+    the version column. When expected_versions is given, only rows whose
+    (session_id, version) pair still matches are moved (optimistic concurrency).
+    Sessions that are missing, in another status or at another version are skipped.
+
+    With commit=True the moved sessions are also published as status events; callers
+    that commit themselves should pass the result to publish_events afterwards.
+    """
+    ensure_transition(from_status, to_status)
+
+    requested = list(dict.fromkeys(session_ids))
+    result = TransitionResult(from_status=from_status, to_status=to_status)
+    ids = requested
+    if not ids:
+        return result
+
+    vs = models.VideoSession
+    if expected_versions:
+        ids = [sid for sid in ids if sid in expected_versions]
+        row_filter = tuple_(vs.session_id, vs.version).in_([(sid, expected_versions[sid]) for sid in ids])
+    else:
+        row_filter = vs.session_id.in_(ids)
+
+    values = dict(extra_values or {})
+    values.update(
+        status=to_status,
+        version=vs.version + 1,
+        updated_at=datetime.now(timezone.utc),
+    )
+    stmt = (
+        update(vs)
+        .where(row_filter, vs.status == from_status)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    returned_cols = (vs.session_id, vs.creator_id, vs.reviewer_id, vs.task_id, vs.version)
+
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*returned_cols)).all()
+    else:
+        # Dialects without UPDATE ... RETURNING: lock the candidate rows first.
+        candidates = db.execute(select(*returned_cols).where(row_filter, vs.status == from_status).with_for_update()).all()
+        if candidates:
+            db.execute(stmt.where(vs.session_id.in_([c.session_id for c in candidates])))
+        rows = [(*c[:4], c.version + 1) for c in candidates]
+
+    result.moved = [MovedSession(*row) for row in rows]
+    # Sessions don't expire on commit; drop stale copies of moved rows already in this Session
+    for moved in result.moved:
+        loaded = db.identity_map.get(db.identity_key(vs, moved.session_id))
+        if loaded is not None:
+            db.expire(loaded)
+    moved_set = {m.session_id for m in result.moved}
+    result.skipped = [sid for sid in requested if sid not in moved_set]
+
+    if commit:
+        db.commit()
+        publish_events(result)
+    return result
+
+
+def publish_events(result: TransitionResult) -> None:
+    """Publish a status event for every session moved by a committed transition"""
+    session_events.publish(
+        session_events.SessionEvent(
+            session_id=moved.session_id,
+            status=result.to_status,
+            previous_status=result.from_status,
+            creator_id=moved.creator_id,
+            reviewer_id=moved.reviewer_id,
+            task_id=moved.task_id,
+            version=moved.version,
+        )
+        for moved in result.moved
+    )
+
+
+def transition(
+    db: Session,
+    session_id: uuid.UUID,
+    from_status: VideoSessionStatus,
+    to_status: VideoSessionStatus,
+    expected_version: Optional[int] = None,
+    commit: bool = True,
+) -> bool:
+    """Single-session convenience wrapper around bulk_transition. Returns True if the session moved."""
+    expected = {session_id: expected_version} if expected_version is not None else None
+    result = bulk_transition(db, [session_id], from_status, to_status, expected_versions=expected, commit=commit)
+    return bool(result.moved)
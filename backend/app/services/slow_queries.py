@@ -0,0 +1,191 @@
+"""
+Slow-query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are recorded in a bounded ring
+buffer, served at GET /admin/slow-queries. Each record holds the normalized SQL,
+redacted parameters, the route and the app function (usually a crud helper) that
+issued it, and a query plan. Plans are captured at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS for each distinct statement:
+- Postgres: EXPLAIN (ANALYZE, BUFFERS) runs on a background thread with its own
+  connection, since ANALYZE executes the query again.
+- SQLite: EXPLAIN QUERY PLAN runs inline; it doesn't execute anything.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+
+from ..config import settings
+from . import request_context
+from .query_accounting import normalize_sql
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace("\\", "/")
+_SKIPPED_FILES = ("/services/slow_queries.py", "/services/metrics.py", "/services/query_accounting.py")
+
+
+@dataclass
+class SlowQuery:
+    """One slow statement"""
+    query_id: uuid.UUID
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    route: Optional[str] = None
+    caller: Optional[str] = None
+    plan: Optional[str] = None
+    explain_error: Optional[str] = None
+
+
+def redact(parameters: Any) -> Any:
+    """Keep the shape of bound parameters but replace every value with its type"""
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f"<{type(parameters).__name__}>"
+
+
+def _find_caller() -> Optional[str]:
+    """The innermost crud function on the stack, else the innermost app frame"""
+    app_frame = None
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename.replace("\\", "/")
+        if not filename.startswith(_APP_ROOT) or filename.endswith(_SKIPPED_FILES):
+            continue
+        label = f"{filename[len(_APP_ROOT) + 1:-3].replace('/', '.')}.{frame.name}:{frame.lineno}"
+        if filename.endswith("/services/crud.py"):
+            return label
+        app_frame = app_frame or label
+    return app_frame
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus the EXPLAIN machinery"""
+
+    def __init__(self, engine, threshold_ms: float, size: int, explain: bool, explain_interval: float):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._records: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._last_explained: dict = {}
+        self._explainer: Optional[ThreadPoolExecutor] = None
+
+    def records(self, limit: Optional[int] = None) -> List[SlowQuery]:
+        """Most recent first"""
+        with self._lock:
+            items = list(reversed(self._records))
+        return items[:limit] if limit else items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._last_explained.clear()
+
+    def record(self, cursor, statement: str, parameters, duration: float, executemany: bool) -> None:
+        context = request_context.get_current()
+        normalized = normalize_sql(statement)
+        entry = SlowQuery(
+            query_id=uuid.uuid4(),
+            recorded_at=datetime.now(timezone.utc),
+            duration_ms=round(duration * 1000, 3),
+            statement=normalized,
+            parameters=redact(parameters),
+            route=f"{context.method} {context.route}" if context else None,
+            caller=_find_caller(),
+        )
+        with self._lock:
+            self._records.append(entry)
+        print(f"Slow query ({entry.duration_ms} ms) from {entry.route or '-'} / {entry.caller or '-'}: {normalized[:200]}")
+
+        if self.explain and not executemany and self._should_explain(normalized):
+            try:
+                self._explain(cursor, statement, parameters, entry)
+            except Exception as e:
+                entry.explain_error = str(e)
+
+    def _should_explain(self, normalized: str) -> bool:
+        if not normalized.lstrip().upper().startswith(("SELECT", "WITH")):
+            # ANALYZE would re-run writes
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(normalized)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._last_explained[normalized] = now
+        return True
+
+    def _explain(self, cursor, statement: str, parameters, entry: SlowQuery) -> None:
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite":
+            explain_cursor = cursor.connection.cursor()
+            try:
+                explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                entry.plan = "\n".join(" | ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+            finally:
+                explain_cursor.close()
+        elif dialect == "postgresql":
+            if self._explainer is None:
+                self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            self._explainer.submit(self._explain_postgres, statement, parameters, entry)
+
+    def _explain_postgres(self, statement: str, parameters, entry: SlowQuery) -> None:
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters or ()).fetchall()
+                conn.rollback()
+            entry.plan = "\n".join(row[0] for row in rows)
+        except Exception as e:
+            entry.explain_error = str(e)
+
+
+_log: Optional[SlowQueryLog] = None
+
+
+def get_log() -> Optional[SlowQueryLog]:
+    """The installed log, or None when slow-query logging is disabled"""
+    return _log
+
+
+def install(engine) -> Optional[SlowQueryLog]:
+    """Time every statement on engine and record the slow ones"""
+    global _log
+    if not settings.SLOW_QUERY_THRESHOLD_MS:
+        return None
+    log = SlowQueryLog(
+        engine,
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        size=settings.SLOW_QUERY_LOG_SIZE,
+        explain=settings.SLOW_QUERY_EXPLAIN,
+        explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "_slow_query_started_at", None)
+        if started_at is None:
+            return
+        duration = time.perf_counter() - started_at
+        if duration >= log.threshold:
+            log.record(cursor, statement, parameters, duration, executemany)
+
+    _log = log
+    return log
@@ -0,0 +1,208 @@
+"""
+Asynchronous processing of Stripe webhook events.
+
+POST /payments/webhook only verifies the signature and records the event
+(crud.record_stripe_event, keyed by event id, so Stripe's retries are no-ops),
+then acknowledges. process() picks recorded events up in batches, leased the same
+way as the email outbox, and runs the handler for each event type in its own
+transaction. Whatever a handler queues (e.g. an email) commits together with the
+event being marked PROCESSED. A failing event is retried with backoff until
+STRIPE_EVENTS_MAX_ATTEMPTS, then left FAILED with its error.
+
+Stripe API calls go through stripe_gateway, so recorded fixtures and a stub
+client can stand in for Stripe.
+"""
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import models
+from . import crud, email_outbox, email_templates, stripe_gateway
+from .workers import PollingWorker, backoff_seconds
+
+Event = models.StripeEvent
+
+
+@dataclass
+class ProcessResult:
+    """Events handled by one process() run"""
+    processed: int = 0
+    retrying: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.processed + self.retrying + self.failed
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# --- Handlers: fn(db, gateway, event); raise to retry, don't commit ---
+
+def handle_checkout_session_completed(db: Session, gateway, event: dict) -> None:
+    """Queue the pre-order confirmation for a paid checkout"""
+    session = event["data"]["object"]
+    customer_email = session["customer_details"]["email"]
+
+    # Check if payment was actually successful
+    if session["payment_status"] != "paid":
+        print(f"Payment not completed for {customer_email}, status: {session['payment_status']}")
+        return
+
+    # Quantity comes from the line items, which the webhook payload doesn't include
+    full_session = gateway.retrieve_checkout_session(session["id"])
+    line_items = (full_session.get("line_items") or {}).get("data") or []
+    quantity = line_items[0]["quantity"] if line_items else 1
+
+    message = email_templates.render(
+        "preorder_confirmation",
+        customer_email,
+        customer_name=session["customer_details"].get("name") or customer_email.split("@")[0],
+        amount_paid=f"${session['amount_total'] / 100:.2f}",
+        quantity=quantity,
+        unit_label="units" if quantity > 1 else "unit",
+    )
+    crud.enqueue_email(db, message, dedupe_key=f"stripe:{event['id']}:preorder-confirmation", commit=False)
+    print(f"Pre-order confirmation queued for {customer_email}")
+
+
+def handle_payment_intent_failed(db: Session, gateway, event: dict) -> None:
+    payment_intent = event["data"]["object"]
+    customer_email = payment_intent.get("receipt_email") or "unknown"
+    reason = (payment_intent.get("last_payment_error") or {}).get("message", "Unknown")
+    print(f"Payment failed for {customer_email}, reason: {reason}")
+
+
+HANDLERS: Dict[str, Callable] = {
+    "checkout.session.completed": handle_checkout_session_completed,
+    "payment_intent.payment_failed": handle_payment_intent_failed,
+}
+
+
+# --- Processing ---
+
+def claim_batch(db: Session, limit: int) -> list:
+    """Lease up to limit due events to this processor; returns (event_id, payload, attempts) rows"""
+    now = _utcnow()
+    rows = db.execute(
+        select(Event.event_id, Event.payload, Event.attempts)
+        .where(Event.status == models.StripeEventStatus.PENDING, Event.next_attempt_at <= now)
+        .order_by(Event.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        db.execute(
+            update(Event)
+            .where(Event.event_id.in_([row.event_id for row in rows]))
+            .values(next_attempt_at=now + timedelta(seconds=settings.STRIPE_EVENTS_LEASE_SECONDS), attempts=Event.attempts + 1)
+        )
+    db.commit()
+    return rows
+
+
+def process_event(db: Session, gateway, row, result: ProcessResult) -> None:
+    """Run the handler for one claimed event and record the outcome"""
+    try:
+        event = json.loads(row.payload)
+        handler = HANDLERS.get(event["type"])
+        if handler is not None:
+            handler(db, gateway, event)
+        db.execute(
+            update(Event)
+            .where(Event.event_id == row.event_id)
+            .values(status=models.StripeEventStatus.PROCESSED, processed_at=_utcnow(), last_error=None)
+        )
+        db.commit()
+        result.processed += 1
+    except Exception as e:
+        db.rollback()
+        attempts = row.attempts + 1
+        exhausted = attempts >= settings.STRIPE_EVENTS_MAX_ATTEMPTS
+        delay = 0 if exhausted else backoff_seconds(
+            attempts, settings.STRIPE_EVENTS_BACKOFF_SECONDS, settings.STRIPE_EVENTS_MAX_BACKOFF_SECONDS)
+        db.execute(
+            update(Event)
+            .where(Event.event_id == row.event_id)
+            .values(
+                status=models.StripeEventStatus.FAILED if exhausted else models.StripeEventStatus.PENDING,
+                next_attempt_at=_utcnow() + timedelta(seconds=delay),
+                last_error=f"{type(e).__name__}: {e}"[:2000],
+            )
+        )
+        db.commit()
+        if exhausted:
+            print(f"Giving up on Stripe event {row.event_id} after {attempts} attempts: {e}")
+            result.failed += 1
+        else:
+            print(f"Stripe event {row.event_id} failed (attempt {attempts}), retrying: {e}")
+            result.retrying += 1
+
+
+def process(
+    session_factory: Optional[Callable[[], Session]] = None,
+    gateway=None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> ProcessResult:
+    """Process recorded events batch by batch until none are due, max_batches ran, or time_budget (seconds) is spent"""
+    if session_factory is None:
+        from .database import SessionLocal as session_factory
+    gateway = gateway or stripe_gateway.get_gateway()
+    batch_size = batch_size or settings.STRIPE_EVENTS_BATCH_SIZE
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    result = ProcessResult()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        with session_factory() as db:
+            rows = claim_batch(db, batch_size)
+            if not rows:
+                break
+            for row in rows:
+                process_event(db, gateway, row, result)
+        batches += 1
+    if result.processed:
+        # Handlers may have queued emails
+        email_outbox.wake()
+    return result
+
+
+def _run_once(session_factory: Optional[Callable[[], Session]] = None) -> None:
+    result = process(session_factory)
+    if result.total:
+        print(f"Stripe events: {result.processed} processed, {result.retrying} retrying, {result.failed} failed")
+
+
+_worker: Optional[PollingWorker] = None
+
+
+def start_worker(session_factory: Optional[Callable[[], Session]] = None) -> PollingWorker:
+    global _worker
+    if _worker is None:
+        _worker = PollingWorker("stripe-events-worker", lambda: _run_once(session_factory), settings.STRIPE_EVENTS_POLL_SECONDS)
+    _worker.start()
+    return _worker
+
+
+def stop_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def wake() -> None:
+    """Have the in-process worker process now (call after recording an event); no-op without one"""
+    if _worker is not None:
+        _worker.wake()
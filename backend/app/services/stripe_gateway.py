@@ -0,0 +1,114 @@
+"""
+The Stripe calls the app makes, behind a small interface.
+
+StripeApiGateway talks to Stripe. StubStripeGateway answers from recorded API
+responses (see benchmarks/fixtures/stripe) so webhook handling can be exercised
+and load-tested offline. Both verify webhook signatures the same way, and
+sign_payload() builds a valid Stripe-Signature header for a recorded event.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Protocol, Union
+
+import stripe
+
+from ..config import settings
+
+
+class StripeGateway(Protocol):
+    def construct_event(self, payload: bytes, sig_header: Optional[str]) -> dict:
+        """Verify the signature and parse a webhook event (ValueError / stripe.SignatureVerificationError on failure)"""
+        ...
+
+    def retrieve_checkout_session(self, session_id: str) -> dict:
+        """A checkout session with its line_items expanded"""
+        ...
+
+
+def _verify(payload: bytes, sig_header: Optional[str], secret: Optional[str]) -> dict:
+    if not secret:
+        raise RuntimeError("Webhook secret not configured")
+    # SignatureVerificationError for a bad signature, then ValueError for a malformed payload
+    if not sig_header:
+        raise stripe.SignatureVerificationError("Missing Stripe-Signature header", sig_header, payload)
+    stripe.WebhookSignature.verify_header(payload.decode("utf-8"), sig_header, secret, tolerance=300)
+    return json.loads(payload)
+
+
+def sign_payload(payload: Union[bytes, str], secret: str, timestamp: Optional[int] = None) -> str:
+    """A Stripe-Signature header for payload, as Stripe would send it"""
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class StripeApiGateway:
+    """The real Stripe API"""
+
+    def __init__(self, api_key: Optional[str] = None, webhook_secret: Optional[str] = None):
+        self.api_key = api_key
+        self.webhook_secret = webhook_secret
+
+    def construct_event(self, payload: bytes, sig_header: Optional[str]) -> dict:
+        return _verify(payload, sig_header, self.webhook_secret or settings.STRIPE_WEBHOOK_SECRET)
+
+    def retrieve_checkout_session(self, session_id: str) -> dict:
+        api_key = self.api_key or settings.STRIPE_SECRET_KEY
+        if not api_key:
+            raise RuntimeError("Stripe secret key not configured")
+        session = stripe.checkout.Session.retrieve(session_id, expand=["line_items"], api_key=api_key)
+        return session.to_dict_recursive()
+
+
+class StubStripeGateway:
+    """Answers from recorded checkout sessions, keyed by id; records the ids it was asked for"""
+
+    def __init__(self, checkout_sessions: Optional[Dict[str, dict]] = None, webhook_secret: Optional[str] = None):
+        self.checkout_sessions = dict(checkout_sessions or {})
+        self.webhook_secret = webhook_secret
+        self.retrieved = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_fixtures(cls, directory: Union[str, Path], webhook_secret: Optional[str] = None) -> "StubStripeGateway":
+        """Load every checkout_sessions/*.json response recorded under directory"""
+        sessions = {}
+        for path in sorted(Path(directory, "checkout_sessions").glob("*.json")):
+            session = json.loads(path.read_text(encoding="utf-8"))
+            sessions[session["id"]] = session
+        return cls(sessions, webhook_secret)
+
+    def construct_event(self, payload: bytes, sig_header: Optional[str]) -> dict:
+        return _verify(payload, sig_header, self.webhook_secret or settings.STRIPE_WEBHOOK_SECRET)
+
+    def retrieve_checkout_session(self, session_id: str) -> dict:
+        with self._lock:
+            self.retrieved.append(session_id)
+        try:
+            return self.checkout_sessions[session_id]
+        except KeyError:
+            raise LookupError(f"No recorded checkout session {session_id}")
+
+
+_gateway: Optional[StripeGateway] = None
+
+
+def get_gateway() -> StripeGateway:
+    """The gateway for STRIPE_PROVIDER (see services/providers.py)"""
+    global _gateway
+    if _gateway is None:
+        from .providers import build_stripe_gateway
+        _gateway = build_stripe_gateway()
+    return _gateway
+
+
+def set_gateway(gateway: Optional[StripeGateway]) -> None:
+    """Replace the gateway (tests, offline benchmarks); None rebuilds it from settings"""
+    global _gateway
+    _gateway = gateway
@@ -0,0 +1,210 @@
+"""
+Read-through cache of the task catalog.
+
+Task templates change rarely but are read on every task page and every upload.
+Entries are keyed by a catalog version; any task write bumps the version, which
+invalidates every cached page at once without having to enumerate keys. The
+in-memory backend is per process (stale by at most TASK_CACHE_TTL_SECONDS across
+processes) and holds at most TASK_CACHE_MAX_ENTRIES pages; set TASK_CACHE_REDIS_URL
+to share the cache and its version.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from . import etags, schemas
+
+
+class MemoryCacheBackend:
+    """Process-local backend, an LRU of at most max_entries pages"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get_version(self) -> int:
+        return self._version
+
+    def bump_version(self) -> int:
+        with self._lock:
+            self._version += 1
+            # Entries of older versions are unreachable now
+            self._data.clear()
+            return self._version
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Only misses write, so sweeping expired pages here stays cheap
+            for expired in [k for k, (_, expires_at) in self._data.items() if expires_at < now]:
+                del self._data[expired]
+            self._data[key] = (value, now + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Shared backend over any redis-py compatible client"""
+
+    def __init__(self, client, prefix: str = "efference:task-catalog"):
+        self._client = client
+        self._prefix = prefix
+
+    def get_version(self) -> int:
+        value = self._client.get(f"{self._prefix}:version")
+        return int(value) if value is not None else 0
+
+    def bump_version(self) -> int:
+        return int(self._client.incr(f"{self._prefix}:version"))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(f"{self._prefix}:{key}")
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._client.set(f"{self._prefix}:{key}", value, ex=ttl)
+
+
+@dataclass
+class CachedTasks:
+    """A cached page of tasks, serialized as schemas.Task dicts"""
+    etag: str
+    items: List[dict]
+
+
+@dataclass
+class CachedTask:
+    """A single cached task, serialized as a schemas.Task dict"""
+    etag: str
+    item: dict
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the configured backend, or None when caching is disabled"""
+    global _backend
+    if not settings.TASK_CACHE_ENABLED:
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.TASK_CACHE_REDIS_URL:
+                    from .redis_client import get_redis
+                    _backend = RedisCacheBackend(get_redis(settings.TASK_CACHE_REDIS_URL))
+                else:
+                    _backend = MemoryCacheBackend(settings.TASK_CACHE_MAX_ENTRIES)
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Swap the backend, e.g. for a Redis fake (None resets to the configured default)"""
+    global _backend
+    _backend = backend
+
+
+def invalidate() -> None:
+    """Invalidate the whole catalog; called after every committed task write"""
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        backend.bump_version()
+    except Exception as e:
+        print(f"Task cache invalidation failed: {e}")
+
+
+def _read_through(key: str, load):
+    backend = get_backend()
+    if backend is None:
+        return load()
+    try:
+        versioned_key = f"v{backend.get_version()}:{key}"
+        cached = backend.get(versioned_key)
+    except Exception as e:
+        print(f"Task cache read failed: {e}")
+        return load()
+    if cached is not None:
+        return json.loads(cached)
+
+    value = load()
+    if value is not None:
+        try:
+            backend.set(versioned_key, json.dumps(value), settings.TASK_CACHE_TTL_SECONDS)
+        except Exception as e:
+            print(f"Task cache write failed: {e}")
+    return value
+
+
+def get_tasks(db: Session, skip: int = 0, limit: int = 100, created_by_id: Optional[uuid.UUID] = None) -> CachedTasks:
+    """Cached equivalent of crud.get_tasks, with the page's ETag"""
+    from . import crud
+
+    def load():
+        etag_source = crud.get_tasks_etag_source(db, skip=skip, limit=limit, created_by_id=created_by_id)
+        tasks = crud.get_tasks(db, skip=skip, limit=limit, created_by_id=created_by_id)
+        return {
+            "etag": etags.make_etag("tasks", *etag_source),
+            "items": [schemas.Task.model_validate(t).model_dump(mode="json") for t in tasks],
+        }
+
+    value = _read_through(f"list:{skip}:{limit}:{created_by_id or ''}", load)
+    return CachedTasks(etag=value["etag"], items=value["items"])
+
+
+def get_task(db: Session, task_id: uuid.UUID) -> Optional[CachedTask]:
+    """Cached equivalent of crud.get_task, with the task's ETag"""
+    from . import crud
+
+    def load():
+        etag_source = crud.get_task_etag_source(db, task_id=task_id)
+        task = crud.get_task(db, task_id=task_id) if etag_source else None
+        if task is None:
+            return None
+        return {
+            "etag": etags.make_etag("task", task_id, *etag_source),
+            "item": schemas.Task.model_validate(task).model_dump(mode="json"),
+        }
+
+    value = _read_through(f"task:{task_id}", load)
+    return CachedTask(etag=value["etag"], item=value["item"]) if value else None
+
+
+def get_default_task_id(db: Session) -> Optional[uuid.UUID]:
+    """The task used for uploads that don't name one (the oldest task in the catalog)"""
+    from . import crud
+
+    def load():
+        tasks = crud.get_tasks(db, limit=1)
+        return str(tasks[0].task_id) if tasks else None
+
+    value = _read_through("default", load)
+    return uuid.UUID(value) if value else None
@@ -0,0 +1,113 @@
+"""
+Access-token revocation list.
+
+Every authenticated request has to know whether its token was revoked. Revoked
+jtis are loaded into an in-memory bloom filter, so the common case (not revoked)
+costs a few hash probes and no query. A filter hit is confirmed against the
+revoked_tokens table, since it may be a false positive. The filter is rebuilt from
+the table every TOKEN_REVOCATION_SYNC_SECONDS to pick up other processes' revocations;
+each rebuild first deletes the rows of tokens that have expired.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over string keys"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k probes derived from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Bloom-filtered view of the revoked_tokens table"""
+
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_at: Optional[float] = None
+        # Revocations made by this process since the last rebuild started
+        self._local: set = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def _sync(self, db: Session) -> None:
+        from . import crud
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        # One thread rebuilds; the others keep using the current filter
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._local.clear()
+            try:
+                crud.purge_expired_revoked_tokens(db)
+            except Exception as e:
+                # Housekeeping only; expired rows are already ignored by the rebuild
+                db.rollback()
+                print(f"Purging expired revoked tokens failed: {e}")
+            jtis = crud.get_revoked_access_token_ids(db)
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in jtis:
+                bloom.add(jti)
+            with self._lock:
+                # Revocations committed while the query ran may be missing from it
+                for jti in self._local:
+                    bloom.add(jti)
+                self._filter = bloom
+                self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def add(self, jti: str) -> None:
+        """Record a revocation that was just committed by this process"""
+        with self._lock:
+            self._filter.add(jti)
+            self._local.add(jti)
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        from . import crud
+        self._sync(db)
+        if jti not in self._filter:
+            return False
+        return crud.is_access_token_revoked(db, jti)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._local.clear()
+            self._synced_at = None
+
+
+revocation_list = RevocationList(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+)
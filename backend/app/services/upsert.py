@@ -0,0 +1,60 @@
+"""
+Dialect-aware INSERT ... ON CONFLICT helpers for Postgres and SQLite.
+
+insert_ignore() writes many rows in one statement and skips the ones that collide
+with a unique constraint. get_or_create() returns the row for a natural key,
+inserting it when missing. Both take one statement, and neither can race a
+concurrent caller into an IntegrityError the way SELECT-then-INSERT can.
+"""
+from typing import Iterable, List, Optional, Sequence, Type
+
+from sqlalchemy.orm import Session
+
+
+def _insert(db: Session, model: Type):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return insert(model)
+
+
+def insert_ignore(
+    db: Session,
+    model: Type,
+    rows: List[dict],
+    conflict_columns: Sequence[str],
+    returning: Optional[Iterable] = None,
+) -> list:
+    """
+    Multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+    With returning (columns of model), returns those columns for the rows actually
+    inserted; rows skipped because of a conflict aren't returned.
+    """
+    if not rows:
+        return []
+    stmt = _insert(db, model).values(rows).on_conflict_do_nothing(index_elements=list(conflict_columns))
+    if returning is None:
+        db.execute(stmt)
+        return []
+    return db.execute(stmt.returning(*returning)).all()
+
+
+def get_or_create(db: Session, model: Type, values: dict, conflict_columns: Sequence[str]):
+    """
+    Insert values, or load the existing row with the same conflict_columns, as an ORM object.
+
+    On conflict the existing row gets a no-op update (a conflict column set to itself),
+    so RETURNING yields it either way and no follow-up SELECT is needed.
+    """
+    stmt = _insert(db, model).values(values)
+    key = conflict_columns[0]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={key: getattr(stmt.excluded, key)},
+    )
+    return db.scalars(stmt.returning(model), execution_options={"populate_existing": True}).one()
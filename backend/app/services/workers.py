@@ -0,0 +1,61 @@
+"""
+Background polling workers for the queue tables (email outbox, Stripe events).
+
+A PollingWorker runs a function on a daemon thread every poll_seconds, or as
+soon as wake() is called. Workers only help where the process outlives the
+request (uvicorn); on Lambda the same functions run from scheduled handlers in
+lambda_handler.py, so workers default to on everywhere except Lambda.
+"""
+import os
+import random
+import threading
+from typing import Callable, Optional
+
+
+def worker_enabled(setting: Optional[bool]) -> bool:
+    """An explicit *_WORKER_ENABLED setting, else on unless running on Lambda"""
+    if setting is not None:
+        return setting
+    return not os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Delay before the next try after `attempts` failures: exponential, capped, with +-20% jitter"""
+    return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+class PollingWorker:
+    """Daemon thread that calls run_once every poll_seconds, or sooner when woken"""
+
+    def __init__(self, name: str, run_once: Callable[[], None], poll_seconds: float):
+        self.name = name
+        self.run_once = run_once
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"{self.name} failed: {e}")
+            self._wake.wait(self.poll_seconds)
@@ -0,0 +1,116 @@
+"""
+Compression level benchmark for large JSON list responses.
+
+Builds a payload shaped like GET /sessions?limit=N and, for every available
+encoding and a range of levels, reports the compression ratio, compression
+throughput and the estimated time to first usable byte over a given link
+(compress + transfer + decompress). A streaming run compresses the same rows as
+NDJSON with a sync flush after every line, the way CompressionMiddleware handles
+streamed responses.
+
+Run from the backend directory:
+    python -m benchmarks.compression --rows 1000 --bandwidth-mbps 10
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.compression import available_encodings, brotli, make_compressor, zstandard
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 6, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+
+def make_rows(count: int) -> list:
+    statuses = ["UPLOADING", "PROCESSING", "PENDING_REVIEW", "APPROVED", "REJECTED", "FAILED"]
+    task_id = str(uuid.uuid4())
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        creator_id = str(uuid.uuid4())
+        created_at = (started + timedelta(minutes=7 * i)).isoformat()
+        rows.append({
+            "session_id": str(uuid.uuid4()),
+            "creator_id": creator_id,
+            "task_id": task_id,
+            "reviewer_id": None,
+            "status": statuses[i % len(statuses)],
+            "raw_concatenated_s3_key": f"raw/{creator_id}/session-{i}/concat.mp4",
+            "processed_1080p_s3_key": None,
+            "video_name": f"kitchen-session-{i}.mp4",
+            "user_email": f"worker{i % 97}@example.com",
+            "s3_bucket": "efference-egocentric",
+            "file_size": 1048576 * (i % 500 + 1),
+            "content_type": "video/mp4",
+            "upload_status": "completed",
+            "signature_status": "none",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "version": 1 + i % 3,
+        })
+    return rows
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def median_time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--bandwidth-mbps", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    payload = json.dumps(rows, separators=(",", ":")).encode()
+    lines = [json.dumps(row, separators=(",", ":")).encode() + b"\n" for row in rows]
+    bytes_per_second = args.bandwidth_mbps * 1_000_000 / 8
+
+    print(f"payload: {len(payload) / 1024:.1f} KiB ({args.rows} rows), link: {args.bandwidth_mbps} Mbit/s")
+    print(f"{'encoding':<10} {'level':>5} {'ratio':>7} {'MB/s':>8} {'compress':>10} {'decompress':>11} "
+          f"{'est. total':>11} {'stream ratio':>13}")
+    identity_total = len(payload) / bytes_per_second
+    print(f"{'identity':<10} {'-':>5} {1.0:>7.2f} {'-':>8} {'-':>10} {'-':>11} {identity_total * 1000:>9.1f}ms {'-':>13}")
+
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            compressed = make_compressor(encoding, level).finish(payload)
+            assert decompress(encoding, compressed) == payload
+            compress_s = median_time(lambda: make_compressor(encoding, level).finish(payload), args.repeat)
+            decompress_s = median_time(lambda: decompress(encoding, compressed), args.repeat)
+
+            streamer = make_compressor(encoding, level)
+            streamed = sum(len(streamer.compress(line)) for line in lines) + len(streamer.finish())
+
+            total = compress_s + len(compressed) / bytes_per_second + decompress_s
+            print(f"{encoding:<10} {level:>5} {len(payload) / len(compressed):>7.2f} "
+                  f"{len(payload) / compress_s / 1_000_000:>8.1f} {compress_s * 1000:>8.2f}ms "
+                  f"{decompress_s * 1000:>9.2f}ms {total * 1000:>9.1f}ms {len(payload) / streamed:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
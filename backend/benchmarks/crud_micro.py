@@ -0,0 +1,213 @@
+"""
+Microbenchmarks for the hot crud functions, across table sizes.
+
+For each dataset size (sessions; users scale along at 1 per 20 sessions) the
+database is rebuilt with app.seed_synthetic and every case is run for a number of
+rounds, each in a fresh Session like a request would get. For each case and size
+it reports the median and min time, the peak Python allocation (tracemalloc, one
+extra traced round so tracing doesn't skew the timings) and statements executed.
+
+The "growth" column is the fitted exponent of time against table size between
+the smallest and largest run: ~0 for indexed lookups, ~1 for a linear scan, and
+above 1 (marked "!") for something that degrades super-linearly.
+
+Run from the backend directory (sizes accept k/M suffixes):
+    python -m benchmarks.crud_micro --sizes 1k,100k,1M --rounds 20 --output crud.json
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+class Fixtures:
+    """Ids the cases need, picked deterministically from the seeded data"""
+
+    def __init__(self, db):
+        from sqlalchemy import func, select
+        from app.db import models
+
+        self.session_ids = db.execute(
+            select(models.VideoSession.session_id).order_by(models.VideoSession.session_id).limit(1000)
+        ).scalars().all()
+        # The most prolific creator is the worst case for per-user aggregates
+        self.top_creator_id = db.execute(
+            select(models.VideoSession.creator_id)
+            .group_by(models.VideoSession.creator_id)
+            .order_by(func.count().desc(), models.VideoSession.creator_id)
+            .limit(1)
+        ).scalar_one()
+        self.top_reviewer_id = db.execute(
+            select(models.Review.reviewer_id)
+            .group_by(models.Review.reviewer_id)
+            .order_by(func.count().desc(), models.Review.reviewer_id)
+            .limit(1)
+        ).scalar_one()
+        self.admin_id = db.execute(
+            select(models.User.user_id).where(models.User.role == models.UserRole.ADMIN).order_by(models.User.user_id).limit(1)
+        ).scalar_one()
+        self.pending_application_ids = db.execute(
+            select(models.TaskApplication.application_id)
+            .where(models.TaskApplication.status == models.TaskApplicationStatus.PENDING)
+            .order_by(models.TaskApplication.application_id)
+        ).scalars().all()
+
+
+def build_cases(fixtures: Fixtures) -> dict:
+    """name -> fn(db, round_number); mutating cases use a different row every round"""
+    from app.db import models
+    from app.services import crud, schemas
+
+    sessions = fixtures.session_ids
+
+    def create_raw_clip(db, n):
+        session_id = sessions[n % len(sessions)]
+        part_number = 100_000 + n
+        crud.create_raw_clip(db, schemas.RawClipCreate(
+            session_id=session_id,
+            s3_key=f"raw/bench/{session_id}/part-{part_number}.mp4",
+            part_number=part_number,
+            filesize_bytes=8 * 1024 * 1024,
+        ))
+
+    def decide_task_application(db, n):
+        if n >= len(fixtures.pending_application_ids):
+            raise RuntimeError("ran out of pending applications; seed more requests or lower --rounds")
+        crud.decide_task_application(db, fixtures.pending_application_ids[n], fixtures.admin_id, approve=n % 2 == 0)
+
+    return {
+        "get_video_session": lambda db, n: crud.get_video_session(db, sessions[n % len(sessions)]),
+        "get_video_sessions": lambda db, n: crud.get_video_sessions(db, limit=100),
+        "get_video_sessions(status)": lambda db, n: crud.get_video_sessions(
+            db, limit=50, status=[models.VideoSessionStatus.PENDING_REVIEW]),
+        "get_video_sessions(creator)": lambda db, n: crud.get_video_sessions(db, limit=50, creator_id=fixtures.top_creator_id),
+        "create_raw_clip": create_raw_clip,
+        "update_video_session": lambda db, n: crud.update_video_session(
+            db, sessions[n % len(sessions)], schemas.VideoSessionUpdate(video_name=f"bench-{n}.mp4")),
+        "decide_task_application": decide_task_application,
+        "get_user_statistics(worker)": lambda db, n: crud.get_user_statistics(db, fixtures.top_creator_id),
+        "get_user_statistics(reviewer)": lambda db, n: crud.get_user_statistics(db, fixtures.top_reviewer_id),
+        "get_dashboard_statistics": lambda db, n: crud.get_dashboard_statistics(db),
+    }
+
+
+def measure(session_factory, fn, rounds: int, warmup: int) -> dict:
+    from app.services.query_accounting import count_queries
+
+    def once(n):
+        db = session_factory()
+        try:
+            start = time.perf_counter()
+            fn(db, n)
+            return time.perf_counter() - start
+        finally:
+            db.close()
+
+    for n in range(warmup):
+        once(n)
+    with count_queries() as counter:
+        samples = [once(warmup + n) for n in range(rounds)]
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        once(warmup + rounds)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "peak_kib": peak / 1024,
+        "statements": counter.count / rounds,
+    }
+
+
+def growth(results: dict, name: str, sizes: list):
+    """Exponent k in time ~ size**k between the smallest and largest size"""
+    if len(sizes) < 2:
+        return None
+    first, last = results[sizes[0]][name]["median_ms"], results[sizes[-1]][name]["median_ms"]
+    if first <= 0 or last <= 0:
+        return None
+    return math.log(last / first) / math.log(sizes[-1] / sizes[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,100k,1M", help="Session counts to benchmark at")
+    parser.add_argument("--database-url", help="Scratch database (tables are dropped); default: a temporary SQLite file")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--cases", help="Comma-separated subset of cases")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+    sizes = sorted(parse_size(size) for size in args.sizes.split(","))
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='efference-bench-'), 'crud.db')}"
+    os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+    from app.db import models
+    from app.seed_synthetic import build_parser, generate
+    from app.services.database import SessionLocal, engine
+
+    results = {}
+    names = None
+    for size in sizes:
+        users = max(100, size // 20)
+        # Enough open requests that decide_task_application never runs out of pending rows
+        requests = max(users // 5, 2 * (args.rounds + args.warmup + 1))
+        seed_args = build_parser().parse_args([
+            "--users", str(users), "--sessions", str(size), "--invitations", str(users // 2),
+            "--requests", str(requests), "--seed", str(args.seed),
+        ])
+        models.Base.metadata.drop_all(bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        generate(engine, seed_args, "x" * 60)
+        print(f"\nseeded {size} sessions in {time.perf_counter() - started:.1f}s")
+
+        with SessionLocal() as db:
+            cases = build_cases(Fixtures(db))
+        names = [name.strip() for name in args.cases.split(",")] if args.cases else list(cases)
+        results[size] = {}
+        for name in names:
+            results[size][name] = r = measure(SessionLocal, cases[name], args.rounds, args.warmup)
+            print(f"  {name:<32} {r['median_ms']:>9.2f}ms  min {r['min_ms']:>8.2f}ms  "
+                  f"peak {r['peak_kib']:>9.1f}KiB  {r['statements']:>5.1f} stmts")
+
+    print(f"\n{'case':<32} " + " ".join(f"{size:>12}" for size in sizes) + f" {'growth':>8}")
+    for name in names:
+        k = growth(results, name, sizes)
+        flag = "!" if k is not None and k > 1.0 else ""
+        print(f"{name:<32} " + " ".join(f"{results[size][name]['median_ms']:>10.2f}ms" for size in sizes)
+              + (f" {k:>7.2f}{flag}" if k is not None else f" {'-':>8}"))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "dialect": engine.dialect.name,
+                "rounds": args.rounds,
+                "results": {str(size): cases for size, cases in results.items()},
+                "growth": {name: growth(results, name, sizes) for name in names},
+            }, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Login-storm benchmark for the password hashing pool.
+
+Simulates a burst of concurrent logins, each verifying a bcrypt hash from a
+request thread, and compares hasher modes. Requests rejected because the pool is
+saturated (the API's 503s) are counted separately from completed ones.
+
+Run from the backend directory:
+    python -m benchmarks.login_storm --concurrency 64 --logins 256 --modes inline,thread,process
+"""
+import argparse
+import statistics
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.password_hasher import HashPolicy, PasswordHasher, PasswordHasherBusy, _hash
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_storm(hasher: PasswordHasher, hashed: str, logins: int, concurrency: int) -> dict:
+    latencies = []
+    rejected = 0
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            ok = hasher.verify("correct horse battery", hashed)
+        except PasswordHasherBusy:
+            return None
+        assert ok
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    # The request thread pool stands in for the server's worker threads
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for result in pool.map(login, range(logins)):
+            if result is None:
+                rejected += 1
+            else:
+                latencies.append(result)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "completed": len(latencies),
+        "rejected": rejected,
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    policy = HashPolicy(bcrypt_rounds=args.rounds)
+    hashed = _hash("correct horse battery", policy)
+    print(f"{'mode':<8} {'done':>5} {'503':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for mode in args.modes.split(","):
+        hasher = PasswordHasher(
+            policy=policy,
+            mode=mode.strip(),
+            workers=args.workers,
+            queue_size=args.queue_size,
+        )
+        try:
+            # Warm the pool so process start-up isn't measured
+            hasher.verify("correct horse battery", hashed)
+            r = run_storm(hasher, hashed, args.logins, args.concurrency)
+        finally:
+            hasher.shutdown()
+        print(f"{mode:<8} {r['completed']:>5} {r['rejected']:>5} {r['throughput_per_s']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Response serialization benchmark for large list endpoints.
+
+Seeds a throwaway SQLite database and times GET /sessions?limit=1000 and
+GET /users?limit=1000 through the full ASGI stack, with FastJSONRoute's fast path
+enabled and disabled (FastAPI's validate + jsonable dump + encode). Serialization
+alone is also timed on the same rows, without the query.
+
+Run from the backend directory:
+    python -m benchmarks.serialization --rows 1000 --repeat 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+_db_file = os.path.join(tempfile.mkdtemp(prefix="efference-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+
+
+def seed(db, rows: int) -> None:
+    from app.db import models
+
+    users = [
+        models.User(
+            user_id=uuid.uuid4(),
+            name=f"Worker {i}",
+            email=f"worker{i}@example.com",
+            role=models.UserRole.WORKER,
+            hashed_password="x" * 60,
+            is_invited=True,
+            profession="Chef",
+        )
+        for i in range(rows)
+    ]
+    task = models.Task(task_id=uuid.uuid4(), title="Benchmark task", description="Seeded", created_by_id=users[0].user_id)
+    db.add_all(users + [task])
+    db.flush()
+    statuses = list(models.VideoSessionStatus)
+    db.add_all([
+        models.VideoSession(
+            creator_id=users[i].user_id,
+            task_id=task.task_id,
+            status=statuses[i % len(statuses)],
+            video_name=f"session-{i}.mp4",
+            user_email=users[i].email,
+            file_size=1024 * 1024 * (i + 1),
+            content_type="video/mp4",
+            raw_concatenated_s3_key=f"raw/{i}/concat.mp4",
+        )
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def set_fast_json(app, enabled: bool) -> None:
+    from app.services.responses import FastJSONRoute
+    for route in app.routes:
+        if isinstance(route, FastJSONRoute) and route.response_model is not None:
+            route.fast_json = enabled
+
+
+def time_requests(client, path: str, repeat: int) -> list:
+    client.get(path)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return samples
+
+
+def time_serialization(route, rows, repeat: int, fast: bool) -> list:
+    """Serialization only: the response_model path FastAPI would take vs FastJSONRoute.render"""
+    import asyncio
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if fast:
+            sub_response = Response()
+            sub_response.status_code = None
+            route.render(rows, sub_response)
+        else:
+            content = asyncio.run(serialize_response(field=route.response_field, response_content=rows))
+            JSONResponse(content)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import crud, database
+
+    database.create_tables()
+    db = database.SessionLocal()
+    seed(db, args.rows)
+    client = TestClient(app)
+
+    endpoints = [
+        ("GET /sessions", f"/sessions/?limit={args.rows}", lambda: crud.get_video_sessions(db, limit=args.rows)),
+        ("GET /users", f"/users/?limit={args.rows}", lambda: crud.get_users(db, limit=args.rows)),
+    ]
+    print(f"{'endpoint':<16} {'mode':<10} {'request p50':>12} {'request p95':>12} {'serialize p50':>14}")
+    for label, path, load in endpoints:
+        route = next(r for r in app.routes if getattr(r, "path", None) == path.split("?")[0] and "GET" in r.methods)
+        rows = load()
+        for mode, fast in (("fastapi", False), ("fast-json", True)):
+            set_fast_json(app, fast)
+            requests = time_requests(client, path, args.repeat)
+            serialize = time_serialization(route, rows, args.repeat, fast)
+            print(f"{label:<16} {mode:<10} {statistics.median(requests) * 1000:>10.1f}ms "
+                  f"{sorted(requests)[int(0.95 * (len(requests) - 1))] * 1000:>10.1f}ms "
+                  f"{statistics.median(serialize) * 1000:>12.1f}ms")
+    set_fast_json(app, True)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Shared pytest fixtures.
+"""
+import os
+from contextlib import contextmanager
+from typing import Optional
+
+# Before the app reads its settings: an in-memory database and cheap, inline hashing
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("PASSWORD_HASHER_MODE", "inline")
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4")
+# Tests drive the background queues themselves
+os.environ.setdefault("STRIPE_EVENTS_WORKER_ENABLED", "false")
+os.environ.setdefault("EMAIL_OUTBOX_WORKER_ENABLED", "false")
+
+import pytest
+
+from app.services import query_accounting
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert the number of SQL statements a block may run:
+
+        with query_budget(3):
+            client.get("/sessions/...")
+
+    max_repeats bounds how often one statement may repeat (N+1 detection).
+    """
+    @contextmanager
+    def budget(max_queries: int, max_repeats: Optional[int] = None):
+        with query_accounting.count_queries() as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"Query budget exceeded: {counter.count} > {max_queries}\n{counter.report()}"
+        )
+        if max_repeats is not None:
+            repeated = counter.duplicates(minimum=max_repeats + 1)
+            assert not repeated, f"Statement repeated more than {max_repeats} times\n{counter.report()}"
+
+    return budget
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema"""
+    from app.services import database, task_cache
+
+    database.create_tables()
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        database.Base.metadata.drop_all(bind=database.engine)
+        task_cache.set_backend(None)
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+PASSWORD = "pw123456"
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user: make_user("admin@example.com", UserRole.ADMIN)"""
+    from app.services import crud, schemas
+
+    def make(email: str, role, name: Optional[str] = None):
+        return crud.create_user(db, schemas.UserCreate(name=name or email.split("@")[0], email=email, password=PASSWORD, role=role))
+
+    return make
+
+
+@pytest.fixture
+def login(client):
+    """Log a user in and return its Authorization header"""
+    def log_in(email: str, password: str = PASSWORD) -> dict:
+        response = client.post("/auth/login", json={"email": email, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return log_in
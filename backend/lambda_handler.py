@@ -1,8 +1,31 @@
 """
 AWS Lambda handler for FastAPI application.
 """
+import time
+
 from mangum import Mangum
 from app.main import app
 
 # Create the Lambda handler
-handler = Mangum(app, lifespan="off")
\ No newline at end of file
+handler = Mangum(app, lifespan="off")
+
+
+def email_outbox_handler(event, context):
+    """
+    Scheduled background work: process recorded Stripe webhook events (which may
+    queue emails), then drain the email outbox. See services/stripe_events.py and
+    services/email_outbox.py.
+    """
+    from app.services import email_outbox, stripe_events
+
+    # Stop claiming new batches with enough time left to record the last one
+    budget = context.get_remaining_time_in_millis() / 1000 - 10 if context else None
+    started = time.monotonic()
+    events = stripe_events.process(time_budget=budget / 2 if budget else None)
+    print(f"Stripe events: {events.processed} processed, {events.retrying} retrying, {events.failed} failed")
+    result = email_outbox.dispatch(time_budget=budget - (time.monotonic() - started) if budget else None)
+    print(f"Email outbox: {result.sent} sent, {result.retrying} retrying, {result.failed} failed")
+    return {
+        "stripe_events": {"processed": events.processed, "retrying": events.retrying, "failed": events.failed},
+        "emails": {"sent": result.sent, "retrying": result.retrying, "failed": result.failed},
+    }
@@ -0,0 +1,15 @@
+-- Version counters for ETags (users, tasks) and optimistic concurrency (video_sessions).
+--
+-- create_all (database.create_tables, app.seed) creates missing tables but never adds
+-- columns to existing ones, so run this on existing Postgres databases before deploying:
+--   psql "$DATABASE_URL" -f migrations/001_version_columns.sql
+-- Safe to re-run. New tables from the same series (refresh_tokens, revoked_tokens,
+-- email_outbox, stripe_events) are created by create_all as usual.
+
+BEGIN;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE video_sessions ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+COMMIT;
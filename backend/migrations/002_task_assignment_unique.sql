@@ -0,0 +1,39 @@
+-- One TaskAssignment per (task, worker): _task_user_assignment_uc backs the
+-- INSERT ... ON CONFLICT DO NOTHING in crud.create_task_assignment,
+-- assign_task_to_workers and decide_task_applications.
+--
+-- create_all never adds constraints to existing tables, so run this on existing
+-- Postgres databases before deploying:
+--   psql "$DATABASE_URL" -f migrations/002_task_assignment_unique.sql
+-- Duplicate assignments are collapsed to the earliest one first. Safe to re-run.
+
+BEGIN;
+
+-- Keep the earliest assignment of each pair (ties broken by id)
+DELETE FROM task_assignments
+WHERE assignment_id IN (
+    SELECT assignment_id FROM (
+        SELECT assignment_id,
+               row_number() OVER (
+                   PARTITION BY task_id, user_id
+                   ORDER BY assigned_at NULLS LAST, assignment_id
+               ) AS position
+        FROM task_assignments
+    ) ranked
+    WHERE position > 1
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = '_task_user_assignment_uc'
+          AND conrelid = 'task_assignments'::regclass
+    ) THEN
+        ALTER TABLE task_assignments
+            ADD CONSTRAINT _task_user_assignment_uc UNIQUE (task_id, user_id);
+    END IF;
+END
+$$;
+
+COMMIT;
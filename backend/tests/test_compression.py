@@ -0,0 +1,68 @@
+"""
+Response compression: every response of a compressible type varies by Accept-Encoding,
+whether or not it was compressed.
+"""
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.services.compression import CompressionMiddleware
+
+BODY = "x" * 2000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=["gzip"])
+
+    @app.get("/large")
+    def large():
+        return Response(BODY, media_type="text/plain", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return Response("tiny", media_type="text/plain", headers={"Vary": "Origin"})
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\0" * 2000, media_type="image/png")
+
+    return TestClient(app)
+
+
+def test_compressed_response(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.text == BODY
+
+
+@pytest.mark.parametrize("accept", ["identity", "br", ""])
+def test_uncompressed_response_still_varies(client, accept):
+    response = client.get("/large", headers={"Accept-Encoding": accept})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"abc"'
+    assert response.content == BODY.encode()
+
+
+def test_small_response_merges_vary(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+
+
+def test_incompressible_type_is_untouched(client):
+    response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+def test_gzip_body_round_trips(client):
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).decode() == BODY
@@ -0,0 +1,110 @@
+"""
+Email outbox: leased claims, backoff into FAILED, and invitations marked SENT on delivery.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.config import settings
+from app.db import models
+from app.services import crud, email, email_outbox
+from app.services.email import EmailMessage
+from app.services.providers import FakeSESClient
+
+
+class RejectingSESClient(FakeSESClient):
+    """Rejects mail to addresses starting with reject_prefix"""
+
+    reject_prefix = "bad"
+
+    def send_email(self, Source, Destination, Message, **kwargs) -> dict:
+        if self.reject_prefix and Destination["ToAddresses"][0].startswith(self.reject_prefix):
+            raise ClientError({"Error": {"Code": "MessageRejected", "Message": "Address blacklisted"}}, "SendEmail")
+        return super().send_email(Source, Destination, Message, **kwargs)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+def ses(monkeypatch):
+    monkeypatch.setattr(settings, "SES_FROM_EMAIL", "noreply@example.com")
+    monkeypatch.setattr(settings, "SES_MAX_SEND_RATE", 0)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 60.0)
+    client = RejectingSESClient()
+    email.set_ses_client(client)
+    yield client
+    email.set_ses_client(None)
+
+
+def _make_due(db) -> None:
+    db.query(models.EmailOutbox).update({"next_attempt_at": _utcnow()})
+    db.commit()
+
+
+def test_claims_lease_rows(db):
+    crud.enqueue_emails(db, [EmailMessage(f"u{i}@example.com", "Hi", "<p>Hi</p>") for i in range(3)])
+
+    first = email_outbox.claim_batch(db, 2)
+    assert len(first) == 2
+    # Leased rows are not due again until the lease runs out
+    assert len(email_outbox.claim_batch(db, 10)) == 1
+    assert email_outbox.claim_batch(db, 10) == []
+
+    db.expire_all()
+    row = db.get(models.EmailOutbox, first[0].outbox_id)
+    assert row.attempts == 1
+    assert row.next_attempt_at > _utcnow() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS - 5)
+
+
+def test_failures_back_off_then_fail(db, ses):
+    crud.enqueue_emails(db, [EmailMessage("ok@example.com", "Hi", "<p>Hi</p>"), EmailMessage("bad@example.com", "Hi", "<p>Hi</p>")])
+
+    result = email_outbox.dispatch()
+    assert (result.sent, result.retrying, result.failed) == (1, 1, 0)
+    db.expire_all()
+    bad = db.query(models.EmailOutbox).filter_by(to_address="bad@example.com").one()
+    assert bad.status == models.EmailOutboxStatus.PENDING
+    assert bad.next_attempt_at > _utcnow() + timedelta(seconds=30)
+    assert email_outbox.dispatch().total == 0
+
+    _make_due(db)
+    assert email_outbox.dispatch().failed == 1
+    db.expire_all()
+    bad = db.get(models.EmailOutbox, bad.outbox_id)
+    assert (bad.status, bad.attempts) == (models.EmailOutboxStatus.FAILED, 2)
+    assert "MessageRejected" in bad.last_error
+    assert ses.count == 1
+
+
+def test_invitation_is_sent_only_on_delivery(client, db, ses, make_user, login):
+    make_user("admin@example.com", models.UserRole.ADMIN)
+    headers = login("admin@example.com")
+    good = client.post("/invitations/", json={"email": "new@example.com", "role": "WORKER"}, headers=headers).json()
+    bad = client.post("/invitations/", json={"email": "bad@example.com", "role": "WORKER"}, headers=headers).json()
+
+    for invitation in (good, bad):
+        assert client.post(f"/invitations/{invitation['invitation_code']}/send", headers=headers).status_code == 200
+    # Queued once per invitation
+    assert client.post(f"/invitations/{good['invitation_code']}/send", headers=headers).status_code == 409
+
+    email_outbox.dispatch()
+    _make_due(db)
+    email_outbox.dispatch()
+
+    def status_of(invitation):
+        db.expire_all()
+        return db.get(models.Invitation, uuid.UUID(invitation["invitation_id"])).status
+
+    assert status_of(good) == models.InvitationStatus.SENT
+    assert status_of(bad) == models.InvitationStatus.PENDING
+
+    # The outbox gave up on it, so it can be sent again
+    ses.reject_prefix = None
+    assert client.post(f"/invitations/{bad['invitation_code']}/send", headers=headers).status_code == 200
+    assert email_outbox.dispatch().sent == 1
+    assert status_of(bad) == models.InvitationStatus.SENT
@@ -0,0 +1,30 @@
+"""
+/metrics needs METRICS_TOKEN outside development, and is off there without one.
+"""
+import pytest
+
+from app.config import settings
+
+
+@pytest.mark.parametrize("env", ["production", "staging"])
+def test_disabled_without_token_outside_development(client, monkeypatch, env):
+    monkeypatch.setattr(settings, "ENV", env)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_open_in_development_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ENV", "development")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.parametrize("env", ["production", "development"])
+def test_token_required_when_set(client, monkeypatch, env):
+    monkeypatch.setattr(settings, "ENV", env)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
@@ -0,0 +1,78 @@
+"""
+Rehash-on-login rules: weaker hashes are upgraded, stronger ones are never downgraded.
+A saturated pool turns logins away with 503 instead of queueing them.
+"""
+import pytest
+
+from app.db.models import UserRole
+from app.services.password_hasher import HashPolicy, PasswordHasher, PasswordHasherBusy, _hash, set_hasher
+from conftest import PASSWORD
+
+
+def _hasher(**policy) -> PasswordHasher:
+    return PasswordHasher(policy=HashPolicy(**policy), mode="inline")
+
+
+def test_weaker_bcrypt_hash_is_upgraded():
+    stored = _hash("s3cret-pass", HashPolicy(bcrypt_rounds=4))
+    verified, new_hash = _hasher(bcrypt_rounds=5).verify_and_update("s3cret-pass", stored)
+    assert verified
+    assert new_hash.startswith("$2b$05$")
+
+
+def test_stronger_bcrypt_hash_is_not_downgraded():
+    stored = _hash("s3cret-pass", HashPolicy(bcrypt_rounds=6))
+    assert _hasher(bcrypt_rounds=4).verify_and_update("s3cret-pass", stored) == (True, None)
+    assert _hasher(bcrypt_rounds=6).verify_and_update("s3cret-pass", stored) == (True, None)
+
+
+def test_wrong_password_is_not_rehashed():
+    stored = _hash("s3cret-pass", HashPolicy(bcrypt_rounds=4))
+    assert _hasher(bcrypt_rounds=5).verify_and_update("wrong-pass", stored) == (False, None)
+
+
+def test_bcrypt_hash_migrates_to_argon2():
+    pytest.importorskip("argon2")
+    stored = _hash("s3cret-pass", HashPolicy(bcrypt_rounds=4))
+    policy = dict(scheme="argon2", argon2_time_cost=1, argon2_memory_kib=1024)
+    verified, new_hash = _hasher(**policy).verify_and_update("s3cret-pass", stored)
+    assert verified
+    assert new_hash.startswith("$argon2id$")
+    # Migrated once; the argon2 hash then verifies without further updates
+    assert _hasher(**policy).verify_and_update("s3cret-pass", new_hash) == (True, None)
+
+
+def test_weaker_argon2_hash_is_upgraded_and_stronger_kept():
+    pytest.importorskip("argon2")
+    weak = _hash("s3cret-pass", HashPolicy(scheme="argon2", argon2_time_cost=1, argon2_memory_kib=1024))
+    strong = _hash("s3cret-pass", HashPolicy(scheme="argon2", argon2_time_cost=3, argon2_memory_kib=2048))
+    hasher = _hasher(scheme="argon2", argon2_time_cost=2, argon2_memory_kib=2048)
+    verified, new_hash = hasher.verify_and_update("s3cret-pass", weak)
+    assert verified and "t=2" in new_hash
+    assert hasher.verify_and_update("s3cret-pass", strong) == (True, None)
+
+
+@pytest.fixture
+def one_slot_hasher():
+    hasher = PasswordHasher(policy=HashPolicy(bcrypt_rounds=4), mode="inline", workers=1, queue_size=0, acquire_timeout=0.01)
+    set_hasher(hasher)
+    yield hasher
+    set_hasher(None)
+
+
+def test_saturated_pool_sheds_logins(client, make_user, one_slot_hasher):
+    make_user("worker@example.com", UserRole.WORKER)
+    credentials = {"email": "worker@example.com", "password": PASSWORD}
+
+    # Hold the only slot, as a long-running hash would
+    assert one_slot_hasher._slots.acquire(blocking=False)
+    try:
+        response = client.post("/auth/login", json=credentials)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        with pytest.raises(PasswordHasherBusy):
+            one_slot_hasher.verify(PASSWORD, "$2b$04$" + "a" * 53)
+    finally:
+        one_slot_hasher._slots.release()
+
+    assert client.post("/auth/login", json=credentials).status_code == 200
@@ -0,0 +1,47 @@
+"""
+The principal cache serves get_current_user without a query, so every user write
+must invalidate it: a user deactivated behind the cache is rejected after the next write.
+"""
+import pytest
+
+from app.db import models
+from app.db.models import UserRole
+from app.services import crud, schemas
+from conftest import PASSWORD
+
+
+@pytest.fixture
+def user(db, make_user):
+    return make_user("worker@example.com", UserRole.WORKER)
+
+
+@pytest.fixture
+def headers(client, login, user):
+    headers = login("worker@example.com")
+    # Caches the principal
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    return headers
+
+
+def _deactivate_behind_cache(client, db, user, headers) -> None:
+    db.query(models.User).filter(models.User.user_id == user.user_id).update({"is_active": False})
+    db.commit()
+    # Still served from the cache until something invalidates it
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+
+def test_update_user_invalidates(client, db, user, headers):
+    _deactivate_behind_cache(client, db, user, headers)
+    crud.update_user(db, user.user_id, schemas.UserUpdate(name="Renamed"))
+    assert client.get("/auth/me", headers=headers).status_code == 400
+
+
+def test_update_user_password_invalidates(client, db, user, headers):
+    _deactivate_behind_cache(client, db, user, headers)
+    crud.update_user_password(db, user.user_id, schemas.UserPasswordUpdate(current_password=PASSWORD, new_password="a-new-password"))
+    assert client.get("/auth/me", headers=headers).status_code == 400
+
+
+def test_delete_user_invalidates(client, db, user, headers):
+    crud.delete_user(db, user.user_id)
+    assert client.get("/auth/me", headers=headers).status_code == 401
@@ -0,0 +1,49 @@
+"""
+Query budgets for hot routes: each is served by a fixed number of statements,
+however much related data there is.
+"""
+import pytest
+
+from app.db.models import ProcessingJobStatus, ReviewStatus, VideoSessionStatus
+from app.services import crud, schemas
+
+
+@pytest.fixture
+def video_session(db):
+    """A session with several clips and jobs, a review, and a task whose creator is embedded"""
+    admin = crud.create_user(db, schemas.UserCreate(name="Admin", email="admin@example.com", password="pw123456", role=schemas.UserRole.ADMIN))
+    worker = crud.create_user(db, schemas.UserCreate(name="Worker", email="worker@example.com", password="pw123456", role=schemas.UserRole.WORKER))
+    reviewer = crud.create_user(db, schemas.UserCreate(name="Reviewer", email="reviewer@example.com", password="pw123456", role=schemas.UserRole.REVIEWER))
+    task = crud.create_task(db, schemas.TaskCreate(title="Fold laundry", description="Fold and stack"), created_by_id=admin.user_id)
+    session = crud.create_video_session(db, schemas.VideoSessionCreate(task_id=task.task_id, reviewer_id=reviewer.user_id), creator_id=worker.user_id)
+    for part in range(1, 6):
+        crud.create_raw_clip(db, schemas.RawClipCreate(session_id=session.session_id, s3_key=f"raw/{part}.mp4", part_number=part))
+        crud.create_processing_job(db, schemas.ProcessingJobCreate(
+            session_id=session.session_id, step_function_execution_arn=f"arn:job:{part}", status=ProcessingJobStatus.SUCCEEDED))
+    crud.create_review(db, schemas.ReviewCreate(session_id=session.session_id, status=ReviewStatus.APPROVED), reviewer_id=reviewer.user_id)
+    return session
+
+
+def test_session_detail(client, query_budget, video_session):
+    url = f"/sessions/{video_session.session_id}"
+    # One version lookup for the ETag, one joined load of the session and everything it embeds
+    with query_budget(2, max_repeats=1):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()["raw_clips"]) == 5
+    assert response.json()["task"]["creator"]["name"] == "Admin"
+
+    # A revalidation costs only the version lookup
+    with query_budget(1):
+        response = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+def test_upload_complete(client, db, query_budget, video_session):
+    payload = {"session_id": str(video_session.session_id), "part_number": 6, "s3_key": "raw/6.mp4", "filesize_bytes": 1024}
+    # Load the session, touch it, insert the clip, move it to PROCESSING with a conditional UPDATE
+    with query_budget(4, max_repeats=1):
+        response = client.post("/upload/complete", json=payload)
+    assert response.status_code == 200
+    db.expire_all()
+    assert crud.get_video_session(db, video_session.session_id).status == VideoSessionStatus.PROCESSING
@@ -0,0 +1,75 @@
+"""
+Rate limits on login and invitation validation, and failing open when the store is down.
+"""
+import pytest
+
+from app.config import settings
+from app.services import rate_limit
+from app.services.rate_limit import MemoryBucketStore, parse_limit
+
+
+class BrokenStore:
+    """A bucket store whose backend is unreachable"""
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        raise ConnectionError("limiter backend unavailable")
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    rate_limit.set_store(MemoryBucketStore())
+    yield
+    rate_limit.set_store(None)
+
+
+def _burst(spec: str) -> int:
+    capacity, _ = parse_limit(spec)
+    return int(capacity)
+
+
+def _login(client, email: str, **kwargs):
+    return client.post("/auth/login", json={"email": email, "password": "wrong-password"}, **kwargs)
+
+
+def _assert_limited(response) -> None:
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_login_per_email(client, limited):
+    for _ in range(_burst(settings.RATE_LIMIT_LOGIN_PER_EMAIL)):
+        assert _login(client, "victim@example.com").status_code == 401
+
+    # Case and whitespace don't get around the limit; other accounts are unaffected
+    _assert_limited(_login(client, " Victim@Example.com "))
+    assert _login(client, "someone-else@example.com").status_code == 401
+
+
+def test_login_per_ip(client, limited, monkeypatch):
+    for i in range(_burst(settings.RATE_LIMIT_LOGIN_PER_IP)):
+        assert _login(client, f"user{i}@example.com").status_code == 401
+
+    _assert_limited(_login(client, "another@example.com"))
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", True)
+    response = _login(client, "another@example.com", headers={"X-Forwarded-For": "203.0.113.7"})
+    assert response.status_code == 401
+
+
+def test_invitation_validate_per_ip(client, limited):
+    for _ in range(_burst(settings.RATE_LIMIT_INVITATION_VALIDATE_PER_IP)):
+        assert client.get("/invitations/validate/nope").status_code != 429
+
+    _assert_limited(client.get("/invitations/validate/still-nope"))
+
+
+def test_unlimited_routes_pass_through(client, limited):
+    for _ in range(_burst(settings.RATE_LIMIT_INVITATION_VALIDATE_PER_IP) + 1):
+        assert client.get("/").status_code == 200
+
+
+def test_fails_open_when_store_errors(client, limited):
+    rate_limit.set_store(BrokenStore())
+    for _ in range(_burst(settings.RATE_LIMIT_LOGIN_PER_EMAIL) + 1):
+        assert _login(client, "victim@example.com").status_code == 401
@@ -0,0 +1,84 @@
+"""
+Video session state machine: who may move sessions, which moves are legal,
+and stale expected_versions.
+"""
+import pytest
+
+from app.db.models import UserRole, VideoSessionStatus
+from app.services import crud, schemas
+
+
+@pytest.fixture
+def sessions(db, make_user):
+    """Three UPLOADING sessions created by a worker"""
+    admin = make_user("admin@example.com", UserRole.ADMIN)
+    make_user("reviewer@example.com", UserRole.REVIEWER)
+    worker = make_user("worker@example.com", UserRole.WORKER)
+    task = crud.create_task(db, schemas.TaskCreate(title="Fold laundry", description="Fold and stack"), created_by_id=admin.user_id)
+    return [
+        crud.create_video_session(db, schemas.VideoSessionCreate(task_id=task.task_id), creator_id=worker.user_id)
+        for _ in range(3)
+    ]
+
+
+def _transition(session_ids, from_status, to_status, **extra) -> dict:
+    return {
+        "session_ids": [str(sid) for sid in session_ids],
+        "from_status": from_status.value,
+        "to_status": to_status.value,
+        **extra,
+    }
+
+
+def test_transitions_require_admin_or_reviewer(client, login, sessions):
+    body = _transition([s.session_id for s in sessions], VideoSessionStatus.UPLOADING, VideoSessionStatus.PROCESSING)
+
+    assert client.post("/sessions/transitions", json=body).status_code in (401, 403)
+    response = client.post("/sessions/transitions", json=body, headers=login("worker@example.com"))
+    assert response.status_code == 403
+
+    response = client.post("/sessions/transitions", json=body, headers=login("reviewer@example.com"))
+    assert response.status_code == 200
+    assert sorted(response.json()["moved"]) == sorted(str(s.session_id) for s in sessions)
+    assert response.json()["skipped"] == []
+
+
+def test_illegal_transition_is_rejected(client, login, sessions):
+    body = _transition([sessions[0].session_id], VideoSessionStatus.UPLOADING, VideoSessionStatus.APPROVED)
+    response = client.post("/sessions/transitions", json=body, headers=login("admin@example.com"))
+    assert response.status_code == 400
+
+
+def test_stale_expected_versions_are_skipped(client, db, login, sessions):
+    fresh, stale = sessions[0], sessions[1]
+    body = _transition(
+        [fresh.session_id, stale.session_id],
+        VideoSessionStatus.UPLOADING,
+        VideoSessionStatus.PROCESSING,
+        expected_versions={str(fresh.session_id): fresh.version, str(stale.session_id): stale.version + 1},
+    )
+    response = client.post("/sessions/transitions", json=body, headers=login("admin@example.com"))
+    assert response.status_code == 200
+    assert response.json()["moved"] == [str(fresh.session_id)]
+    assert response.json()["skipped"] == [str(stale.session_id)]
+
+    db.expire_all()
+    assert crud.get_video_session(db, stale.session_id).status == VideoSessionStatus.UPLOADING
+
+
+def test_update_goes_through_state_machine(client, db, sessions):
+    url = f"/sessions/{sessions[0].session_id}"
+    version = sessions[0].version
+
+    response = client.put(url, json={"status": VideoSessionStatus.APPROVED.value})
+    assert response.status_code == 400
+
+    response = client.put(url, json={"status": VideoSessionStatus.PROCESSING.value, "video_name": "Take 1"})
+    assert response.status_code == 200
+    assert response.json()["status"] == VideoSessionStatus.PROCESSING.value
+    assert response.json()["video_name"] == "Take 1"
+
+    db.expire_all()
+    updated = crud.get_video_session(db, sessions[0].session_id)
+    assert updated.status == VideoSessionStatus.PROCESSING
+    assert updated.version > version
@@ -0,0 +1,108 @@
+"""
+POST /payments/webhook against recorded Stripe fixtures and a stub gateway:
+the route verifies and records; stripe_events.process() does the work.
+"""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.db import models
+from app.services import stripe_events, stripe_gateway
+
+FIXTURES = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures" / "stripe"
+SECRET = "whsec_test"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+def gateway():
+    stub = stripe_gateway.StubStripeGateway.from_fixtures(FIXTURES, webhook_secret=SECRET)
+    stripe_gateway.set_gateway(stub)
+    yield stub
+    stripe_gateway.set_gateway(None)
+
+
+def _event(name: str) -> bytes:
+    return (FIXTURES / "events" / f"{name}.json").read_bytes()
+
+
+def _deliver(client, body: bytes, signature=None):
+    signature = stripe_gateway.sign_payload(body, SECRET) if signature is None else signature
+    return client.post("/payments/webhook", content=body, headers={"stripe-signature": signature})
+
+
+def test_bad_signature_is_rejected(client, db, gateway):
+    body = _event("checkout_session_completed")
+    assert _deliver(client, body, signature="t=1,v1=deadbeef").status_code == 400
+    assert _deliver(client, body, signature=stripe_gateway.sign_payload(body, "whsec_other")).status_code == 400
+    assert db.query(models.StripeEvent).count() == 0
+
+
+def test_redelivery_is_a_duplicate(client, db, gateway):
+    body = _event("checkout_session_completed")
+    assert _deliver(client, body).json() == {"status": "received"}
+    assert _deliver(client, body).json() == {"status": "duplicate"}
+    assert db.query(models.StripeEvent).count() == 1
+    # Acknowledging never calls Stripe
+    assert gateway.retrieved == []
+
+
+def test_processing_queues_one_confirmation(client, db, gateway):
+    body = _event("checkout_session_completed")
+    _deliver(client, body)
+    _deliver(client, body)
+
+    result = stripe_events.process()
+    assert (result.processed, result.retrying, result.failed) == (1, 0, 0)
+    assert stripe_events.process().total == 0
+
+    emails = db.query(models.EmailOutbox).all()
+    assert [e.to_address for e in emails] == ["buyer@example.com"]
+    assert gateway.retrieved == ["cs_test_fixturePaid"]
+    assert db.get(models.StripeEvent, json.loads(body)["id"]).status == models.StripeEventStatus.PROCESSED
+
+
+def test_gateway_errors_back_off_then_fail(client, db, gateway, monkeypatch):
+    monkeypatch.setattr(settings, "STRIPE_EVENTS_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "STRIPE_EVENTS_BACKOFF_SECONDS", 60.0)
+    event = json.loads(_event("checkout_session_completed"))
+    event["id"] = "evt_unrecorded"
+    event["data"]["object"]["id"] = "cs_unrecorded"
+    _deliver(client, json.dumps(event).encode())
+
+    assert stripe_events.process().retrying == 1
+    db.expire_all()
+    recorded = db.get(models.StripeEvent, "evt_unrecorded")
+    assert recorded.status == models.StripeEventStatus.PENDING
+    assert recorded.attempts == 1
+    assert "cs_unrecorded" in recorded.last_error
+    # Backed off: not due again yet
+    assert recorded.next_attempt_at > _utcnow()
+    assert stripe_events.process().total == 0
+
+    recorded.next_attempt_at = _utcnow()
+    db.commit()
+    assert stripe_events.process().failed == 1
+    db.expire_all()
+    assert db.get(models.StripeEvent, "evt_unrecorded").status == models.StripeEventStatus.FAILED
+    assert db.query(models.EmailOutbox).count() == 0
+
+
+def test_retry_succeeds_once_the_gateway_recovers(client, db, gateway):
+    event = json.loads(_event("checkout_session_completed"))
+    event["id"] = "evt_flaky"
+    event["data"]["object"]["id"] = "cs_flaky"
+    _deliver(client, json.dumps(event).encode())
+    assert stripe_events.process().retrying == 1
+
+    gateway.checkout_sessions["cs_flaky"] = {**gateway.checkout_sessions["cs_test_fixturePaid"], "id": "cs_flaky"}
+    db.query(models.StripeEvent).update({"next_attempt_at": _utcnow()})
+    db.commit()
+    assert stripe_events.process().processed == 1
+    assert db.query(models.EmailOutbox).count() == 1
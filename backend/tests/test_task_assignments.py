@@ -0,0 +1,82 @@
+"""
+One TaskAssignment per (task, worker): repeated decisions and bulk assigns are no-ops.
+"""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.db import models
+from app.db.models import TaskApplicationStatus, TaskRequestStatus, UserRole
+from app.services import crud, schemas
+
+
+@pytest.fixture
+def task(db, make_user):
+    admin = make_user("admin@example.com", UserRole.ADMIN)
+    return crud.create_task(db, schemas.TaskCreate(title="Fold laundry", description="Fold and stack"), created_by_id=admin.user_id)
+
+
+def _assignment_count(db, task_id) -> int:
+    return db.query(models.TaskAssignment).filter(models.TaskAssignment.task_id == task_id).count()
+
+
+def test_unique_constraint(db, make_user, task):
+    worker = make_user("worker@example.com", UserRole.WORKER)
+    db.add(models.TaskAssignment(task_id=task.task_id, user_id=worker.user_id))
+    db.commit()
+    db.add(models.TaskAssignment(task_id=task.task_id, user_id=worker.user_id))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+def test_second_decision_is_a_no_op(db, make_user, task):
+    client = make_user("client@example.com", UserRole.CLIENT)
+    first = make_user("first@example.com", UserRole.WORKER)
+    second = make_user("second@example.com", UserRole.WORKER)
+    admin = crud.get_user_by_email(db, "admin@example.com")
+    request = crud.create_task_request(db, schemas.TaskRequestCreate(task_id=task.task_id, address="1 Main St"), client_id=client.user_id)
+    applications = [
+        crud.create_task_application(db, schemas.TaskApplicationCreate(request_id=request.request_id), user_id=worker.user_id)
+        for worker in (first, second)
+    ]
+    ids = [application.application_id for application in applications]
+
+    result = crud.decide_task_applications(db, ids, admin.user_id, approve=True)
+    assert result.decided == ids
+    assert result.assigned_request_ids == [request.request_id]
+
+    again = crud.decide_task_applications(db, ids, admin.user_id, approve=True)
+    assert again.decided == []
+    assert again.skipped == ids
+    assert again.assigned_request_ids == []
+    rejected = crud.decide_task_applications(db, ids, admin.user_id, approve=False)
+    assert rejected.decided == []
+
+    db.expire_all()
+    assert all(crud.get_task_application(db, i).status == TaskApplicationStatus.APPROVED for i in ids)
+    request = crud.get_task_request(db, request.request_id)
+    assert request.status == TaskRequestStatus.ASSIGNED
+    assert request.assigned_user_id == first.user_id
+    assert _assignment_count(db, task.task_id) == 1
+
+
+def test_repeated_bulk_assign_is_a_no_op(client, db, login, make_user, task):
+    workers = [make_user(f"worker{i}@example.com", UserRole.WORKER) for i in range(3)]
+    url = f"/tasks/{task.task_id}/assignments/bulk"
+    headers = login("admin@example.com")
+    body = {"user_ids": [str(worker.user_id) for worker in workers]}
+
+    response = client.post(url, json=body, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["assigned"]) == 3
+
+    response = client.post(url, json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["assigned"] == []
+    assert response.json()["already_assigned"] == body["user_ids"]
+    assert _assignment_count(db, task.task_id) == 3
+
+    # The single-assignment helper returns the existing row rather than adding one
+    existing = crud.create_task_assignment(db, schemas.TaskAssignmentCreate(task_id=task.task_id, user_id=workers[0].user_id))
+    assert existing.user_id == workers[0].user_id
+    assert _assignment_count(db, task.task_id) == 3
@@ -0,0 +1,85 @@
+"""
+Refresh-token rotation and reuse detection, logout revocation, and purging of
+expired revocations.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db import models
+from app.db.models import UserRole
+from app.services import crud
+from app.services.token_revocation import revocation_list
+from conftest import PASSWORD
+
+
+@pytest.fixture(autouse=True)
+def fresh_revocation_list():
+    revocation_list.clear()
+    yield
+    revocation_list.clear()
+
+
+@pytest.fixture
+def tokens(client, make_user) -> dict:
+    make_user("worker@example.com", UserRole.WORKER)
+    response = client.post("/auth/login", json={"email": "worker@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _bearer(token: dict) -> dict:
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def _refresh(client, token: dict):
+    return client.post("/auth/refresh", json={"refresh_token": token["refresh_token"]})
+
+
+def test_refresh_rotates_tokens(client, tokens):
+    response = _refresh(client, tokens)
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/auth/me", headers=_bearer(rotated)).status_code == 200
+
+    # The rotated token is good for one more exchange
+    assert _refresh(client, rotated).status_code == 200
+
+
+def test_replayed_refresh_token_revokes_the_family(client, tokens):
+    rotated = _refresh(client, tokens).json()
+
+    # Presenting the used token again ends the whole login, including the token it was rotated into
+    assert _refresh(client, tokens).status_code == 401
+    assert _refresh(client, rotated).status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, tokens):
+    headers = _bearer(tokens)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    response = client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert _refresh(client, tokens).status_code == 401
+
+    # Other processes see the revocation once they rebuild their filter from the table
+    revocation_list.clear()
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_sync_purges_expired_revocations(db):
+    now = _utcnow()
+    crud.revoke_access_token(db, "expired", now - timedelta(minutes=1))
+    crud.revoke_access_token(db, "live", now + timedelta(minutes=30))
+
+    assert revocation_list.is_revoked(db, "live")
+    assert not revocation_list.is_revoked(db, "expired")
+    db.expire_all()
+    assert db.get(models.RevokedToken, "expired") is None
+    assert db.get(models.RevokedToken, "live") is not None